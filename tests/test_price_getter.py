@@ -0,0 +1,107 @@
+"""
+Tests für den Batch-Download in tools/price_getter - ohne Netzwerk, gegen einen Stub-Downloader.
+
+Author: Investment Team
+"""
+
+import importlib.util
+import sys
+from datetime import datetime
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import pandas as pd
+import pytz
+
+TOOLS_DIR = Path(__file__).resolve().parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+# price_getter ist ein Skript ohne .py-Endung
+_loader = SourceFileLoader("price_getter", str(TOOLS_DIR / "price_getter"))
+_spec = importlib.util.spec_from_loader("price_getter", _loader)
+price_getter = importlib.util.module_from_spec(_spec)
+_loader.exec_module(price_getter)
+
+MADRID = pytz.timezone("Europe/Madrid")
+
+# Basispreis pro Symbol; Close = Basis + Minute/100, damit die gewählte Kerze erkennbar ist
+BASE_PRICES = {"AAA": 100.0, "BBB": 50.0, "CCC": 20.0, "EURUSD=X": 1.10}
+NO_INTRADAY = {"CCC"}  # liefert nur Tageskerzen -> Daily-Fallback
+
+
+class FakeDownloader:
+    """Ersetzt yf.download: zeichnet Aufrufe auf, liefert (Ticker, Feld)-MultiIndex-Frames"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tickers, start, end, interval, **kwargs):
+        self.calls.append({"tickers": list(tickers), "start": start, "end": end, "interval": interval})
+        freq = "1min" if interval == "1m" else "1D"
+        start_utc = pd.Timestamp(start).tz_convert("UTC").ceil(freq)
+        index = pd.date_range(start_utc, pd.Timestamp(end).tz_convert("UTC"), freq=freq, inclusive="left")
+
+        frames = {}
+        for s in tickers:
+            if interval == "1m" and s in NO_INTRADAY:
+                continue
+            close = BASE_PRICES[s] + index.minute / 100
+            frames[s] = pd.DataFrame(
+                {"Open": close, "High": close, "Low": close, "Close": close, "Adj Close": close, "Volume": 1},
+                index=index,
+            )
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+
+def test_download_batch_one_request_per_chunk():
+    fake = FakeDownloader()
+    start = MADRID.localize(datetime(2025, 11, 3, 9, 0))
+    end = MADRID.localize(datetime(2025, 11, 13, 9, 0))
+
+    frames = price_getter.download_batch(["AAA", "BBB", "AAA"], start, end, "1m", downloader=fake)
+
+    # 10 Tage 1m-Kerzen -> zwei Stücke à max. 7 Tage, jeweils alle Symbole in einem Request
+    assert len(fake.calls) == 2
+    assert all(call["tickers"] == ["AAA", "BBB"] for call in fake.calls)
+    assert all(call["end"] - call["start"] <= pd.Timedelta(days=price_getter.MAX_INTRADAY_DAYS)
+               for call in fake.calls)
+    assert fake.calls[0]["start"] == start and fake.calls[-1]["end"] == end
+
+    for s in ("AAA", "BBB"):
+        assert len(frames[s]) == 10 * 24 * 60
+        assert frames[s].index.is_monotonic_increasing and frames[s].index.is_unique
+
+
+def test_fetch_snapshots_aligns_quotes_and_fx():
+    fake = FakeDownloader()
+    tickers = {"AAA": {"ccy": "USD"}, "BBB": {"ccy": "EUR"}, "CCC": {"ccy": "USD"}}
+    fx_tickers = {"USD": "EURUSD=X", "EUR": None}
+    targets = [MADRID.localize(datetime(2025, 11, 4, 16, 15)), MADRID.localize(datetime(2025, 11, 5, 16, 17))]
+
+    snapshots = price_getter.fetch_snapshots(targets, tickers=tickers, fx_tickers=fx_tickers, downloader=fake)
+
+    # Ticker gemeinsam, FX-Paar genau einmal, Daily-Fallback nur für das Symbol ohne Intraday-Daten
+    assert [(c["tickers"], c["interval"]) for c in fake.calls] == [
+        (["AAA", "BBB", "CCC"], "1m"),
+        (["CCC"], "1d"),
+        (["EURUSD=X"], "1m"),
+    ]
+
+    for t in targets:
+        quotes, fx_rates = snapshots[t]
+        for s in ("AAA", "BBB"):
+            px, ts = quotes[s]
+            assert ts == t
+            assert px == BASE_PRICES[s] + t.minute / 100
+
+        # Tageskerze von 00:00 UTC desselben Tages
+        px, ts = quotes["CCC"]
+        assert ts <= t and ts.date() == t.date()
+        assert px == BASE_PRICES["CCC"]
+
+        factor, pair, ts = fx_rates["USD"]
+        assert pair == "EURUSD=X" and ts == t
+        assert factor == 1.0 / (BASE_PRICES["EURUSD=X"] + t.minute / 100)
+        assert fx_rates["EUR"] == (1.0, None, None)
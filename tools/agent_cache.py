@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Agent Cache - inhaltsadressierter Cache für Research- und Validation-Ergebnisse
+
+Gleicher Ticker + gleicher Preis-Snapshot + gleiches Prompt-Template + gleiches Modell
+ergibt dieselbe Agent-Antwort - die wird nicht neu berechnet (und später nicht neu bezahlt).
+
+- Schlüssel: SHA-256 über (agent, ticker, snapshot, prompt template, model)
+- Persistenz: SQLite unter logs/agent_cache.sqlite
+- TTL: abgelaufene Einträge gelten als Miss und werden überschrieben
+- LRU: über MAX_CACHE_BYTES werden die am längsten nicht gelesenen Einträge gelöscht
+- Zähler: hits, misses, expired, evictions, saved_seconds (gesparte Agent-Latenz)
+
+Verwendung:
+    cache = AgentCache()
+    key = cache.key("research", "NVDA", snapshot, RESEARCH_PROMPT, RESEARCH_MODEL)
+    value = cache.get(key)
+    cache.put(key, value, latency=1.8)
+
+    python tools/agent_cache.py stats
+    python tools/agent_cache.py clear
+
+Author: Investment Team
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_AGENT_CACHE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs", "agent_cache.sqlite"))
+DEFAULT_TTL = 24 * 3600           # Sekunden
+MAX_CACHE_BYTES = 50 * 1024 ** 2  # Grösse der gespeicherten Antworten
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,   -- SHA-256 über Agent, Ticker, Snapshot, Prompt, Modell
+    agent       TEXT NOT NULL,
+    ticker      TEXT NOT NULL,
+    created     REAL NOT NULL,      -- Epoch-Sekunden
+    last_access REAL NOT NULL,
+    size        INTEGER NOT NULL,   -- Bytes der JSON-Antwort
+    latency     REAL NOT NULL,      -- Sekunden, die der Agent-Aufruf gedauert hat
+    value       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+COUNTERS = ["hits", "misses", "expired", "evictions", "saved_seconds"]
+
+
+# -----------------------------
+# AgentCache Klasse
+# -----------------------------
+class AgentCache:
+    def __init__(self, path=DEFAULT_AGENT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        self.stats = dict.fromkeys(COUNTERS, 0)  # Zähler dieses Laufs
+
+    def close(self):
+        self._flush_counters()
+        self.conn.close()
+
+    @staticmethod
+    def key(agent, ticker, snapshot, prompt, model):
+        payload = json.dumps([agent, ticker, str(snapshot), prompt, model], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Gecachte Antwort oder None (Miss / abgelaufen)"""
+        row = self.conn.execute("SELECT created, latency, value FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        created, latency, value = row
+        if self.ttl is not None and now - created > self.ttl:
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        self.stats["hits"] += 1
+        self.stats["saved_seconds"] += latency
+        return json.loads(value)
+
+    def put(self, key, value, agent="", ticker="", latency=0.0):
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, agent, ticker, now, now, len(data.encode("utf-8")), latency, data),
+        )
+        self._evict()
+        self.conn.commit()
+
+    def _evict(self):
+        """LRU: älteste Zugriffe löschen, bis die Gesamtgrösse unter max_bytes liegt"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self.stats["evictions"] += len(doomed)
+
+    def _flush_counters(self):
+        """Zähler dieses Laufs zu den persistenten Gesamtzählern addieren"""
+        self.conn.executemany(
+            "INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [(name, self.stats[name]) for name in COUNTERS],
+        )
+        self.conn.commit()
+        self.stats = dict.fromkeys(COUNTERS, 0)
+
+    def totals(self):
+        """Persistente Zähler über alle Läufe + Anzahl/Grösse der Einträge"""
+        self._flush_counters()
+        totals = dict.fromkeys(COUNTERS, 0)
+        totals.update(dict(self.conn.execute("SELECT name, value FROM counters").fetchall()))
+        entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {**totals, "entries": entries, "bytes": size}
+
+    def clear(self):
+        self.conn.execute("DELETE FROM responses")
+        self.conn.execute("DELETE FROM counters")
+        self.conn.commit()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("stats", "clear"):
+        print("Usage: python agent_cache.py stats|clear")
+        sys.exit(1)
+
+    cache = AgentCache()
+    if sys.argv[1] == "clear":
+        cache.clear()
+        print("✓ Agent Cache geleert")
+    else:
+        totals = cache.totals()
+        lookups = totals["hits"] + totals["misses"]
+        rate = totals["hits"] / lookups * 100 if lookups else 0.0
+        print(f"Einträge:     {totals['entries']} ({totals['bytes'] / 1024:.1f} KB)")
+        print(f"Hits/Misses:  {totals['hits']:.0f} / {totals['misses']:.0f} ({rate:.1f}% Hit-Rate)")
+        print(f"Abgelaufen:   {totals['expired']:.0f}, Evictions: {totals['evictions']:.0f}")
+        print(f"Gesparte Zeit: {totals['saved_seconds']:.2f}s")
+    cache.close()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Agent Pipeline - nebenläufiger Multi-Agent Workflow für den Scan-Modus
+
+Agent 1 (Research) und Agent 2 (Validation) laufen pro Ticker asynchron und über alle
+Ticker parallel (begrenzt durch ein Concurrency-Limit), jeweils mit Timeout und Retries.
+Agent 3 (Recommendation) läuft danach seriell in Ticker-Reihenfolge gegen einen
+festen Portfolio-Snapshot.
+
+Agent-Backends sind austauschbar - alles mit einer async run(*args)-Methode:
+- LocalAgent: ruft eine normale Funktion auf (z.B. analyze_stock, Placeholder-Agents)
+- StubAgent:  wie LocalAgent, aber mit konfigurierbarer Latenz/Fehlerrate (Offline-Durchsatztests)
+- CachedAgent: beliebiger Agent hinter dem AgentCache (agent_cache.py)
+
+Verwendung:
+    pipeline = AgentPipeline(LocalAgent(analyze_stock), LocalAgent(validate_analysis),
+                             make_recommendation, concurrency=8, timeout=30, retries=2)
+    results = pipeline.scan(tickers, portfolio, prices, market)
+
+Author: Investment Team
+"""
+
+import asyncio
+import random
+import time
+
+from portfolio_manager import Portfolio
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 60.0    # Sekunden pro Agent-Aufruf
+DEFAULT_RETRIES = 2       # zusätzliche Versuche nach Timeout/Fehler
+DEFAULT_BACKOFF = 0.5     # Sekunden, verdoppelt pro Retry
+
+
+class AgentError(Exception):
+    pass
+
+
+# -----------------------------
+# Agent-Backends
+# -----------------------------
+class LocalAgent:
+    """Agent als lokale Funktion (Placeholder oder synchroner API-Client)"""
+
+    def __init__(self, fn, name=None):
+        self.fn = fn
+        self.name = name or fn.__name__
+
+    async def run(self, *args):
+        # synchrone Funktion im Worker-Thread, damit der Event-Loop parallele Aufrufe weiterbedient
+        return await asyncio.to_thread(self.fn, *args)
+
+
+class StubAgent(LocalAgent):
+    """Lokaler Stub mit simulierter Modell-Latenz (Sekunden) und optionaler Fehlerrate"""
+
+    def __init__(self, fn, latency=1.0, jitter=0.0, failure_rate=0.0, seed=None, name=None):
+        super().__init__(fn, name)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    async def run(self, *args):
+        self.calls += 1
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+        if self.rng.random() < self.failure_rate:
+            raise AgentError(f"{self.name}: simulierter Fehler")
+        return await super().run(*args)
+
+
+class CachedAgent:
+    """
+    Agent hinter einem AgentCache. key_fn(*args) -> (ticker, snapshot, prompt, model);
+    bei einem Hit wird der innere Agent nicht aufgerufen.
+    """
+
+    def __init__(self, agent, cache, key_fn):
+        self.agent = agent
+        self.cache = cache
+        self.key_fn = key_fn
+        self.name = agent.name
+
+    async def run(self, *args):
+        ticker, snapshot, prompt, model = self.key_fn(*args)
+        key = self.cache.key(self.name, ticker, snapshot, prompt, model)
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+        start = time.perf_counter()
+        value = await self.agent.run(*args)
+        if not (isinstance(value, dict) and "error" in value):
+            self.cache.put(key, value, self.name, ticker, time.perf_counter() - start)
+        return value
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+class AgentPipeline:
+    def __init__(self, research_agent, validation_agent, recommend_fn, concurrency=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.research_agent = research_agent
+        self.validation_agent = validation_agent
+        self.recommend_fn = recommend_fn
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = {"calls": 0, "retries": 0, "failures": 0}
+
+    async def _call(self, agent, semaphore, *args):
+        """Ein Agent-Aufruf unter dem Concurrency-Limit, mit Timeout und Retries"""
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            async with semaphore:
+                self.stats["calls"] += 1
+                try:
+                    return await asyncio.wait_for(agent.run(*args), self.timeout)
+                except asyncio.TimeoutError:
+                    last_error = f"{agent.name}: Timeout nach {self.timeout:g}s"
+                except Exception as e:
+                    last_error = f"{agent.name}: {e}"
+        self.stats["failures"] += 1
+        raise AgentError(last_error)
+
+    async def _research_and_validate(self, ticker, market, semaphore):
+        try:
+            analysis = await self._call(self.research_agent, semaphore, ticker, market)
+            if "error" in analysis:
+                return {"ticker": ticker, "error": analysis["error"]}
+            validation = await self._call(self.validation_agent, semaphore, analysis)
+        except AgentError as e:
+            return {"ticker": ticker, "error": str(e)}
+        return {"ticker": ticker, "analysis": analysis, "validation": validation}
+
+    async def run(self, tickers, portfolio, prices, market, **recommend_kwargs):
+        """
+        Rückgabe: Liste (Reihenfolge wie tickers) von dicts mit ticker, analysis, validation,
+        recommendation - oder ticker + error
+        """
+        snapshot = Portfolio.from_checkpoint(portfolio.to_checkpoint())  # fester Stand für alle Empfehlungen
+        snapshot.max_position_size = portfolio.max_position_size
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._research_and_validate(t, market, semaphore) for t in tickers)
+        )
+
+        for result in results:  # Agent 3 seriell
+            if "error" not in result:
+                result["recommendation"] = self.recommend_fn(
+                    result["ticker"], snapshot, prices, result["analysis"], result["validation"], **recommend_kwargs
+                )
+        return results
+
+    def scan(self, tickers, portfolio, prices, market, **recommend_kwargs):
+        """Synchroner Einstiegspunkt (asyncio.run)"""
+        start = time.perf_counter()
+        results = asyncio.run(self.run(list(tickers), portfolio, prices, market, **recommend_kwargs))
+        self.stats["elapsed"] = time.perf_counter() - start
+        return results
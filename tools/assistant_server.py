@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Assistant Server - Trade Assistant als langlebiger Prozess mit warmem Zustand
+
+Jeder Aufruf von trade_assistant.py importiert pandas, liest Trade Log und Preis-Store,
+spielt Trades nach und baut den Risk Monitor. Der Server hält das alles im Speicher
+(Portfolio, MarketData, RiskMonitor, Agent Cache) und lädt nur neu, wenn sich das Trade
+Log (mtime/Grösse) oder der Preis-Store (neuer Snapshot) auf der Platte ändert.
+
+HTTP auf localhost, Antworten als JSON:
+    GET /health
+    GET /analyze?ticker=NVDA        # Agent 1 + 2
+    GET /recommend?ticker=NVDA      # Agent 1-3 (wie trade_assistant.py --ticker NVDA)
+    GET /scan                       # TOP OPPORTUNITIES (wie trade_assistant.py --action scan)
+
+Optionale Parameter log/store: Pfade des Clients - weichen sie vom Server ab, antwortet
+der Server mit 409 und der Client rechnet selbst. Anfragen werden nacheinander bearbeitet
+(ein Thread), der Zustand braucht daher keine Locks.
+
+Verwendung:
+    python tools/assistant_server.py              # Port 8765 (TRADE_ASSISTANT_URL für den Client)
+    python tools/trade_assistant.py --ticker NVDA # nutzt den Server automatisch
+
+Author: Investment Team
+"""
+
+import argparse
+import json
+import os
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from trade_assistant import (
+    ASSISTANT_SERVER_URL, TRADE_LOG, load_current_portfolio, load_current_prices,
+    analyze_stock, validate_analysis, run_recommend, run_scan, scan_opportunities
+)
+from market_data import load_market_data
+from price_store import DEFAULT_STORE_PATH
+from risk_metrics import load_risk_monitor
+from agent_cache import AgentCache
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_HOST = urlparse(ASSISTANT_SERVER_URL).hostname or "127.0.0.1"
+DEFAULT_PORT = urlparse(ASSISTANT_SERVER_URL).port or 8765
+
+
+def _file_signature(path):
+    """(mtime, Grösse) einer Datei oder None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _store_signature(path):
+    """Neuer Snapshot im Preis-Store = neue Datei im Verzeichnis (append-only)"""
+    try:
+        return os.stat(path).st_mtime_ns, len(os.listdir(path))
+    except FileNotFoundError:
+        return None
+
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Nicht JSON-serialisierbar: {type(value).__name__}")
+
+
+# -----------------------------
+# Warmer Zustand
+# -----------------------------
+class AssistantState:
+    def __init__(self, log_path=TRADE_LOG, store_path=DEFAULT_STORE_PATH, use_cache=True):
+        self.log_path = os.path.abspath(log_path)
+        self.store_path = store_path
+        self.cache = AgentCache() if use_cache else None
+        self.log_signature = self.store_signature = ()  # () = noch nie geladen
+        self.portfolio_messages, self.price_messages = [], []
+        self.reloads = {"portfolio": 0, "prices": 0}
+        self.refresh()
+
+    def refresh(self):
+        """Lädt Portfolio bzw. Preise + Risk Monitor nur, wenn sich die Dateien geändert haben"""
+        log_signature = _file_signature(self.log_path)
+        if log_signature != self.log_signature:
+            self.portfolio_messages = []
+            self.portfolio = load_current_portfolio(log_path=self.log_path, echo=self.portfolio_messages.append)
+            self.log_signature = log_signature
+            self.reloads["portfolio"] += 1
+
+        store_signature = _store_signature(self.store_path)
+        if store_signature != self.store_signature:
+            self.price_messages = []
+            self.market = load_market_data(reload=True)
+            self.prices = load_current_prices(echo=self.price_messages.append)
+            self.risk_monitor = load_risk_monitor()
+            self.store_signature = store_signature
+            self.reloads["prices"] += 1
+
+    @property
+    def messages(self):
+        """Meldungen, die trade_assistant.py beim Laden ausgeben würde"""
+        return self.portfolio_messages + self.price_messages
+
+    def handle(self, endpoint, params):
+        """Rückgabe: (HTTP-Status, Antwort-dict)"""
+        if params.get("log", self.log_path) != self.log_path or params.get("store", self.store_path) != self.store_path:
+            return 409, {"error": f"Server arbeitet mit {self.log_path} / {self.store_path}"}
+
+        self.refresh()
+        if endpoint == "health":
+            return 200, {"status": "ok", "log": self.log_path, "store": self.store_path,
+                         "positions": len(self.portfolio.positions), "tickers": len(self.prices),
+                         "reloads": self.reloads}
+        if endpoint == "scan":
+            results, _ = run_scan(self.portfolio, self.prices, self.market, self.risk_monitor, self.cache)
+            return 200, {"messages": self.messages, "opportunities": scan_opportunities(results)}
+
+        ticker = params.get("ticker")
+        if not ticker:
+            return 400, {"error": "Parameter 'ticker' fehlt"}
+        if endpoint == "recommend":
+            decision = run_recommend(ticker, self.portfolio, self.prices, self.market, self.risk_monitor, self.cache)
+            return 200, {"messages": self.messages, **decision}
+        if endpoint == "analyze":
+            analysis = analyze_stock(ticker, self.market)
+            if "error" in analysis:
+                return 200, {"messages": self.messages, "error": analysis["error"]}
+            return 200, {"messages": self.messages, "analysis": analysis, "validation": validate_analysis(analysis)}
+        return 404, {"error": f"Unbekannter Endpoint: /{endpoint}"}
+
+    def close(self):
+        if self.cache:
+            self.cache.close()
+
+
+# -----------------------------
+# HTTP Server
+# -----------------------------
+class AssistantHandler(BaseHTTPRequestHandler):
+    state = None  # AssistantState, von serve() gesetzt
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            status, payload = self.state.handle(url.path.strip("/"), params)
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        payload["elapsed_ms"] = (time.perf_counter() - start) * 1000
+
+        body = json.dumps(payload, default=_to_json, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, log_path=TRADE_LOG, use_cache=True):
+    state = AssistantState(log_path, use_cache=use_cache)
+    AssistantHandler.state = state
+    server = HTTPServer((host, port), AssistantHandler)
+    print(f"✓ Trade Assistant Server auf http://{host}:{port}")
+    print(f"  Trade Log: {state.log_path}")
+    print(f"  Portfolio: {len(state.portfolio.positions)} Positionen, Preise: {len(state.prices)} Ticker")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Server gestoppt")
+    finally:
+        server.server_close()
+        state.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade Assistant Server (warmer Zustand, localhost)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--trade-log", default=TRADE_LOG, help="Trade Log (relativ zum Arbeitsverzeichnis)")
+    parser.add_argument("--no-agent-cache", action="store_true",
+                        help="Research/Validation ohne logs/agent_cache.sqlite")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.trade_log, use_cache=not args.no_agent_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Backtester - event-getriebenes Backtesting rund um Portfolio
+
+Streamt eine zeitlich sortierte Preis-Historie (Zeitpunkte x Ticker, EUR) Bar für Bar
+durch eine Strategie-Callback-Funktion. Jede Order wird gegen ein RuleSet
+(competition_rules, Default: alle Competition-Regeln inkl. Stop-Loss) geprüft und nur
+wenn sie besteht über Portfolio.buy()/sell() ausgeführt. Nach jedem Bar wird
+portfolio.daily_values gefüllt.
+
+Strategie:
+    def strategy(bar):
+        # bar.date, bar.prices (np.ndarray), bar.tickers, bar.price(ticker), bar.portfolio
+        return [{"ticker": "NVDA", "action": "BUY", "shares": 1, "reason": "..."}]
+
+Verwendung:
+    result = run_backtest(history_df, strategy)
+    result.summary()
+
+    python tools/backtest.py          # Buy & Hold der Demo-Trades über die gespeicherte Historie
+
+Author: Investment Team
+"""
+
+import numpy as np
+import pandas as pd
+
+from competition_rules import RuleSet
+from portfolio_manager import Portfolio, STARTING_CAPITAL, MAX_POSITIONS, STOP_LOSS_THRESHOLD
+
+
+# -----------------------------
+# Bereinigte Historie
+# -----------------------------
+class PriceHistory:
+    """
+    Historie als Array: index (Zeitpunkte), tickers (Spalten), values (float64, sortiert und
+    forward-filled). values wird nicht kopiert - z.B. ein Memory-Map aus param_sweep.
+    """
+
+    def __init__(self, index, tickers, values):
+        self.index = index
+        self.tickers = list(tickers)
+        self.values = values
+
+    @classmethod
+    def from_frame(cls, history):
+        history = history.sort_index().ffill()  # Feiertage einzelner Börsen: letzter Kurs gilt weiter
+        return cls(history.index, history.columns, history.to_numpy(dtype=np.float64))
+
+
+# -----------------------------
+# Bar-Kontext für die Strategie
+# -----------------------------
+class Bar:
+    def __init__(self, date, tickers, prices, portfolio, lookup):
+        self.date = date
+        self.tickers = tickers      # Spaltenreihenfolge der Historie
+        self.prices = prices        # np.ndarray, EUR (forward-filled)
+        self.portfolio = portfolio
+        self._lookup = lookup       # Ticker -> Spaltenindex
+
+    def price(self, ticker):
+        i = self._lookup.get(ticker)
+        return None if i is None or np.isnan(self.prices[i]) else float(self.prices[i])
+
+    def price_dict(self):
+        return {t: float(p) for t, p in zip(self.tickers, self.prices) if not np.isnan(p)}
+
+
+# -----------------------------
+# Ergebnis
+# -----------------------------
+class BacktestResult:
+    def __init__(self, portfolio, rejected):
+        self.portfolio = portfolio
+        self.daily_values = pd.DataFrame(portfolio.daily_values).set_index("date") \
+            if portfolio.daily_values else pd.DataFrame(columns=["cash", "positions_value", "total_value"])
+        self.trades = pd.DataFrame(list(portfolio.trade_history))
+        self.rejected = pd.DataFrame(rejected, columns=["date", "ticker", "action", "shares", "message"])
+
+    @property
+    def total_return(self):
+        if self.daily_values.empty:
+            return 0.0
+        return float(self.daily_values["total_value"].iloc[-1] / self.portfolio.starting_capital - 1)
+
+    @property
+    def max_drawdown(self):
+        """Größter Rückgang vom bisherigen Hoch (negativ, z.B. -0.07)"""
+        if self.daily_values.empty:
+            return 0.0
+        values = self.daily_values["total_value"].to_numpy()
+        return float((values / np.maximum.accumulate(values) - 1).min())
+
+    def summary(self):
+        return {
+            "start": self.daily_values.index[0] if len(self.daily_values) else None,
+            "end": self.daily_values.index[-1] if len(self.daily_values) else None,
+            "final_value": float(self.daily_values["total_value"].iloc[-1]) if len(self.daily_values) else
+                           self.portfolio.cash,
+            "total_return": self.total_return,
+            "max_drawdown": self.max_drawdown,
+            "n_trades": len(self.trades),
+            "n_rejected": len(self.rejected),
+        }
+
+
+# -----------------------------
+# Engine
+# -----------------------------
+def run_backtest(history, strategy, starting_capital=STARTING_CAPITAL, portfolio=None,
+                 max_positions=MAX_POSITIONS, ai_model="Backtest", rules=None):
+    """
+    history: DataFrame (Index = Zeitpunkte tz-aware, Spalten = Ticker, Werte = Preis EUR) oder
+             PriceHistory (bereits bereinigt, wird ohne Kopie verwendet)
+    strategy: Callback(bar) -> Liste von Orders (dict mit ticker, action, shares, optional reason)
+    rules: RuleSet (Default: RuleSet.default mit max_positions und portfolio.max_position_size)
+    """
+    if not isinstance(history, PriceHistory):
+        history = PriceHistory.from_frame(history)
+    tickers = history.tickers
+    lookup = {t: i for i, t in enumerate(tickers)}
+    prices = history.values
+
+    portfolio = portfolio or Portfolio(starting_capital=starting_capital)
+    book = portfolio.book
+    rules = rules or RuleSet.default(max_positions=max_positions, max_position_size=portfolio.max_position_size)
+    rejected = []
+    cols = None  # Spaltenindizes der Book-Positionen, nur bei Positionsänderung neu
+
+    for date, row in zip(history.index, prices):
+        bar = Bar(date, tickers, row, portfolio, lookup)
+
+        for order in strategy(bar) or ():
+            ticker, action, shares = order["ticker"], order["action"], order["shares"]
+            price = bar.price(ticker)
+            if price is None:
+                rejected.append((date, ticker, action, shares, f"Kein Preis für {ticker}"))
+                continue
+            passed, reasons = rules.check_trade(portfolio, ticker, action, shares, price, date, bar.price_dict())
+            if passed:
+                trade = portfolio.buy if action == "BUY" else portfolio.sell
+                result = trade(ticker, shares, price, date, order.get("reason", ""), ai_model)
+                if result["success"]:
+                    cols = None
+                    continue
+                reasons = [result["message"]]
+            rejected.append((date, ticker, action, shares, "; ".join(reasons)))
+
+        if cols is None:
+            cols = book.columns_for(tickers)
+        position_prices = row[cols]
+        # Fehlender Kurs (noch nie notiert) -> Einstandspreis, wie get_portfolio_value()
+        position_prices = np.where(np.isnan(position_prices), book.avg_price, position_prices)
+        positions_value = float(position_prices @ book.shares)
+        portfolio.daily_values.append({
+            "date": date,
+            "cash": portfolio.cash,
+            "positions_value": positions_value,
+            "total_value": portfolio.cash + positions_value,
+        })
+
+    return BacktestResult(portfolio, rejected)
+
+
+# -----------------------------
+# Beispiel-Strategien
+# -----------------------------
+def buy_and_hold(orders):
+    """
+    Arbeitet eine Liste (ticker, shares, reason) ab - eine Order pro Tag (Competition-Regel),
+    danach wird gehalten.
+    """
+    queue = list(orders)
+
+    def strategy(bar):
+        while queue:
+            ticker, shares, reason = queue[0]
+            if bar.price(ticker) is not None:
+                break
+            queue.pop(0)  # Ticker ohne Preis überspringen
+        if not queue or not bar.portfolio.can_trade_today(bar.date):
+            return []
+        ticker, shares, reason = queue.pop(0)
+        return [{"ticker": ticker, "action": "BUY", "shares": shares, "reason": reason}]
+
+    return strategy
+
+
+def stop_loss_exit(inner, threshold=STOP_LOSS_THRESHOLD):
+    """Wrapper: verkauft Positionen mit ausgelöstem Stop-Loss, sonst Orders der inneren Strategie"""
+    def strategy(bar):
+        book = bar.portfolio.book
+        if len(book):
+            prices = book.price_vector(bar.price_dict())
+            hits = np.flatnonzero(book.stop_loss_mask(prices, threshold))
+            sellable = [i for i in hits if bar.portfolio.can_sell(book.tickers[i], bar.date)]
+            if sellable:
+                i = sellable[0]
+                return [{"ticker": book.tickers[i], "action": "SELL", "shares": book.shares[i],
+                         "reason": "Stop-Loss"}]
+        return inner(bar)
+
+    return strategy
+
+
+def main():
+    from price_store import PriceStore
+
+    history = PriceStore().history()
+    if history.empty:
+        print("✗ Keine Preis-Historie gefunden. Bitte zuerst price_getter ausführen!")
+        return
+
+    demo_orders = [
+        ("NVDA", 2, "Core AI hardware play"),
+        ("AMD", 1, "Semiconductor/AI computing"),
+        ("0700.HK", 3, "Gaming & cloud leader Asia"),
+        ("9984.T", 1, "Tech investment exposure"),
+        ("6758.T", 4, "Entertainment & tech diversification"),
+    ]
+    result = run_backtest(history, stop_loss_exit(buy_and_hold(demo_orders)))
+
+    print("=" * 80)
+    print(f"BACKTEST: {len(history)} Bars x {len(history.columns)} Ticker")
+    print("=" * 80)
+    for key, value in result.summary().items():
+        print(f"  {key:14s}: {value}")
+    if not result.rejected.empty:
+        print("\nAbgelehnte Orders:")
+        print(result.rejected.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
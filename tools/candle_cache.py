@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Candle Cache - lokaler Kerzen-Speicher für price_getter
+
+Speichert heruntergeladene Kerzen (1m, 1d, ...) in einer SQLite-Datei unter data/.
+Pro (Symbol, Intervall, Tag) wird festgehalten, welche Zeitfenster bereits geladen wurden.
+Bei einem neuen Abruf werden nur die fehlenden Zeitfenster angefragt; Fenster, die
+zum Abrufzeitpunkt bereits in der Vergangenheit lagen, werden nie wieder geladen.
+
+Deckt der Cache das angefragte Fenster ab, läuft price_getter komplett offline.
+
+Author: Investment Team
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_CACHE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "candles.sqlite"))
+CANDLE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol    TEXT NOT NULL,
+    interval  TEXT NOT NULL,
+    ts        INTEGER NOT NULL,   -- Epoch-Sekunden (UTC)
+    open      REAL,
+    high      REAL,
+    low       REAL,
+    close     REAL,
+    adj_close REAL,
+    volume    REAL,
+    PRIMARY KEY (symbol, interval, ts)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol    TEXT NOT NULL,
+    interval  TEXT NOT NULL,
+    day       TEXT NOT NULL,      -- UTC-Datum YYYY-MM-DD
+    start_ts  INTEGER NOT NULL,
+    end_ts    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_key ON coverage (symbol, interval, day);
+"""
+
+
+def _to_epoch(dt):
+    """datetime/Timestamp (mit oder ohne TZ) -> Epoch-Sekunden UTC"""
+    ts = pd.Timestamp(dt)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp())
+
+
+def _day(epoch):
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _split_by_day(start_ts, end_ts):
+    """Zerlegt [start_ts, end_ts) an UTC-Tagesgrenzen"""
+    parts = []
+    cur = start_ts
+    while cur < end_ts:
+        day_start = datetime.fromtimestamp(cur, tz=timezone.utc).replace(hour=0, minute=0, second=0)
+        next_day = int((day_start + timedelta(days=1)).timestamp())
+        stop = min(next_day, end_ts)
+        parts.append((_day(cur), cur, stop))
+        cur = stop
+    return parts
+
+
+# -----------------------------
+# CandleCache Klasse
+# -----------------------------
+class CandleCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, offline=False):
+        self.path = path
+        self.offline = offline  # True: niemals downloaden, nur Cache lesen
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def missing_ranges(self, symbol, interval, start, end):
+        """Liefert die noch nicht geladenen Teilfenster von [start, end) als Epoch-Paare"""
+        start_ts, end_ts = _to_epoch(start), _to_epoch(end)
+        rows = self.conn.execute(
+            "SELECT start_ts, end_ts FROM coverage "
+            "WHERE symbol = ? AND interval = ? AND day BETWEEN ? AND ? "
+            "AND end_ts > ? AND start_ts < ? ORDER BY start_ts",
+            (symbol, interval, _day(start_ts), _day(max(start_ts, end_ts - 1)), start_ts, end_ts),
+        ).fetchall()
+
+        missing = []
+        cur = start_ts
+        for cov_start, cov_end in rows:
+            if cov_start > cur:
+                missing.append((cur, min(cov_start, end_ts)))
+            cur = max(cur, cov_end)
+            if cur >= end_ts:
+                break
+        if cur < end_ts:
+            missing.append((cur, end_ts))
+        return missing
+
+    def store(self, symbol, interval, df, start_ts, end_ts):
+        """
+        Speichert Kerzen und markiert [start_ts, end_ts) als geladen.
+        Das Ende wird auf 'jetzt' begrenzt, damit noch offene Sessions später ergänzt werden.
+        """
+        end_ts = min(end_ts, int(datetime.now(timezone.utc).timestamp()))
+
+        if df is not None and not df.empty:
+            idx = df.index
+            if idx.tz is None:
+                idx = idx.tz_localize("UTC")
+            epochs = ((idx.tz_convert("UTC") - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).tolist()
+            cols = [df[c].tolist() if c in df.columns else [None] * len(df) for c in CANDLE_COLUMNS]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(symbol, interval, ts, *vals) for ts, *vals in zip(epochs, *cols)],
+            )
+
+        if end_ts > start_ts:
+            for day, s, e in _split_by_day(start_ts, end_ts):
+                self._add_coverage(symbol, interval, day, s, e)
+        self.conn.commit()
+
+    def _add_coverage(self, symbol, interval, day, start_ts, end_ts):
+        """[start_ts, end_ts) eintragen und mit überlappenden/angrenzenden Fenstern des Tages verschmelzen"""
+        where = "WHERE symbol = ? AND interval = ? AND day = ? AND end_ts >= ? AND start_ts <= ?"
+        params = (symbol, interval, day, start_ts, end_ts)
+        for cov_start, cov_end in self.conn.execute(f"SELECT start_ts, end_ts FROM coverage {where}", params).fetchall():
+            start_ts, end_ts = min(start_ts, cov_start), max(end_ts, cov_end)
+        self.conn.execute(f"DELETE FROM coverage {where}", params)
+        self.conn.execute("INSERT INTO coverage VALUES (?, ?, ?, ?, ?)", (symbol, interval, day, start_ts, end_ts))
+
+    def load(self, symbol, interval, start, end):
+        """Kerzen aus dem Cache als DataFrame (UTC-Index, yfinance-Spaltennamen)"""
+        rows = self.conn.execute(
+            "SELECT ts, open, high, low, close, adj_close, volume FROM candles "
+            "WHERE symbol = ? AND interval = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (symbol, interval, _to_epoch(start), _to_epoch(end)),
+        ).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=CANDLE_COLUMNS)
+
+        df = pd.DataFrame(rows, columns=["ts"] + CANDLE_COLUMNS)
+        df.index = pd.to_datetime(df.pop("ts"), unit="s", utc=True)
+        df.index.name = "Datetime"
+        return df
+
+    def get_candles_batch(self, symbols, start, end, interval, fetch):
+        """
+        Kerzen für mehrere Symbole, nur fehlende Fenster werden über fetch() geladen.
+        fetch(symbols, start, end, interval) -> {symbol: DataFrame}
+        Symbole mit identischen Lücken teilen sich einen Request.
+        """
+        if not self.offline:
+            gaps = {}
+            for s in symbols:
+                for gap in self.missing_ranges(s, interval, start, end):
+                    gaps.setdefault(gap, []).append(s)
+
+            for (gap_start, gap_end), gap_symbols in gaps.items():
+                frames = fetch(
+                    gap_symbols,
+                    pd.Timestamp(gap_start, unit="s", tz="UTC").to_pydatetime(),
+                    pd.Timestamp(gap_end, unit="s", tz="UTC").to_pydatetime(),
+                    interval,
+                )
+                for s in gap_symbols:
+                    self.store(s, interval, frames.get(s), gap_start, gap_end)
+
+        return {s: self.load(s, interval, start, end) for s in symbols}
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Competition Rules - Regel-Engine für Batch-Validierung von Trades
+
+Alle Competition-Regeln an einer Stelle, als austauschbare Rule-Objekte:
+- MAX_POSITIONS (max 15 Positionen)
+- MIN_HOLD_DAYS (3 Tage Mindesthaltedauer)
+- MAX_TRADES_PER_DAY (max 1 Trade pro Tag)
+- MAX_POSITION_SIZE (max 25% pro Aktie)
+- STOP_LOSS_THRESHOLD (kein Nachkauf bei ausgelöstem -8% Stop-Loss)
+- Cash / gehaltene Stückzahl
+
+Ein RuleSet bewertet einen ganzen Batch vorgeschlagener Trades in einem Durchlauf
+gegen denselben Portfolio-Zustand (jeder Trade einzeln, ohne buy() + Rollback):
+
+    rules = RuleSet.default()
+    result = rules.evaluate(portfolio, proposals_df, current_prices)
+    result[result["passed"]]
+
+    rules.evaluate_log(trades_df)          # ganzes Trade Log, jede Zeile gegen den Zustand davor
+
+Genutzt von validate_trade_log (portfolio_manager), backtest und rebalancer.
+
+Author: Investment Team
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from portfolio_manager import (
+    STARTING_CAPITAL, MAX_POSITIONS, MIN_HOLD_DAYS, MAX_TRADES_PER_DAY, MAX_POSITION_SIZE, STOP_LOSS_THRESHOLD,
+    _EPS, _annotate_trade_log, _to_epoch_seconds,
+)
+
+
+# -----------------------------
+# Batch-Kontext (Portfolio-Zustand einmal pro Batch)
+# -----------------------------
+class TradeBatch:
+    """
+    Vorgeschlagene Trades (DataFrame mit ticker, action, shares, price, date) plus der
+    Portfolio-Zustand *vor* jedem Trade als Arrays (cash, n_positions, held_shares, ...).
+    TradeBatch(portfolio, trades): alle Trades gegen denselben Zustand, einmal pro Batch berechnet.
+    TradeBatch.from_trade_log(trades_df): jeder Trade gegen den Zustand nach den vorherigen Log-Zeilen.
+    TradeBatch.single(...): ein Trade aus Skalaren, ohne DataFrame (Backtest-Hot-Path).
+    """
+
+    def __init__(self, portfolio, trades, current_prices=None):
+        self._set_trades(trades)
+        # Position im Book je Trade (-1 = nicht gehalten)
+        pos = self.trades["ticker"].map(portfolio.book.index).fillna(-1).to_numpy(dtype=np.int64)
+        days = self.date.dt.date if hasattr(self.date, "dt") else self.date.map(lambda d: d.date())
+        self._set_state(portfolio, pos, days.unique(), days, current_prices)
+
+    @classmethod
+    def single(cls, portfolio, ticker, action, shares, price, date, current_prices=None):
+        """Ein Trade als 1-elementige Arrays (keine pandas-Objekte)"""
+        batch = cls.__new__(cls)
+        batch.trades = None
+        batch.n = 1
+        batch.ticker = np.array([ticker], dtype=object)
+        batch.is_buy = np.array([action == "BUY"])
+        batch.is_sell = np.array([action == "SELL"])
+        batch.shares = np.array([shares], dtype=np.float64)
+        batch.price = np.array([price], dtype=np.float64)
+        batch.total = batch.shares * batch.price
+        batch.date = [date]
+        batch._days_held = None
+        day = date.date()
+        batch._set_state(portfolio, np.array([portfolio.book.index.get(ticker, -1)], dtype=np.int64),
+                         [day], [day], current_prices)
+        return batch
+
+    def _set_state(self, portfolio, pos, unique_days, days, current_prices):
+        """Portfolio-Zustand vor den Trades (pos: Book-Index je Trade, days: Handelstag je Trade)"""
+        book = portfolio.book
+        n = self.n
+        self.held = pos >= 0
+        safe = np.where(self.held, pos, 0)
+        self.held_shares = np.where(self.held, book.shares[safe] if len(book) else 0.0, 0.0)
+        self.avg_price = np.where(self.held, book.avg_price[safe] if len(book) else np.nan, np.nan)
+        self.buy_ts = np.where(self.held, book.buy_ts[safe] if len(book) else 0, 0)
+
+        # Portfolio-Zustand (für alle Trades gleich)
+        self.cash = np.full(n, portfolio.cash, dtype=np.float64)
+        self.n_positions = np.full(n, len(book), dtype=np.int64)
+        prices = book.price_vector(current_prices or {})
+        value = max(float(book.total_value(portfolio.cash, prices)), portfolio.starting_capital)
+        self.portfolio_value = np.full(n, value, dtype=np.float64)
+        current = current_prices or {}
+        self.current_price = np.array([current.get(t, np.nan) for t in self.ticker], dtype=np.float64)
+
+        # Tageslimit: Trades pro Tag über den History-Index, einmal pro eindeutigem Tag
+        counts = {day: portfolio.trade_history.count_on(day) for day in unique_days}
+        self.trades_on_day = np.array([counts[day] for day in days], dtype=np.int64)
+
+    @classmethod
+    def from_trade_log(cls, trades_df, starting_capital=STARTING_CAPITAL):
+        """
+        Batch aus einem Trade-Log: der Zustand vor jeder Zeile wird spaltenweise aus den
+        vorherigen Zeilen berechnet (_annotate_trade_log), ohne buy()/sell() nachzuspielen.
+        """
+        df = _annotate_trade_log(trades_df, starting_capital)
+        batch = cls.__new__(cls)
+        batch._set_trades(df)
+
+        is_buy = batch.is_buy
+        pos_before = df["_pos_after"].to_numpy() - df["_signed"].to_numpy()
+        batch.held = pos_before > _EPS
+        batch.held_shares = np.where(batch.held, pos_before, 0.0)
+        batch.avg_price = np.where(batch.held, df["_avg_before"].to_numpy(), np.nan)
+        open_utc = df["_open_date"].dt.tz_convert("UTC") if df["_open_date"].dt.tz else \
+            df["_open_date"].dt.tz_localize("UTC")
+        open_ts = ((open_utc - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+        batch.buy_ts = np.where(batch.held, open_ts, 0)
+
+        cash_after = df["cash_after"].to_numpy()
+        batch.cash = np.concatenate([[float(starting_capital)], cash_after])[:batch.n]
+        closes = batch.is_sell & (df["_pos_after"].to_numpy() <= _EPS)
+        opens = df["_opens"].to_numpy()
+        batch.n_positions = (np.cumsum(opens) - np.cumsum(closes) - opens + closes).astype(np.int64)
+
+        # Portfolio-Wert zu Einstandspreisen vor dem Trade (wie get_portfolio_value({}) in buy())
+        realized = np.where(batch.is_sell & batch.held,
+                            batch.shares * (batch.price - np.nan_to_num(batch.avg_price)), 0.0)
+        value_before = starting_capital + np.concatenate([[0.0], np.cumsum(realized)])[:batch.n]
+        batch.portfolio_value = np.maximum(value_before, starting_capital)
+        batch.current_price = np.full(batch.n, np.nan)  # Log: Trade-Preis ist der aktuelle Preis
+        batch.trades_on_day = df.groupby(df["date"].dt.date).cumcount().to_numpy(dtype=np.int64)
+        return batch
+
+    def _set_trades(self, trades):
+        self.trades = trades.reset_index(drop=True)
+        self.n = len(self.trades)
+        self.ticker = self.trades["ticker"].to_numpy()
+        self.is_buy = (self.trades["action"] == "BUY").to_numpy()
+        self.is_sell = (self.trades["action"] == "SELL").to_numpy()
+        self.shares = self.trades["shares"].to_numpy(dtype=np.float64)
+        self.price = self.trades["price"].to_numpy(dtype=np.float64)
+        self.total = self.shares * self.price
+        self.date = self.trades["date"]
+        if not pd.api.types.is_datetime64_any_dtype(self.date):
+            self.date = pd.Series(list(self.date), dtype=object).map(pd.Timestamp)
+        self._days_held = None
+
+    def days_held(self):
+        """Haltedauer in Tagen je Trade (einmal berechnet)"""
+        if self._days_held is None:
+            if hasattr(self.date, "dt"):
+                utc = self.date.dt.tz_convert("UTC") if self.date.dt.tz else self.date.dt.tz_localize("UTC")
+                trade_ts = ((utc - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+            else:
+                trade_ts = np.array([_to_epoch_seconds(d) for d in self.date], dtype=np.int64)
+            self._days_held = (trade_ts - self.buy_ts) // 86400
+        return self._days_held
+
+
+# -----------------------------
+# Regeln
+# -----------------------------
+class Rule(ABC):
+    """Basisklasse: check() liefert True pro Trade, der die Regel erfüllt"""
+    name = "rule"
+
+    @abstractmethod
+    def check(self, batch):
+        """bool-Array (ein Wert pro Trade im Batch)"""
+
+    def reason(self, batch, i):
+        return f"Regel {self.name} verletzt"
+
+
+class CashRule(Rule):
+    name = "cash"
+
+    def check(self, batch):
+        return ~batch.is_buy | (batch.total <= batch.cash)
+
+    def reason(self, batch, i):
+        return f"Nicht genug Cash: €{batch.cash[i]:.2f} verfügbar, €{batch.total[i]:.2f} benötigt"
+
+
+class HoldingsRule(Rule):
+    name = "holdings"
+
+    def check(self, batch):
+        return ~batch.is_sell | (batch.held & (batch.shares <= batch.held_shares))
+
+    def reason(self, batch, i):
+        if not batch.held[i]:
+            return f"{batch.ticker[i]} nicht im Portfolio"
+        return f"Nicht genug Aktien: {batch.held_shares[i]:g} verfügbar"
+
+
+class MaxPositionsRule(Rule):
+    name = "max_positions"
+
+    def __init__(self, max_positions=MAX_POSITIONS):
+        self.max_positions = max_positions
+
+    def check(self, batch):
+        return ~(batch.is_buy & ~batch.held) | (batch.n_positions < self.max_positions)
+
+    def reason(self, batch, i):
+        return f"Portfolio at max positions ({batch.n_positions[i]}/{self.max_positions})"
+
+
+class MinHoldRule(Rule):
+    name = "min_hold_days"
+
+    def __init__(self, min_hold_days=MIN_HOLD_DAYS):
+        self.min_hold_days = min_hold_days
+
+    def check(self, batch):
+        ok = np.ones(batch.n, dtype=bool)
+        sells = batch.is_sell & batch.held
+        if sells.any():
+            ok[sells] = batch.days_held()[sells] >= self.min_hold_days
+        return ok
+
+    def reason(self, batch, i):
+        return (f"Mindesthaltedauer nicht erreicht: {batch.days_held()[i]} Tage "
+                f"(min {self.min_hold_days})")
+
+
+class TradesPerDayRule(Rule):
+    name = "max_trades_per_day"
+
+    def __init__(self, max_trades_per_day=MAX_TRADES_PER_DAY):
+        self.max_trades_per_day = max_trades_per_day
+
+    def check(self, batch):
+        return batch.trades_on_day < self.max_trades_per_day
+
+    def reason(self, batch, i):
+        return f"Max {self.max_trades_per_day} Trade pro Tag: heute bereits {batch.trades_on_day[i]}"
+
+
+class PositionSizeRule(Rule):
+    name = "max_position_size"
+
+    def __init__(self, max_position_size=MAX_POSITION_SIZE):
+        self.max_position_size = max_position_size
+
+    def check(self, batch):
+        return ~batch.is_buy | (batch.total / batch.portfolio_value <= self.max_position_size)
+
+    def reason(self, batch, i):
+        return f"Position zu groß: Max {self.max_position_size*100}% pro Aktie erlaubt"
+
+
+class StopLossRule(Rule):
+    """Kein Nachkauf in eine Position, deren Stop-Loss ausgelöst ist"""
+    name = "stop_loss"
+
+    def __init__(self, threshold=STOP_LOSS_THRESHOLD):
+        self.threshold = threshold
+
+    def loss_pct(self, batch):
+        price = np.where(np.isnan(batch.current_price), batch.price, batch.current_price)
+        with np.errstate(invalid="ignore"):
+            return (price - batch.avg_price) / batch.avg_price
+
+    def check(self, batch):
+        with np.errstate(invalid="ignore"):
+            triggered = batch.held & (self.loss_pct(batch) <= self.threshold)
+        return ~(batch.is_buy & triggered)
+
+    def reason(self, batch, i):
+        price = batch.price[i] if np.isnan(batch.current_price[i]) else batch.current_price[i]
+        return f"STOP-LOSS triggered: {(price / batch.avg_price[i] - 1)*100:.1f}% loss"
+
+
+# -----------------------------
+# RuleSet
+# -----------------------------
+class RuleSet:
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.by_name = {rule.name: rule for rule in self.rules}
+
+    @classmethod
+    def default(cls, max_positions=MAX_POSITIONS, min_hold_days=MIN_HOLD_DAYS,
+                max_trades_per_day=MAX_TRADES_PER_DAY, max_position_size=MAX_POSITION_SIZE,
+                stop_loss_threshold=STOP_LOSS_THRESHOLD):
+        """Competition-Regeln (Parameter überschreibbar, z.B. für Parameter-Sweeps)"""
+        return cls([
+            CashRule(),
+            HoldingsRule(),
+            MaxPositionsRule(max_positions),
+            MinHoldRule(min_hold_days),
+            TradesPerDayRule(max_trades_per_day),
+            PositionSizeRule(max_position_size),
+            StopLossRule(stop_loss_threshold),
+        ])
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+    def without(self, *names):
+        """RuleSet ohne die genannten Regeln"""
+        return RuleSet([rule for rule in self.rules if rule.name not in names])
+
+    def evaluate(self, portfolio, trades, current_prices=None):
+        """
+        Bewertet alle Trades gegen denselben Portfolio-Zustand.
+        Rückgabe: trades + eine bool-Spalte pro Regel + 'passed' + 'reasons' (Liste)
+        """
+        return self.evaluate_batch(TradeBatch(portfolio, trades, current_prices))
+
+    def evaluate_log(self, trades_df, starting_capital=STARTING_CAPITAL):
+        """Wie evaluate(), aber jede Log-Zeile gegen den Zustand nach den vorherigen Zeilen"""
+        return self.evaluate_batch(TradeBatch.from_trade_log(trades_df, starting_capital))
+
+    def evaluate_batch(self, batch):
+        result = batch.trades.copy()
+        reasons = [[] for _ in range(batch.n)]
+
+        for rule in self.rules:
+            ok = np.asarray(rule.check(batch), dtype=bool)
+            result[rule.name] = ok
+            for i in np.flatnonzero(~ok):
+                reasons[i].append(rule.reason(batch, i))
+
+        result["passed"] = result[[rule.name for rule in self.rules]].all(axis=1)
+        result["reasons"] = reasons
+        return result
+
+    def check_trade(self, portfolio, ticker, action, shares, price, date, current_prices=None):
+        """Einzelner Trade -> (passed, reasons); ohne DataFrame, für Backtest-Schleifen"""
+        batch = TradeBatch.single(portfolio, ticker, action, shares, price, pd.Timestamp(date), current_prices)
+        reasons = [rule.reason(batch, 0) for rule in self.rules if not rule.check(batch)[0]]
+        return not reasons, reasons
+
+
+DEFAULT_RULES = RuleSet.default()
+# Trade-Log-Prüfung: nur die Competition-Regeln (Stop-Loss ist eine Regel der Investment Thesis)
+LOG_RULES = DEFAULT_RULES.without("stop_loss")
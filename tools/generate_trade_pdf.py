@@ -2,117 +2,70 @@
 """
 Generate Trade Documentation PDF
 Creates a professional PDF for each trade with Yahoo Finance screenshot links
+
+Batch-Modus: ein Bestätigungs-PDF für jeden Trade im Trade Log, der noch kein aktuelles
+Dokument unter docs/trades/ hat. Preisdaten werden einmal geladen und an einen
+Prozess-Pool verteilt; ein Content-Hash pro Dokument (docs/trades/trade_documents.json)
+sorgt dafür, dass unveränderte Dokumente übersprungen werden.
+Dateinamen (CLI und Batch): trade_<YYYYmmdd_HHMM in UTC>_<Aktion>_<Ticker>.pdf; per CLI
+erstellte Dokumente ohne Manifest-Eintrag gelten für den Trade mit gleichem Tag/Aktion/Ticker.
+
+Verwendung:
+    python generate_trade_pdf.py NVDA BUY 1 176.27 'AI hardware leader'
+    python generate_trade_pdf.py --batch [portfolio_trades.csv] [--force] [--processes N]
 """
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import argparse
+import bisect
+import hashlib
+import json
+import os
 import pandas as pd
+import re
 import sys
 
-def create_trade_document(ticker, action, shares, price, reason, ai_model="Multi-Agent"):
-    """
-    Create a PDF document for a trade
-    
-    Args:
-        ticker: Stock ticker (e.g., 'NVDA', '0700.HK')
-        action: 'BUY' or 'SELL'
-        shares: Number of shares
-        price: Price per share in EUR
-        reason: Trade reasoning
-        ai_model: AI model used for decision
-    """
-    # Load latest prices
-    import glob
-    price_files = sorted(glob.glob('data/prices_*.csv'))
-    if not price_files:
-        print("❌ No price files found. Run price_getter first!")
-        return None
-    
-    latest_prices = pd.read_csv(price_files[-1])
-    
-    # Find stock info
-    stock_info = latest_prices[latest_prices['Ticker'] == ticker]
-    if stock_info.empty:
-        print(f"❌ Ticker {ticker} not found in price data!")
-        return None
-    
-    stock_info = stock_info.iloc[0]
-    stock_name = stock_info['Name']
-    sector = stock_info['Sector']
-    region = stock_info['Region']
-    yahoo_url = stock_info['Yahoo URL']
-    native_price = stock_info['Price (native)']
-    native_ccy = stock_info['Native Ccy']
+from price_store import PriceStore
+from report_render import get_style, render
+
+# -----------------------------
+# Configuration
+# -----------------------------
+TRADES_DIR = "docs/trades"
+MANIFEST_NAME = "trade_documents.json"  # {Dateiname: Content-Hash} im TRADES_DIR
+DOCUMENT_VERSION = 1                    # erhöhen, wenn sich das Layout ändert -> alles neu rendern
+INFO_COLUMNS = ['Ticker', 'Name', 'Sector', 'Region', 'Yahoo URL', 'Price (native)', 'Native Ccy']
+DOCUMENT_NAME = re.compile(r"trade_(\d{8})_\d{4}_([A-Z]+)_(.+?)(?:_\d+)?\.pdf$")
+
+def trade_story(ticker, action, shares, price, reason, ai_model, info, trade_date):
+    """Story-Spezifikation (report_render) eines Trade-Dokuments; info: Zeile aus dem Preis-Snapshot"""
+    stock_name = info['Name']
+    sector = info['Sector']
+    region = info['Region']
+    yahoo_url = info['Yahoo URL']
+    native_price = info['Price (native)']
+    native_ccy = info['Native Ccy']
     
     # Calculate trade value
     trade_value = shares * price
     
-    # Generate filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    filename = f"docs/trades/trade_{timestamp}_{action}_{ticker}.pdf"
-    
-    # Create PDF
-    doc = SimpleDocTemplate(filename, pagesize=A4,
-                           topMargin=2*cm, bottomMargin=2*cm,
-                           leftMargin=2.5*cm, rightMargin=2.5*cm)
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        textColor=colors.HexColor('#1a1a1a'),
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=12,
-        spaceBefore=20,
-        fontName='Helvetica-Bold'
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontSize=11,
-        alignment=TA_LEFT,
-        spaceAfter=12,
-        leading=16
-    )
-    
-    link_style = ParagraphStyle(
-        'LinkStyle',
-        parent=styles['BodyText'],
-        fontSize=10,
-        textColor=colors.blue,
-        spaceAfter=8,
-        fontName='Courier'
-    )
-    
-    story = []
+    # Styles (prozessweite Registry, siehe report_render.py)
+    title_style = get_style("title", fontSize=20, spaceAfter=20)
+    body_style = get_style("body", fontSize=11, alignment=TA_LEFT, leading=16)
     
     # Title
     action_color = 'green' if action == 'BUY' else 'red'
-    story.append(Paragraph(f"<font color='{action_color}'>{action} ORDER</font>", title_style))
-    story.append(Paragraph(f"{stock_name} ({ticker})", styles['Heading2']))
-    story.append(Paragraph(f"Trade Date: {datetime.now().strftime('%B %d, %Y %H:%M')}", body_style))
-    story.append(Spacer(1, 0.5*cm))
+    story = [
+        ("p", title_style, f"<font color='{action_color}'>{action} ORDER</font>"),
+        ("p", "Heading2", f"{stock_name} ({ticker})"),
+        ("p", body_style, f"Trade Date: {trade_date.strftime('%B %d, %Y %H:%M')}"),
+        ("spacer", 0.5),
+    ]
     
     # Trade Summary Box
-    story.append(Paragraph("Trade Summary", heading_style))
+    story.append(("p", "heading", "Trade Summary"))
     
     trade_data = [
         ['Field', 'Value'],
@@ -126,46 +79,29 @@ def create_trade_document(ticker, action, shares, price, reason, ai_model="Multi
         ['Total Value', f"<b>€{trade_value:.2f}</b>"],
         ['AI Model', ai_model],
     ]
-    
-    trade_table = Table(trade_data, colWidths=[6*cm, 9*cm])
-    trade_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    
-    story.append(trade_table)
-    story.append(Spacer(1, 0.5*cm))
+    story.append(("table", trade_data, [6, 9], "trade"))
+    story.append(("spacer", 0.5))
     
     # Yahoo Finance Screenshot Link
-    story.append(Paragraph("📸 Screenshot Link", heading_style))
-    story.append(Paragraph(
-        "<b>IMPORTANT:</b> Open this link and take a screenshot within 5 minutes:",
-        body_style
-    ))
-    story.append(Paragraph(f"<link href='{yahoo_url}'>{yahoo_url}</link>", link_style))
-    story.append(Paragraph(
-        f"<i>Screenshot must show: Ticker, Price, Timestamp<br/>"
-        f"Upload to: Microsoft Teams within 5 minutes of trade execution</i>",
-        body_style
-    ))
-    story.append(Spacer(1, 0.5*cm))
+    story += [
+        ("p", "heading", "📸 Screenshot Link"),
+        ("p", body_style, "<b>IMPORTANT:</b> Open this link and take a screenshot within 5 minutes:"),
+        ("p", "link", f"<link href='{yahoo_url}'>{yahoo_url}</link>"),
+        ("p", body_style,
+         f"<i>Screenshot must show: Ticker, Price, Timestamp<br/>"
+         f"Upload to: Microsoft Teams within 5 minutes of trade execution</i>"),
+        ("spacer", 0.5),
+    ]
     
     # Trade Reasoning
-    story.append(Paragraph("Trade Reasoning", heading_style))
-    story.append(Paragraph(reason, body_style))
-    story.append(Spacer(1, 0.5*cm))
+    story += [
+        ("p", "heading", "Trade Reasoning"),
+        ("p", body_style, reason),
+        ("spacer", 0.5),
+    ]
     
     # Competition Rules Compliance
-    story.append(Paragraph("Competition Rules Compliance", heading_style))
+    story.append(("p", "heading", "Competition Rules Compliance"))
     
     compliance_data = [
         ['Rule', 'Status'],
@@ -175,40 +111,191 @@ def create_trade_document(ticker, action, shares, price, reason, ai_model="Multi
         ['5-15 total positions', '✅ Within range'],
         ['Long only (no shorting)', '✅ Compliant'],
     ]
-    
-    compliance_table = Table(compliance_data, colWidths=[10*cm, 5*cm])
-    compliance_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#27ae60')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    
-    story.append(compliance_table)
-    story.append(Spacer(1, 0.5*cm))
+    story.append(("table", compliance_data, [10, 5], "compliance"))
+    story.append(("spacer", 0.5))
     
     # Footer
-    story.append(Paragraph(
-        f"<i>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>"
-        f"System: Investment Challenge GenAI - Tier 2 (Multi-Agent Coordination)</i>",
-        body_style
-    ))
+    story.append(("p", body_style,
+                  f"<i>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>"
+                  f"System: Investment Challenge GenAI - Tier 2 (Multi-Agent Coordination)</i>"))
+    return story
+
+def create_trade_document(ticker, action, shares, price, reason, ai_model="Multi-Agent"):
+    """
+    Create a PDF document for a trade
+    
+    Args:
+        ticker: Stock ticker (e.g., 'NVDA', '0700.HK')
+        action: 'BUY' or 'SELL'
+        shares: Number of shares
+        price: Price per share in EUR
+        reason: Trade reasoning
+        ai_model: AI model used for decision
+    """
+    # Load latest prices
+    latest_prices = PriceStore().latest(columns=INFO_COLUMNS)
+    if latest_prices.empty:
+        print("❌ No price data found. Run price_getter first!")
+        return None
+    
+    # Find stock info
+    stock_info = latest_prices[latest_prices['Ticker'] == ticker]
+    if stock_info.empty:
+        print(f"❌ Ticker {ticker} not found in price data!")
+        return None
+    stock_info = stock_info.iloc[0]
+    
+    # Generate filename (Trade-Zeitpunkt = jetzt, lokale Zeitzone; Name in UTC wie im Batch-Modus)
+    now = datetime.now().astimezone()
+    filename = os.path.join(TRADES_DIR, trade_document_name(now, action, ticker))
     
     # Build PDF
-    doc.build(story)
+    render(trade_story(ticker, action, shares, price, reason, ai_model, stock_info, now), filename)
     print(f"✅ Trade document created: {filename}")
-    print(f"📸 Yahoo Finance Link: {yahoo_url}")
+    print(f"📸 Yahoo Finance Link: {stock_info['Yahoo URL']}")
     return filename
 
-if __name__ == "__main__":
+# -----------------------------
+# Batch aus dem Trade Log
+# -----------------------------
+def trade_document_name(trade_date, action, ticker, row=None):
+    """
+    Ein Namensschema für CLI und Batch: Trade-Zeitpunkt in UTC (naive Zeitpunkte unverändert).
+    row (Zeile im Trade Log) unterscheidet Trades mit gleichem Ticker/Aktion in derselben Minute.
+    """
+    trade_date = pd.Timestamp(trade_date)
+    if trade_date.tzinfo is not None:
+        trade_date = trade_date.tz_convert("UTC")
+    suffix = f"_{row}" if row is not None else ""
+    return f"trade_{trade_date.strftime('%Y%m%d_%H%M')}_{action}_{ticker}{suffix}.pdf"
+
+def _unlisted_documents(out_dir, manifest):
+    """Vorhandene Dokumente ohne Manifest-Eintrag (per CLI erstellt): {(Tag, Aktion, Ticker): [Namen]}"""
+    documents = {}
+    if os.path.isdir(out_dir):
+        for name in sorted(os.listdir(out_dir)):
+            match = DOCUMENT_NAME.match(name)
+            if match and name not in manifest:
+                documents.setdefault(match.groups(), []).append(name)
+    return documents
+
+def trade_document_hash(trade, info):
+    """SHA-256 über Layout-Version, Trade-Zeile und verwendete Preis-Snapshot-Zeile"""
+    payload = json.dumps([DOCUMENT_VERSION, trade, info], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+_worker_snapshots = None
+
+def _init_worker(snapshots):
+    """Einmal pro Worker: Preis-Snapshots {snapshot: {ticker: info}}"""
+    global _worker_snapshots
+    _worker_snapshots = snapshots
+
+def _render_trade(task):
+    path, trade, snapshot = task
+    info = _worker_snapshots[snapshot][trade["ticker"]]
+    reason, ai_model = (str(trade[c]) if pd.notna(trade[c]) else "" for c in ("reason", "ai_model"))
+    story = trade_story(trade["ticker"], trade["action"], trade["shares"], trade["price"], reason, ai_model,
+                        info, pd.Timestamp(trade["date"]))
+    return render(story, path)
+
+def _load_snapshots(store, dates):
+    """Je Trade der letzte Snapshot <= Trade-Zeitpunkt (sonst der erste); jeder Snapshot wird einmal gelesen"""
+    available = store.snapshots()
+    if not available:
+        return [], {}
+    keys, snapshots = [], {}
+    for date in dates:
+        utc = date.tz_convert("UTC") if date.tzinfo else date.tz_localize("UTC")
+        snapshot = available[max(bisect.bisect_right(available, utc) - 1, 0)]
+        key = snapshot.isoformat()
+        if key not in snapshots:
+            df = store.at(snapshot, columns=INFO_COLUMNS)
+            snapshots[key] = {row["Ticker"]: row for row in df.to_dict("records")}
+        keys.append(key)
+    return keys, snapshots
+
+def batch_trade_documents(log_path="portfolio_trades.csv", out_dir=TRADES_DIR, processes=None, force=False,
+                          store=None):
+    """
+    Bestätigungs-PDF für jeden Trade ohne aktuelles Dokument in out_dir.
+    Rückgabe: dict mit created, skipped, missing (Listen von Dateinamen bzw. Tickern)
+    """
+    trades = pd.read_csv(log_path)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    
+    records = trades.to_dict("records")
+    dates = [pd.Timestamp(t["date"]) for t in records]
+    keys, snapshots = _load_snapshots(store or PriceStore(), dates)
+    
+    unlisted = _unlisted_documents(out_dir, manifest)
+    
+    tasks, skipped, missing, names = [], [], [], set()
+    for row, (trade, date, key) in enumerate(zip(records, dates, keys or [None] * len(records))):
+        info = snapshots.get(key, {}).get(trade["ticker"])
+        if info is None:
+            missing.append(trade["ticker"])
+            continue
+        name = trade_document_name(date, trade["action"], trade["ticker"])
+        if name in names:  # gleicher Ticker/Aktion in derselben Minute
+            name = trade_document_name(date, trade["action"], trade["ticker"], row)
+        names.add(name)
+        
+        digest = trade_document_hash(trade, info)
+        path = os.path.join(out_dir, name)
+        # Vorhandene Dokumente ohne Hash (per CLI erstellt, Minute kann abweichen) werden nicht überschrieben
+        if not force and name not in manifest:
+            same_trade = unlisted.get((name[6:14], trade["action"], trade["ticker"]), [])
+            existing = name if name in same_trade else (same_trade[0] if same_trade else None)
+            if existing:
+                same_trade.remove(existing)
+                skipped.append(existing)
+                continue
+        if not force and os.path.exists(path) and manifest.get(name) == digest:
+            skipped.append(name)
+            continue
+        tasks.append((path, trade, key))
+        manifest[name] = digest
+    
+    if tasks:
+        os.makedirs(out_dir, exist_ok=True)
+        processes = min(processes or os.cpu_count() or 1, len(tasks))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(snapshots,)) as pool:
+            created = list(pool.map(_render_trade, tasks))
+        tmp = manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, manifest_path)
+    else:
+        created = []
+    return {"created": created, "skipped": skipped, "missing": missing}
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        parser = argparse.ArgumentParser(description="Trade-Dokumente für das ganze Trade Log")
+        parser.add_argument("--batch", action="store_true")
+        parser.add_argument("log", nargs="?", default="portfolio_trades.csv")
+        parser.add_argument("--out", default=TRADES_DIR)
+        parser.add_argument("--processes", type=int, default=None, help="Worker-Prozesse (Default: alle Kerne)")
+        parser.add_argument("--force", action="store_true", help="Alle Dokumente neu rendern")
+        args = parser.parse_args()
+        
+        result = batch_trade_documents(args.log, args.out, args.processes, args.force)
+        for path in result["created"]:
+            print(f"✅ Trade document created: {path}")
+        for ticker in result["missing"]:
+            print(f"❌ Ticker {ticker} not found in price data!")
+        print(f"\n{len(result['created'])} erstellt, {len(result['skipped'])} aktuell (übersprungen), "
+              f"{len(result['missing'])} ohne Preisdaten")
+        return
+    
     if len(sys.argv) < 6:
         print("Usage: python generate_trade_pdf.py <ticker> <action> <shares> <price> <reason>")
+        print("       python generate_trade_pdf.py --batch [trade_log.csv] [--force] [--processes N]")
         print("Example: python generate_trade_pdf.py NVDA BUY 1 176.27 'AI hardware leader, +10% in last 11 days'")
         sys.exit(1)
     
@@ -219,3 +306,6 @@ if __name__ == "__main__":
     reason = sys.argv[5]
     
     create_trade_document(ticker, action, shares, price, reason)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Market Data - ticker-indizierte Sicht auf den neuesten Preis-Snapshot
+
+Einmal pro Prozess aus dem PriceStore geladen und von trade_assistant und
+portfolio_manager gemeinsam genutzt:
+- O(1) Zeilen-Lookup pro Ticker (statt prices_df[prices_df["Ticker"] == ticker])
+- prices: {ticker: Price EUR} (nur Ticker mit Preis)
+- Metadaten: Name, Sektor, Region, Währung, Yahoo URL
+
+Verwendung:
+    market = load_market_data()
+    market.row("NVDA")["Price EUR"]
+    market.prices["NVDA"]
+    market.meta("NVDA")              # {"name": ..., "sector": ..., "region": ..., ...}
+    market.frame                     # DataFrame wie PriceStore().latest()
+
+Author: Investment Team
+"""
+
+import pandas as pd
+
+from price_store import PriceStore, PRICE_COLUMNS
+
+META_COLUMNS = {
+    "name": "Name",
+    "sector": "Sector",
+    "region": "Region",
+    "currency": "Native Ccy",
+    "url": "Yahoo URL",
+}
+
+
+# -----------------------------
+# MarketData Klasse
+# -----------------------------
+class MarketData:
+    def __init__(self, prices_df):
+        self.frame = prices_df.reset_index(drop=True)
+        self.tickers = self.frame["Ticker"].tolist()
+        self._rows = dict(zip(self.tickers, self.frame.to_dict("records")))
+        self.prices = {t: r["Price EUR"] for t, r in self._rows.items() if pd.notna(r["Price EUR"])}
+        self.regions = {t: r["Region"] for t, r in self._rows.items()}
+
+    @classmethod
+    def from_store(cls, store=None, ts=None):
+        """Snapshot aus dem PriceStore (ts=None: neuester)"""
+        return cls((store or PriceStore()).at(ts))
+
+    def __contains__(self, ticker):
+        return ticker in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def empty(self):
+        return not self._rows
+
+    def row(self, ticker):
+        """Snapshot-Zeile als dict (Spalten wie die Preis-CSV) oder None"""
+        return self._rows.get(ticker)
+
+    def price(self, ticker):
+        return self.prices.get(ticker)
+
+    def meta(self, ticker):
+        row = self._rows.get(ticker)
+        if row is None:
+            return None
+        return {key: row[column] for key, column in META_COLUMNS.items()}
+
+
+_current = None
+
+
+def load_market_data(reload=False):
+    """Neuester Snapshot, einmal pro Prozess geladen (reload=True erzwingt neues Laden)"""
+    global _current
+    if _current is None or reload:
+        _current = MarketData.from_store()
+    return _current
+
+
+def as_market_data(prices):
+    """MarketData aus MarketData oder DataFrame (für Aufrufer mit eigenem prices_df)"""
+    return prices if isinstance(prices, MarketData) else MarketData(prices.reindex(columns=PRICE_COLUMNS))
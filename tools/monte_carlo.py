@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo - Risiko-Simulation für das aktuelle Portfolio
+
+Erzeugt zehntausende korrelierte Preispfade (Pfade x Tage x Ticker, geometrische
+Brownsche Bewegung mit Cholesky-Korrelation) chunkweise als NumPy-Arrays und bewertet
+die aktuellen Positionen auf jedem Pfad vektorisiert neu:
+- Wahrscheinlichkeit, MAX_PORTFOLIO_DRAWDOWN (-10%) zu erreichen
+- Wahrscheinlichkeit je Position, den STOP_LOSS_THRESHOLD (-8%) auszulösen
+- Verteilung des Portfolio-Returns am Ende des Horizonts
+
+Der Speicherbedarf hängt nur von chunk_size ab, nicht von der Anzahl Pfade.
+
+Verwendung:
+    result = run_monte_carlo(portfolio, prices, days=30, n_paths=50000)
+    python tools/monte_carlo.py --paths 50000 --days 30
+
+Author: Investment Team
+"""
+
+import argparse
+
+import numpy as np
+
+from portfolio_manager import (
+    STOP_LOSS_THRESHOLD, MAX_PORTFOLIO_DRAWDOWN, load_portfolio_incremental
+)
+
+# -----------------------------
+# Configuration
+# -----------------------------
+TRADING_DAYS_PER_YEAR = 252
+DEFAULT_ANNUAL_VOL = 0.35     # Fallback wenn die Historie zu kurz ist
+DEFAULT_CORRELATION = 0.40
+MIN_OBSERVATIONS = 20         # Mindestanzahl Returns für eine eigene Schätzung
+DEFAULT_CHUNK_SIZE = 5000     # Pfade pro Chunk
+
+
+# -----------------------------
+# Parameter-Schätzung
+# -----------------------------
+def estimate_params(history, tickers, min_obs=MIN_OBSERVATIONS):
+    """
+    Tägliche Log-Return-Drift und Kovarianz je Ticker aus der Preis-Historie
+    (Zeitpunkte x Ticker). Ticker ohne genügend Historie bekommen die Fallback-Werte.
+    Rückgabe: (mu, cov) als Arrays in der Reihenfolge von tickers
+    """
+    k = len(tickers)
+    daily_vol = DEFAULT_ANNUAL_VOL / np.sqrt(TRADING_DAYS_PER_YEAR)
+    mu = np.zeros(k)
+    cov = np.full((k, k), DEFAULT_CORRELATION * daily_vol ** 2)
+    np.fill_diagonal(cov, daily_vol ** 2)
+
+    if history is None or history.empty:
+        return mu, cov
+
+    returns = np.log(history.reindex(columns=tickers).sort_index().ffill()).diff().iloc[1:]
+    counts = returns.notna().sum().to_numpy()
+    known = counts >= min_obs
+    if not known.any():
+        return mu, cov
+
+    idx = np.flatnonzero(known)
+    est = returns.iloc[:, idx]
+    mu[idx] = est.mean().to_numpy()
+    cov[np.ix_(idx, idx)] = est.cov(min_periods=min_obs).fillna(0.0).to_numpy()
+    return mu, cov
+
+
+def _cholesky(cov):
+    """Cholesky-Faktor, bei numerisch nicht positiv-definiter Matrix mit kleinem Jitter"""
+    jitter = 0.0
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = max(jitter * 10, 1e-10)
+    raise ValueError("Kovarianzmatrix ist nicht positiv semidefinit")
+
+
+# -----------------------------
+# Simulation
+# -----------------------------
+def simulate_paths(p0, mu, chol, n_paths, days, rng):
+    """Korrelierte Preispfade, Shape (n_paths, days, tickers)"""
+    z = rng.standard_normal((n_paths, days, len(p0)))
+    log_returns = z @ chol.T
+    log_returns += mu  # mu = mittlerer täglicher Log-Return
+    np.cumsum(log_returns, axis=1, out=log_returns)
+    return p0 * np.exp(log_returns, out=log_returns)
+
+
+def simulate_chunks(portfolio, prices, days, n_paths, mu, cov, chunk_size=DEFAULT_CHUNK_SIZE, seed=None,
+                    drawdown_limit=MAX_PORTFOLIO_DRAWDOWN, stop_loss=STOP_LOSS_THRESHOLD):
+    """
+    Generator: bewertet das Portfolio chunkweise und liefert pro Chunk ein dict mit
+    final_return, max_drawdown (je Pfad) und stop_hit (Pfade x Positionen, bool).
+    """
+    book = portfolio.book
+    p0 = book.price_vector(prices)
+    chol = _cholesky(cov)
+    rng = np.random.default_rng(seed)
+    start_value = float(book.total_value(portfolio.cash, p0))
+
+    done = 0
+    while done < n_paths:
+        n = min(chunk_size, n_paths - done)
+        paths = simulate_paths(p0, mu, chol, n, days, rng)
+
+        values = book.total_value(portfolio.cash, paths)  # (n, days)
+        peaks = np.maximum(np.maximum.accumulate(values, axis=1), start_value)
+        max_drawdown = (values / peaks - 1).min(axis=1)
+        stop_hit = ((paths.min(axis=1) - book.avg_price) / book.avg_price) <= stop_loss
+
+        yield {
+            "final_return": values[:, -1] / start_value - 1,
+            "max_drawdown": max_drawdown,
+            "drawdown_hit": max_drawdown <= drawdown_limit,
+            "stop_hit": stop_hit,
+        }
+        done += n
+
+
+def run_monte_carlo(portfolio, prices, days=30, n_paths=20000, history=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                    seed=None, drawdown_limit=MAX_PORTFOLIO_DRAWDOWN, stop_loss=STOP_LOSS_THRESHOLD):
+    """
+    Monte-Carlo-Risikozahlen für die aktuellen Positionen über 'days' Handelstage.
+    prices: {ticker: Price EUR}, history: Preis-Historie für die Schätzung (optional)
+    """
+    book = portfolio.book
+    if not len(book):
+        return {"success": False, "message": "Keine Positionen im Portfolio"}
+
+    mu, cov = estimate_params(history, book.tickers)
+    final_returns = np.empty(n_paths)
+    drawdowns = np.empty(n_paths)
+    drawdown_hits = 0
+    stop_hits = np.zeros(len(book), dtype=np.int64)
+    any_stop_hits = 0
+
+    offset = 0
+    for chunk in simulate_chunks(portfolio, prices, days, n_paths, mu, cov, chunk_size, seed,
+                                 drawdown_limit, stop_loss):
+        n = len(chunk["final_return"])
+        final_returns[offset:offset + n] = chunk["final_return"]
+        drawdowns[offset:offset + n] = chunk["max_drawdown"]
+        drawdown_hits += int(chunk["drawdown_hit"].sum())
+        stop_hits += chunk["stop_hit"].sum(axis=0)
+        any_stop_hits += int(chunk["stop_hit"].any(axis=1).sum())
+        offset += n
+
+    return {
+        "success": True,
+        "n_paths": n_paths,
+        "days": days,
+        "p_drawdown": drawdown_hits / n_paths,
+        "p_any_stop_loss": any_stop_hits / n_paths,
+        "p_stop_loss": dict(zip(book.tickers, (stop_hits / n_paths).tolist())),
+        "expected_return": float(final_returns.mean()),
+        "return_quantiles": dict(zip(("p5", "p50", "p95"), np.percentile(final_returns, [5, 50, 95]).tolist())),
+        "median_max_drawdown": float(np.median(drawdowns)),
+    }
+
+
+def print_result(result, drawdown_limit=MAX_PORTFOLIO_DRAWDOWN, stop_loss=STOP_LOSS_THRESHOLD):
+    print("=" * 80)
+    print(f"MONTE CARLO: {result['n_paths']:,} Pfade x {result['days']} Handelstage")
+    print("=" * 80)
+    print(f"  P(Drawdown <= {drawdown_limit*100:.0f}%): {result['p_drawdown']*100:6.2f}%")
+    print(f"  P(mind. ein Stop-Loss):   {result['p_any_stop_loss']*100:6.2f}%")
+    print(f"  Erwarteter Return:        {result['expected_return']*100:+6.2f}%")
+    q = result["return_quantiles"]
+    print(f"  Return 5% / 50% / 95%:    {q['p5']*100:+.2f}% / {q['p50']*100:+.2f}% / {q['p95']*100:+.2f}%")
+    print(f"  Median Max-Drawdown:      {result['median_max_drawdown']*100:.2f}%")
+    print(f"\n  Stop-Loss ({stop_loss*100:.0f}%) Wahrscheinlichkeit je Position:")
+    for ticker, p in sorted(result["p_stop_loss"].items(), key=lambda kv: -kv[1]):
+        print(f"    {ticker:10s} {p*100:6.2f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte-Carlo-Risiko für das aktuelle Portfolio")
+    parser.add_argument("--paths", type=int, default=20000, help="Anzahl simulierter Pfade")
+    parser.add_argument("--days", type=int, default=30, help="Horizont in Handelstagen")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SIZE, help="Pfade pro Chunk (Speicher)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    from price_store import PriceStore
+    store = PriceStore()
+    prices = store.latest_prices()
+    if not prices:
+        print("✗ Keine Preisdaten gefunden. Bitte zuerst price_getter ausführen!")
+        return
+
+    try:
+        portfolio = load_portfolio_incremental("portfolio_trades.csv")
+    except FileNotFoundError:
+        print("✗ Keine Trade History gefunden (portfolio_trades.csv)")
+        return
+
+    result = run_monte_carlo(portfolio, prices, days=args.days, n_paths=args.paths,
+                             history=store.history(), chunk_size=args.chunk, seed=args.seed)
+    if not result["success"]:
+        print(f"✗ {result['message']}")
+        return
+    print_result(result)
+
+
+if __name__ == "__main__":
+    main()
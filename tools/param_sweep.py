@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Parameter Sweep - Sensitivität der Strategie- und Risiko-Parameter
+
+Bewertet Kombinationen von STOP_LOSS_THRESHOLD, MAX_POSITION_SIZE und TARGET_ALLOCATION
+aus make_recommendation über dieselbe Preis-Historie (backtest.run_backtest) parallel in
+einem Prozess-Pool. Die Conviction-Schwelle (min_conviction) ist nur eine sinnvolle Achse,
+wenn meta eine Conviction je Ticker mitbringt - ohne sie gilt für jeden Ticker 7.0.
+
+Die Historie wird einmal als .npy-Datei abgelegt und von jedem Worker per Memory-Map
+read-only geöffnet - pro Task werden nur die Parameter übertragen.
+
+Verwendung:
+    combos = param_grid(stop_loss_threshold=[-0.05, -0.08, -0.12], max_position_size=[0.15, 0.25])
+    results = run_sweep(history, combos)          # DataFrame: Parameter + Return, Drawdown, Trades
+
+    python tools/param_sweep.py                   # Grid über die gespeicherte Historie
+    python tools/param_sweep.py --sample 50       # 50 zufällige Kombinationen
+
+Author: Investment Team
+"""
+
+import argparse
+import itertools
+import os
+import random
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from competition_rules import RuleSet
+from portfolio_manager import Portfolio, STARTING_CAPITAL, TARGET_ALLOCATION, MAX_POSITION_SIZE, STOP_LOSS_THRESHOLD
+from backtest import PriceHistory, run_backtest, stop_loss_exit
+from trade_assistant import make_recommendation, MIN_CONVICTION
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_PARAMS = {
+    "stop_loss_threshold": STOP_LOSS_THRESHOLD,
+    "max_position_size": MAX_POSITION_SIZE,
+    "target_allocation": TARGET_ALLOCATION,
+    "min_conviction": MIN_CONVICTION,
+}
+
+DEFAULT_GRID = {
+    "stop_loss_threshold": [-0.05, -0.08, -0.12],
+    "max_position_size": [0.15, 0.20, 0.25],
+    "target_allocation": [
+        TARGET_ALLOCATION,
+        {"US": 0.40, "HK": 0.30, "JP": 0.30, "EU": 0.00},
+        {"US": 0.60, "HK": 0.20, "JP": 0.20, "EU": 0.00},
+    ],
+}
+
+
+# -----------------------------
+# Parameter-Kombinationen
+# -----------------------------
+def param_grid(**axes):
+    """Kartesisches Produkt der Achsen, fehlende Parameter = Default"""
+    names = list(axes)
+    return [{**DEFAULT_PARAMS, **dict(zip(names, values))} for values in itertools.product(*axes.values())]
+
+
+def param_sample(n, seed=None, **axes):
+    """
+    n zufällige Kombinationen. Achse = Liste (Auswahl) oder (min, max)-Tupel (gleichverteilt).
+    """
+    rng = random.Random(seed)
+    combos = []
+    for _ in range(n):
+        combo = dict(DEFAULT_PARAMS)
+        for name, values in axes.items():
+            combo[name] = rng.uniform(*values) if isinstance(values, tuple) else rng.choice(values)
+        combos.append(combo)
+    return combos
+
+
+# -----------------------------
+# Strategie (make_recommendation mit überschriebenen Parametern)
+# -----------------------------
+def recommendation_strategy(meta, params):
+    """
+    Pro Bar: Stop-Loss-Verkauf (Schwelle aus params), sonst der erste Ticker, für den
+    make_recommendation ein BUY liefert. meta: {ticker: {"region": ..., "conviction": ...}};
+    die Allokation rechnet mit den Regionen aller Ticker aus meta.
+    """
+    validation = {"validation_status": "PASSED"}
+    analyses = {
+        ticker: {"region": m["region"], "ai_research": {"conviction": m.get("conviction", 7.0)}}
+        for ticker, m in meta.items()
+    }
+    ticker_regions = {ticker: m["region"] for ticker, m in meta.items()}
+    overrides = {k: params[k] for k in DEFAULT_PARAMS}
+
+    def buy_candidates(bar):
+        if not bar.portfolio.can_trade_today(bar.date):
+            return []
+        portfolio = bar.portfolio
+        prices = bar.price_dict()
+        budget = min(portfolio.cash, params["max_position_size"] *
+                     max(portfolio.get_portfolio_value(prices), portfolio.starting_capital))
+        for ticker, analysis in analyses.items():
+            if ticker not in prices or ticker in portfolio.book or prices[ticker] > budget:
+                continue
+            rec = make_recommendation(ticker, portfolio, prices, analysis, validation,
+                                      ticker_regions=ticker_regions, **overrides)
+            if rec.get("action") == "BUY" and rec["shares"] * prices[ticker] <= budget:
+                return [{"ticker": ticker, "action": "BUY", "shares": rec["shares"],
+                         "reason": "; ".join(rec["rationale"])}]
+        return []
+
+    return stop_loss_exit(buy_candidates, params["stop_loss_threshold"])
+
+
+# -----------------------------
+# Worker (Historie per Memory-Map)
+# -----------------------------
+_shared = {}
+
+
+def _init_worker(values_path, index, tickers, meta, starting_capital):
+    # bereits sortiert + forward-filled (run_sweep): run_backtest liest direkt aus dem Memory-Map
+    _shared["history"] = PriceHistory(index, tickers, np.load(values_path, mmap_mode="r"))
+    _shared["meta"] = meta
+    _shared["starting_capital"] = starting_capital
+
+
+def _run_combo(params):
+    portfolio = Portfolio(starting_capital=_shared["starting_capital"], max_position_size=params["max_position_size"])
+    rules = RuleSet.default(max_position_size=params["max_position_size"],
+                            stop_loss_threshold=params["stop_loss_threshold"])
+    result = run_backtest(_shared["history"], recommendation_strategy(_shared["meta"], params), portfolio=portfolio,
+                          rules=rules)
+    return {
+        **params,
+        "total_return": result.total_return,
+        "max_drawdown": result.max_drawdown,
+        "n_trades": len(result.trades),
+    }
+
+
+def run_sweep(history, combos, meta=None, processes=None, starting_capital=STARTING_CAPITAL):
+    """
+    history: DataFrame (Zeitpunkte x Ticker, EUR), combos: Liste von Parameter-Dicts
+    meta: {ticker: {"region", "conviction"}} (Default: Regionen aus dem neuesten PriceStore-Snapshot)
+    Rückgabe: DataFrame mit einer Zeile pro Kombination
+    """
+    if meta is None:
+        from price_store import PriceStore
+        latest = PriceStore().latest(columns=["Ticker", "Region"])
+        meta = {t: {"region": r} for t, r in zip(latest["Ticker"], latest["Region"]) if t in history.columns}
+
+    history = PriceHistory.from_frame(history)  # einmal sortieren + forward-fillen, nicht pro Kombination
+    with tempfile.TemporaryDirectory() as tmp:
+        values_path = os.path.join(tmp, "history.npy")
+        np.save(values_path, history.values)
+        init_args = (values_path, history.index, history.tickers, meta, starting_capital)
+
+        processes = processes or os.cpu_count() or 1
+        chunksize = max(1, len(combos) // (4 * processes))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=init_args) as pool:
+            rows = list(pool.map(_run_combo, combos, chunksize=chunksize))
+
+    results = pd.DataFrame(rows)
+    results["target_allocation"] = results["target_allocation"].map(
+        lambda a: "/".join(f"{r}{v*100:.0f}" for r, v in a.items() if v))
+    return results.sort_values("total_return", ascending=False).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter-Sweep über die Preis-Historie")
+    parser.add_argument("--sample", type=int, help="Zufällige Kombinationen statt vollem Grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None, help="Worker-Prozesse (Default: alle Kerne)")
+    parser.add_argument("--out", help="Ergebnis zusätzlich als CSV speichern")
+    args = parser.parse_args()
+
+    from price_store import PriceStore
+    history = PriceStore().history()
+    if history.empty:
+        print("✗ Keine Preis-Historie gefunden. Bitte zuerst price_getter ausführen!")
+        return
+
+    if args.sample:
+        combos = param_sample(args.sample, seed=args.seed,
+                              stop_loss_threshold=(-0.15, -0.03), max_position_size=(0.10, 0.25),
+                              target_allocation=DEFAULT_GRID["target_allocation"])
+    else:
+        combos = param_grid(**DEFAULT_GRID)
+
+    results = run_sweep(history, combos, processes=args.processes)
+    print("=" * 80)
+    print(f"PARAMETER SWEEP: {len(combos)} Kombinationen über {len(history)} Bars")
+    print("=" * 80)
+    print(results.to_string(index=False))
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"\n✓ Gespeichert: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,11 +19,20 @@ Portfolio-Allokation (aus Investment Thesis):
 Author: Investment Team
 """
 
+import hashlib
+from collections import defaultdict
+import io
+import os
+from types import MappingProxyType
+import numpy as np
 import pandas as pd
 import json
 from datetime import datetime, timedelta
 import pytz
 
+from market_data import load_market_data
+from position_sizing import optimise_shares
+
 # -----------------------------
 # Configuration
 # -----------------------------
@@ -46,28 +55,270 @@ MAX_POSITION_SIZE = 0.25  # Max 25% in einer einzelnen Aktie
 STOP_LOSS_THRESHOLD = -0.08  # -8% Stop-Loss Trigger (aus Thesis)
 MAX_PORTFOLIO_DRAWDOWN = -0.10  # -10% maximaler Drawdown
 
+# Regionen als Integer-Codes für die Array-Berechnung (-1 = unbekannt)
+REGIONS = list(TARGET_ALLOCATION.keys())
+REGION_CODES = {region: i for i, region in enumerate(REGIONS)}
+
+# -----------------------------
+# Position Book (NumPy-Spalten)
+# -----------------------------
+def _to_epoch_seconds(dt):
+    """datetime (naiv = UTC, wie in get_position_summary) -> Epoch-Sekunden"""
+    if dt.tzinfo is None:
+        dt = pytz.UTC.localize(dt)
+    return int(dt.timestamp())
+
+def _shares_out(shares):
+    """Ganzzahlige Stückzahlen als int ausgeben (wie bisher im positions-Dict)"""
+    return shares.astype(np.int64) if np.all(shares == np.floor(shares)) else shares
+
+class PositionBook:
+    """
+    Positionen als NumPy-Spalten (ein Index pro Ticker):
+    shares, avg_price, buy_ts (Epoch-Sekunden UTC) und region (Code aus REGION_CODES).
+    Alle Kennzahlen werden in einem vektorisierten Durchlauf über einen Preisvektor berechnet.
+    Preise dürfen auch eine Matrix (Szenarien x Positionen) sein -> ein Ergebnis pro Szenario.
+    """
+
+    def __init__(self):
+        self.tickers = []   # Index -> Ticker
+        self.index = {}     # Ticker -> Index
+        self.buy_dates = [] # originale datetime-Objekte (für Haltedauer & Dict-View)
+        self.shares = np.zeros(0, dtype=np.float64)
+        self.avg_price = np.zeros(0, dtype=np.float64)
+        self.buy_ts = np.zeros(0, dtype=np.int64)
+        self.region = np.zeros(0, dtype=np.int8)
+        self._view = None   # gecachter read-only Dict-View, add()/remove() verwerfen ihn
+
+    def __getstate__(self):
+        return {**self.__dict__, "_view": None}  # MappingProxyType ist nicht picklebar
+
+    @classmethod
+    def from_arrays(cls, tickers, shares, avg_price, buy_dates, regions=None):
+        """Book direkt aus Spalten aufbauen (z.B. nach einem Bulk-Replay)"""
+        book = cls()
+        book.tickers = list(tickers)
+        book.index = {t: i for i, t in enumerate(book.tickers)}
+        book.buy_dates = list(buy_dates)
+        book.shares = np.asarray(shares, dtype=np.float64).copy()
+        book.avg_price = np.asarray(avg_price, dtype=np.float64).copy()
+        book.buy_ts = np.array([_to_epoch_seconds(d) for d in book.buy_dates], dtype=np.int64)
+        book.region = np.full(len(book.tickers), -1, dtype=np.int8)
+        if regions is not None:
+            book.set_regions(regions)
+        return book
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self.index
+
+    def add(self, ticker, shares, price_eur, date, region=None):
+        """Kauf: neue Position oder Durchschnittspreis aktualisieren"""
+        self._view = None
+        i = self.index.get(ticker)
+        if i is not None:
+            new_shares = self.shares[i] + shares
+            self.avg_price[i] = (self.shares[i] * self.avg_price[i] + shares * price_eur) / new_shares
+            self.shares[i] = new_shares
+            return
+
+        self.index[ticker] = len(self.tickers)
+        self.tickers.append(ticker)
+        self.buy_dates.append(date)
+        self.shares = np.append(self.shares, float(shares))
+        self.avg_price = np.append(self.avg_price, float(price_eur))
+        self.buy_ts = np.append(self.buy_ts, _to_epoch_seconds(date))
+        self.region = np.append(self.region, np.int8(REGION_CODES.get(region, -1)))
+
+    def remove(self, ticker, shares):
+        """Verkauf: Stückzahl reduzieren, leere Positionen entfernen"""
+        self._view = None
+        i = self.index[ticker]
+        self.shares[i] -= shares
+        if self.shares[i] == 0:
+            self.tickers.pop(i)
+            self.buy_dates.pop(i)
+            self.shares = np.delete(self.shares, i)
+            self.avg_price = np.delete(self.avg_price, i)
+            self.buy_ts = np.delete(self.buy_ts, i)
+            self.region = np.delete(self.region, i)
+            self.index = {t: j for j, t in enumerate(self.tickers)}
+
+    def set_regions(self, ticker_regions):
+        """Region-Codes aus {ticker: region} übernehmen"""
+        self.region = self.region_codes(ticker_regions)
+
+    def region_codes(self, ticker_regions):
+        """Region-Codes im Book-Index aus {ticker: region}, ohne das Book zu verändern"""
+        return np.array([REGION_CODES.get(ticker_regions.get(t), -1) for t in self.tickers], dtype=np.int8)
+
+    def price_vector(self, current_prices):
+        """{ticker: Preis} -> Preisvektor im Book-Index (fehlende Preise = avg_price)"""
+        return np.array(
+            [current_prices.get(t, p) for t, p in zip(self.tickers, self.avg_price)], dtype=np.float64
+        )
+
+    def columns_for(self, universe):
+        """Spaltenindizes der Book-Positionen in einer Universums-Preismatrix (Ticker-Liste)"""
+        lookup = {t: j for j, t in enumerate(universe)}
+        return np.array([lookup[t] for t in self.tickers], dtype=np.int64)
+
+    def market_value(self, prices):
+        return prices * self.shares
+
+    def total_value(self, cash, prices):
+        """Cash + Positionswerte (Skalar oder ein Wert pro Szenario-Zeile)"""
+        return cash + np.asarray(prices, dtype=np.float64) @ self.shares
+
+    def pnl(self, prices):
+        """(pnl, pnl_pct) pro Position"""
+        cost_basis = self.shares * self.avg_price
+        pnl = self.market_value(prices) - cost_basis
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pnl_pct = np.where(cost_basis > 0, pnl / cost_basis * 100, 0.0)
+        return pnl, pnl_pct
+
+    def stop_loss_mask(self, prices, threshold=STOP_LOSS_THRESHOLD):
+        """True für Positionen mit Verlust <= threshold"""
+        return (prices - self.avg_price) / self.avg_price <= threshold
+
+    def region_values(self, prices, region=None):
+        """
+        Positionswert je Region (Reihenfolge wie REGIONS), unbekannte Regionen ignoriert.
+        region: Region-Codes (region_codes()) statt der im Book gespeicherten
+        """
+        region = self.region if region is None else region
+        values = np.atleast_2d(self.market_value(prices))
+        known = region >= 0
+        out = np.zeros((values.shape[0], len(REGIONS)))
+        for code in range(len(REGIONS)):
+            out[:, code] = values[:, known & (region == code)].sum(axis=1)
+        return out if np.ndim(prices) > 1 else out[0]
+
+    def days_held(self, now):
+        return (_to_epoch_seconds(now) - self.buy_ts) // 86400
+
+    def as_dict(self):
+        """Dict-View wie das frühere positions-Attribut"""
+        shares = _shares_out(self.shares).tolist()
+        return {
+            t: {"shares": shares[i], "avg_price": float(self.avg_price[i]), "buy_date": self.buy_dates[i]}
+            for i, t in enumerate(self.tickers)
+        }
+
+    def view(self):
+        """as_dict() als read-only Mapping, bis zum nächsten add()/remove() gecacht"""
+        if self._view is None:
+            self._view = MappingProxyType({t: MappingProxyType(p) for t, p in self.as_dict().items()})
+        return self._view
+
+# -----------------------------
+# Trade History (indiziert)
+# -----------------------------
+class TradeHistory(list):
+    """
+    Liste der Trade-Dicts (wie bisher) plus Indizes:
+    Tag -> Trade-IDs und Ticker -> Trade-IDs (Trade-ID = Position in der Liste).
+    Tageslimit und Ticker-Abfragen sind damit O(1) statt eines Scans über alle Trades.
+    """
+
+    def __init__(self, trades=()):
+        super().__init__()
+        self.by_day = defaultdict(list)
+        self.by_ticker = defaultdict(list)
+        self.extend(trades)
+
+    def _index(self, trade_id, trade):
+        self.by_day[trade["date"].date()].append(trade_id)
+        self.by_ticker[trade["ticker"]].append(trade_id)
+
+    def _reindex(self):
+        self.by_day.clear()
+        self.by_ticker.clear()
+        for trade_id, trade in enumerate(self):
+            self._index(trade_id, trade)
+
+    def append(self, trade):
+        super().append(trade)
+        self._index(len(self) - 1, trade)
+
+    def extend(self, trades):
+        for trade in trades:
+            self.append(trade)
+
+    def count_on(self, day):
+        """Anzahl Trades an einem Tag (date)"""
+        return len(self.by_day.get(day, ()))
+
+    def on_day(self, day):
+        return [self[i] for i in self.by_day.get(day, ())]
+
+    def for_ticker(self, ticker):
+        return [self[i] for i in self.by_ticker.get(ticker, ())]
+
+    def last_trade(self, ticker, action=None):
+        """Letzter Trade eines Tickers (optional nur BUY/SELL), None wenn keiner"""
+        for i in reversed(self.by_ticker.get(ticker, ())):
+            if action is None or self[i]["action"] == action:
+                return self[i]
+        return None
+
+def _reindexing(name):
+    """Listen-Methoden, die IDs verschieben, bauen die Indizes neu auf"""
+    def method(self, *args, **kwargs):
+        result = getattr(list, name)(self, *args, **kwargs)
+        self._reindex()
+        return result
+    method.__name__ = name
+    return method
+
+for _name in ("insert", "pop", "remove", "clear", "sort", "reverse", "__setitem__", "__delitem__", "__iadd__"):
+    setattr(TradeHistory, _name, _reindexing(_name))
+
 # -----------------------------
 # Portfolio Klasse
 # -----------------------------
 class Portfolio:
-    def __init__(self, starting_capital=STARTING_CAPITAL):
+    def __init__(self, starting_capital=STARTING_CAPITAL, max_position_size=MAX_POSITION_SIZE):
         self.starting_capital = starting_capital
+        self.max_position_size = max_position_size  # überschreibbar für Backtests/Parameter-Sweeps
         self.cash = starting_capital
-        self.positions = {}  # {ticker: {"shares": int, "avg_price": float, "buy_date": datetime}}
-        self.trade_history = []
+        self.book = PositionBook()  # Positionen als NumPy-Spalten
+        self.trade_history = TradeHistory()
         self.daily_values = []
+
+    @property
+    def trade_history(self):
+        """Liste der Trades (TradeHistory mit Tages- und Ticker-Index)"""
+        return self._trade_history
+
+    @trade_history.setter
+    def trade_history(self, trades):
+        self._trade_history = trades if isinstance(trades, TradeHistory) else TradeHistory(trades)
+
+    @property
+    def positions(self):
+        """
+        {ticker: {"shares": int, "avg_price": float, "buy_date": datetime}} - read-only View auf
+        self.book (Änderungen nur über buy()/sell()), bis zum nächsten Trade gecacht
+        """
+        return self.book.view()
         
     def can_trade_today(self, target_date):
         """Prüft ob heute schon gehandelt wurde (Max 1 Trade pro Tag)"""
-        trades_today = [t for t in self.trade_history 
-                       if t["date"].date() == target_date.date()]
-        return len(trades_today) < MAX_TRADES_PER_DAY
+        return self.trade_history.count_on(target_date.date()) < MAX_TRADES_PER_DAY
+    
+    def trades_for(self, ticker):
+        """Alle Trades eines Tickers (über den Ticker-Index)"""
+        return self.trade_history.for_ticker(ticker)
     
     def can_sell(self, ticker, target_date):
         """Prüft ob Mindesthaltedauer (3 Tage) erreicht ist"""
-        if ticker not in self.positions:
+        if ticker not in self.book:
             return False
-        buy_date = self.positions[ticker]["buy_date"]
+        buy_date = self.book.buy_dates[self.book.index[ticker]]
         days_held = (target_date - buy_date).days
         return days_held >= MIN_HOLD_DAYS
     
@@ -85,29 +336,15 @@ class Portfolio:
         portfolio_value = self.get_portfolio_value({})
         if portfolio_value < self.starting_capital:
             portfolio_value = self.starting_capital
-        if total_cost / portfolio_value > MAX_POSITION_SIZE:
+        if total_cost / portfolio_value > self.max_position_size:
             return {
                 "success": False,
-                "message": f"Position zu groß: Max {MAX_POSITION_SIZE*100}% pro Aktie erlaubt"
+                "message": f"Position zu groß: Max {self.max_position_size*100}% pro Aktie erlaubt"
             }
         
-        # Ausführen
+        # Ausführen (Durchschnittspreis wird im Book berechnet)
         self.cash -= total_cost
-        
-        if ticker in self.positions:
-            # Durchschnittspreis berechnen
-            old_shares = self.positions[ticker]["shares"]
-            old_price = self.positions[ticker]["avg_price"]
-            new_shares = old_shares + shares
-            new_avg_price = (old_shares * old_price + shares * price_eur) / new_shares
-            self.positions[ticker]["shares"] = new_shares
-            self.positions[ticker]["avg_price"] = new_avg_price
-        else:
-            self.positions[ticker] = {
-                "shares": shares,
-                "avg_price": price_eur,
-                "buy_date": date
-            }
+        self.book.add(ticker, shares, price_eur, date)
         
         # Trade loggen
         self.trade_history.append({
@@ -129,21 +366,22 @@ class Portfolio:
     
     def sell(self, ticker, shares, price_eur, date, reason="", ai_model=""):
         """Verkaufe Aktien"""
-        if ticker not in self.positions:
+        if ticker not in self.book:
             return {
                 "success": False,
                 "message": f"{ticker} nicht im Portfolio"
             }
         
-        if shares > self.positions[ticker]["shares"]:
+        held = self.positions[ticker]["shares"]
+        if shares > held:
             return {
                 "success": False,
-                "message": f"Nicht genug Aktien: {self.positions[ticker]['shares']} verfügbar"
+                "message": f"Nicht genug Aktien: {held} verfügbar"
             }
         
         # Mindesthaltedauer prüfen
         if not self.can_sell(ticker, date):
-            buy_date = self.positions[ticker]["buy_date"]
+            buy_date = self.book.buy_dates[self.book.index[ticker]]
             days_held = (date - buy_date).days
             return {
                 "success": False,
@@ -155,9 +393,7 @@ class Portfolio:
         self.cash += total_proceeds
         
         # Position aktualisieren
-        self.positions[ticker]["shares"] -= shares
-        if self.positions[ticker]["shares"] == 0:
-            del self.positions[ticker]
+        self.book.remove(ticker, shares)
         
         # Trade loggen
         self.trade_history.append({
@@ -179,75 +415,106 @@ class Portfolio:
     
     def get_portfolio_value(self, current_prices):
         """Berechne aktuellen Portfolio-Wert"""
-        position_value = sum(
-            self.positions[ticker]["shares"] * current_prices.get(ticker, self.positions[ticker]["avg_price"])
-            for ticker in self.positions
-        )
-        return self.cash + position_value
+        return float(self.book.total_value(self.cash, self.book.price_vector(current_prices)))
     
     def get_position_summary(self, current_prices):
         """Aktuelle Positionen mit Gewinn/Verlust"""
-        summary = []
-        for ticker, pos in self.positions.items():
-            current_price = current_prices.get(ticker, pos["avg_price"])
-            current_value = pos["shares"] * current_price
-            cost_basis = pos["shares"] * pos["avg_price"]
-            pnl = current_value - cost_basis
-            pnl_pct = (pnl / cost_basis) * 100 if cost_basis > 0 else 0
-            
-            # Handle timezone-aware datetime
-            now = datetime.now(pytz.UTC)
-            buy_date = pos["buy_date"]
-            if buy_date.tzinfo is None:
-                buy_date = pytz.UTC.localize(buy_date)
-            
-            summary.append({
-                "ticker": ticker,
-                "shares": pos["shares"],
-                "avg_price": pos["avg_price"],
-                "current_price": current_price,
-                "cost_basis": cost_basis,
-                "current_value": current_value,
-                "pnl": pnl,
-                "pnl_pct": pnl_pct,
-                "days_held": (now - buy_date).days
-            })
+        book = self.book
+        if not len(book):
+            return pd.DataFrame()
+        
+        prices = book.price_vector(current_prices)
+        pnl, pnl_pct = book.pnl(prices)
         
-        return pd.DataFrame(summary)
+        return pd.DataFrame({
+            "ticker": book.tickers,
+            "shares": _shares_out(book.shares),
+            "avg_price": book.avg_price,
+            "current_price": prices,
+            "cost_basis": book.shares * book.avg_price,
+            "current_value": book.market_value(prices),
+            "pnl": pnl,
+            "pnl_pct": pnl_pct,
+            "days_held": book.days_held(datetime.now(pytz.UTC)),
+        })
     
     def check_stop_loss(self, current_prices):
         """Prüfe Stop-Loss Trigger (-8% aus Investment Thesis)"""
-        alerts = []
-        for ticker, pos in self.positions.items():
-            current_price = current_prices.get(ticker, pos["avg_price"])
-            loss_pct = (current_price - pos["avg_price"]) / pos["avg_price"]
-            
-            if loss_pct <= STOP_LOSS_THRESHOLD:
-                alerts.append({
-                    "ticker": ticker,
-                    "loss_pct": loss_pct * 100,
-                    "recommendation": f"STOP-LOSS TRIGGERED: {ticker} verloren {loss_pct*100:.1f}%"
-                })
+        book = self.book
+        prices = book.price_vector(current_prices)
+        loss_pct = (prices - book.avg_price) / book.avg_price
         
-        return alerts
+        return [
+            {
+                "ticker": book.tickers[i],
+                "loss_pct": loss_pct[i] * 100,
+                "recommendation": f"STOP-LOSS TRIGGERED: {book.tickers[i]} verloren {loss_pct[i]*100:.1f}%"
+            }
+            for i in np.flatnonzero(book.stop_loss_mask(prices))
+        ]
     
     def get_allocation(self, current_prices, ticker_regions):
-        """Aktuelle Allokation nach Region"""
-        allocation = {region: 0.0 for region in TARGET_ALLOCATION.keys()}
-        total_value = self.get_portfolio_value(current_prices)
-        
-        for ticker, pos in self.positions.items():
-            region = ticker_regions.get(ticker, "Unknown")
-            current_price = current_prices.get(ticker, pos["avg_price"])
-            position_value = pos["shares"] * current_price
-            if region in allocation:
-                allocation[region] += position_value
+        """Aktuelle Allokation nach Region (ticker_regions: alle gehaltenen Ticker; das Book bleibt unverändert)"""
+        book = self.book
+        prices = book.price_vector(current_prices)
+        total_value = book.total_value(self.cash, prices)
+        region_values = book.region_values(prices, book.region_codes(ticker_regions))
         
         # Als Prozent
-        allocation_pct = {k: (v / total_value * 100) if total_value > 0 else 0 
-                         for k, v in allocation.items()}
-        
-        return allocation_pct
+        total_value = float(total_value)
+        return {region: (float(region_values[code]) / total_value * 100) if total_value > 0 else 0
+                for region, code in REGION_CODES.items()}
+    
+    def apply_trades(self, trades_df):
+        """
+        Wendet (wenige) neue Trade-Log-Zeilen direkt auf Cash/Book/History an,
+        ohne Regelprüfung (das Log ist der offizielle Record, siehe validate_trade_log).
+        """
+        for trade in trades_df[TRADE_LOG_COLUMNS].to_dict("records"):
+            trade["total"] = trade["shares"] * trade["price"]
+            if trade["action"] == "BUY":
+                self.cash -= trade["total"]
+                self.book.add(trade["ticker"], trade["shares"], trade["price"], trade["date"])
+            elif trade["action"] == "SELL":
+                self.cash += trade["total"]
+                self.book.remove(trade["ticker"], trade["shares"])
+            else:
+                continue
+            trade["cash_after"] = self.cash
+            self.trade_history.append(trade)
+    
+    def to_checkpoint(self):
+        """Zustand als JSON-taugliches Dict (Cash, Positionen, komplette Trade History)"""
+        return {
+            "starting_capital": self.starting_capital,
+            "cash": self.cash,
+            "positions": [
+                {"ticker": t, "shares": float(self.book.shares[i]), "avg_price": float(self.book.avg_price[i]),
+                 "buy_date": pd.Timestamp(self.book.buy_dates[i]).isoformat()}
+                for i, t in enumerate(self.book.tickers)
+            ],
+            "trade_history": [
+                {**t, "date": pd.Timestamp(t["date"]).isoformat(),
+                 **{k: float(t[k]) for k in ("shares", "price", "total", "cash_after")},
+                 **{k: (None if pd.isna(t.get(k)) else t.get(k)) for k in ("reason", "ai_model")}}
+                for t in self.trade_history
+            ],
+        }
+    
+    @classmethod
+    def from_checkpoint(cls, state):
+        """Portfolio aus to_checkpoint()-Dict (inkl. Trade History mit Tages-/Ticker-Index)"""
+        portfolio = cls(starting_capital=state["starting_capital"])
+        portfolio.cash = state["cash"]
+        positions = state["positions"]
+        portfolio.book = PositionBook.from_arrays(
+            [p["ticker"] for p in positions],
+            [p["shares"] for p in positions],
+            [p["avg_price"] for p in positions],
+            [pd.Timestamp(p["buy_date"]) for p in positions],
+        )
+        portfolio.trade_history = [{**t, "date": pd.Timestamp(t["date"])} for t in state["trade_history"]]
+        return portfolio
     
     def export_to_csv(self, filename="portfolio_trades.csv"):
         """Exportiere Trade History als CSV für Competition Upload"""
@@ -257,6 +524,189 @@ class Portfolio:
         return df
 
 
+# -----------------------------
+# Trade-Log Replay (Bulk)
+# -----------------------------
+TRADE_LOG_COLUMNS = ["date", "action", "ticker", "shares", "price", "total", "cash_after", "reason", "ai_model"]
+_EPS = 1e-9  # Toleranz für Bruchteil-Aktien
+
+def _parse_trade_dates(dates):
+    try:
+        return pd.to_datetime(dates, format="ISO8601")
+    except (ValueError, TypeError):
+        # Gemischte UTC-Offsets -> einheitlich UTC
+        return pd.to_datetime(dates, format="ISO8601", utc=True)
+
+def _annotate_trade_log(trades_df, starting_capital):
+    """
+    Berechnet alle Zustände des Trade-Logs spaltenweise (ohne buy()/sell()):
+    cash_after, Stückzahl je Ticker nach dem Trade, Positions-Episode (neu eröffnet
+    nach vollständigem Verkauf), laufender Durchschnittspreis und Eröffnungsdatum.
+    """
+    df = trades_df[trades_df["action"].isin(["BUY", "SELL"])].reset_index(drop=True)
+    df["date"] = _parse_trade_dates(df["date"])
+    
+    is_buy = (df["action"] == "BUY").to_numpy()
+    shares = df["shares"].to_numpy(dtype=np.float64)
+    total = shares * df["price"].to_numpy(dtype=np.float64)
+    df["total"] = total
+    df["cash_after"] = starting_capital - np.cumsum(np.where(is_buy, total, -total))
+    
+    by_ticker = df.groupby("ticker", sort=False)
+    df["_signed"] = np.where(is_buy, shares, -shares)
+    df["_pos_after"] = by_ticker["_signed"].cumsum()
+    pos_before = df["_pos_after"].to_numpy() - df["_signed"].to_numpy()
+    
+    # Neue Episode wenn vor einem BUY keine Aktien gehalten wurden
+    df["_opens"] = is_buy & (pos_before <= _EPS)
+    df["_episode"] = by_ticker["_opens"].cumsum()
+    by_episode = df.groupby(["ticker", "_episode"], sort=False)
+    
+    # Durchschnittspreis: Verkäufe ändern ihn nicht -> kumulierte Kaufkosten / Kaufstücke
+    df["_buy_shares"] = np.where(is_buy, shares, 0.0)
+    df["_buy_cost"] = np.where(is_buy, total, 0.0)
+    cum_shares = by_episode["_buy_shares"].cumsum().to_numpy()
+    cum_cost = by_episode["_buy_cost"].cumsum().to_numpy()
+    prev_shares = cum_shares - df["_buy_shares"].to_numpy()
+    prev_cost = cum_cost - df["_buy_cost"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["_avg_after"] = np.where(cum_shares > 0, cum_cost / cum_shares, np.nan)
+        df["_avg_before"] = np.where(prev_shares > 0, prev_cost / prev_shares, np.nan)
+    df["_open_date"] = by_episode["date"].transform("first")
+    df["_open_row"] = by_episode["date"].transform(lambda d: d.index[0])
+    return df.drop(columns=["_buy_shares", "_buy_cost"])
+
+def replay_trade_log(trades_df, starting_capital=STARTING_CAPITAL):
+    """
+    Baut ein Portfolio aus einem Trade-Log in einem Bulk-Durchlauf auf
+    (groupby für Stückzahl/Einstand je Ticker, cumsum für Cash).
+    Die Regeln werden dabei NICHT geprüft - dafür validate_trade_log().
+    """
+    portfolio = Portfolio(starting_capital=starting_capital)
+    if trades_df.empty:
+        return portfolio
+    
+    df = _annotate_trade_log(trades_df, starting_capital)
+    if df.empty:
+        return portfolio
+    
+    final = df.groupby("ticker", sort=False).tail(1)
+    final = final[final["_pos_after"] > _EPS].sort_values("_open_row")
+    portfolio.book = PositionBook.from_arrays(
+        final["ticker"], final["_pos_after"], final["_avg_after"], final["_open_date"]
+    )
+    portfolio.cash = float(df["cash_after"].iloc[-1])
+    portfolio.trade_history = df[TRADE_LOG_COLUMNS].to_dict("records")
+    return portfolio
+
+def validate_trade_log(trades_df, starting_capital=STARTING_CAPITAL, rules=None):
+    """
+    Prüft ein Trade-Log gegen die Competition-Regeln (competition_rules.LOG_RULES),
+    jede Zeile gegen den Zustand nach den vorherigen Zeilen.
+    Rückgabe: DataFrame mit einer Zeile pro Regelverstoß (row, date, ticker, action, rule, message)
+    """
+    from competition_rules import LOG_RULES  # competition_rules importiert dieses Modul
+    
+    columns = ["row", "date", "ticker", "action", "rule", "message"]
+    if trades_df.empty:
+        return pd.DataFrame(columns=columns)
+    
+    rules = rules or LOG_RULES
+    result = rules.evaluate_log(trades_df, starting_capital)
+    violations = []
+    for i, row in result[~result["passed"]].iterrows():  # nur die (wenigen) Verstöße
+        for rule, message in zip([r.name for r in rules.rules if not row[r.name]], row["reasons"]):
+            violations.append({
+                "row": i,
+                "date": row["date"],
+                "ticker": row["ticker"],
+                "action": row["action"],
+                "rule": rule.upper(),
+                "message": message,
+            })
+    
+    return pd.DataFrame(violations, columns=columns).sort_values(["row", "rule"]).reset_index(drop=True)
+
+
+# -----------------------------
+# Portfolio Checkpoints (inkrementelles Laden des Trade-Logs)
+# -----------------------------
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+_FINGERPRINT_CHUNK = 1024 * 1024
+
+def _log_fingerprint(f, offset):
+    """SHA-256 über die ersten offset Bytes (den bereits angewendeten Teil des Logs)"""
+    f.seek(0)
+    digest = hashlib.sha256()
+    remaining = offset
+    while remaining > 0:
+        chunk = f.read(min(_FINGERPRINT_CHUNK, remaining))
+        if not chunk:
+            break
+        digest.update(chunk)
+        remaining -= len(chunk)
+    return digest.hexdigest()
+
+def save_checkpoint(portfolio, log_path, offset, rows, checkpoint_path=None):
+    """Speichert Portfolio-Zustand + Position (Byte-Offset/Zeilen) im Trade-Log"""
+    checkpoint_path = checkpoint_path or log_path + CHECKPOINT_SUFFIX
+    with open(log_path, "rb") as f:
+        fingerprint = _log_fingerprint(f, offset)
+    state = {**portfolio.to_checkpoint(), "log_offset": offset, "log_rows": rows, "log_fingerprint": fingerprint}
+    tmp = checkpoint_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, default=str)
+    os.replace(tmp, checkpoint_path)
+
+def _read_checkpoint(log_path, checkpoint_path):
+    """Checkpoint laden, None wenn nicht vorhanden oder das Log umgeschrieben wurde"""
+    try:
+        with open(checkpoint_path) as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if "trade_history" not in state:
+        return None  # älteres Format (nur Trades des letzten Handelstags)
+    
+    offset = state.get("log_offset", 0)
+    if os.path.getsize(log_path) < offset:
+        return None  # Log wurde gekürzt
+    with open(log_path, "rb") as f:
+        if _log_fingerprint(f, offset) != state.get("log_fingerprint"):
+            return None  # Log wurde umgeschrieben
+    return state
+
+def load_portfolio_incremental(log_path="portfolio_trades.csv", checkpoint_path=None,
+                               starting_capital=STARTING_CAPITAL):
+    """
+    Lädt das Portfolio aus dem Trade-Log und wendet seit dem letzten Checkpoint nur die
+    angehängten Trades an. Bei umgeschriebenem Log (oder ohne Checkpoint) Full-Replay.
+    Danach wird der Checkpoint aktualisiert.
+    """
+    checkpoint_path = checkpoint_path or log_path + CHECKPOINT_SUFFIX
+    state = _read_checkpoint(log_path, checkpoint_path)
+    
+    with open(log_path, "rb") as f:
+        header = f.readline()
+        if state is None:
+            portfolio = replay_trade_log(pd.read_csv(log_path), starting_capital)
+            rows = len(portfolio.trade_history)
+        else:
+            portfolio = Portfolio.from_checkpoint(state)
+            rows = state["log_rows"]
+            f.seek(state["log_offset"])
+            appended = f.read()
+            if appended.strip():
+                new_trades = pd.read_csv(io.BytesIO(header + appended))
+                new_trades["date"] = _parse_trade_dates(new_trades["date"])
+                portfolio.apply_trades(new_trades)
+                rows += len(new_trades)
+        offset = f.seek(0, os.SEEK_END)
+    
+    save_checkpoint(portfolio, log_path, offset, rows, checkpoint_path)
+    return portfolio
+
+
 # -----------------------------
 # Trading Strategien
 # -----------------------------
@@ -267,52 +717,54 @@ def analyze_buy_opportunities(prices_df, portfolio, max_positions=MAX_POSITIONS)
     2. Allokation entspricht Investment Thesis
     3. Genug Cash verfügbar
     """
-    recommendations = []
-    
     # Anzahl aktueller Positionen
-    current_positions = len(portfolio.positions)
+    current_positions = len(portfolio.book)
     
     if current_positions >= max_positions:
         return pd.DataFrame([{
             "message": f"Portfolio voll: {current_positions}/{max_positions} Positionen"
         }])
     
-    # Verfügbares Cash
-    available_cash = portfolio.cash
+    # Portfolio-Wert einmal berechnen (Preise der gehaltenen Ticker aus prices_df)
+    is_held = prices_df["Ticker"].isin(portfolio.book.tickers)
+    held = prices_df[is_held]
+    held_prices = dict(zip(held["Ticker"], held["Price EUR"]))
+    portfolio_value = portfolio.get_portfolio_value(held_prices)
     
-    # Finde Aktien die nicht im Portfolio sind
-    for _, row in prices_df.iterrows():
-        ticker = row["Ticker"]
-        price_eur = row["Price EUR"]
-        
-        if pd.isna(price_eur):
-            continue
-        
-        if ticker not in portfolio.positions:
-            # Berechne mögliche Shares (max 25% des Portfolio-Werts)
-            portfolio_value = portfolio.get_portfolio_value(
-                {t: prices_df[prices_df["Ticker"]==t]["Price EUR"].values[0] 
-                 for t in portfolio.positions}
-            )
-            max_investment = min(
-                available_cash,
-                portfolio_value * MAX_POSITION_SIZE
-            )
-            max_shares = int(max_investment / price_eur)
-            
-            if max_shares > 0:
-                recommendations.append({
-                    "ticker": ticker,
-                    "name": row["Name"],
-                    "sector": row["Sector"],
-                    "region": row["Region"],
-                    "price_eur": price_eur,
-                    "max_shares": max_shares,
-                    "max_investment": max_shares * price_eur,
-                    "reason": "New position opportunity"
-                })
+    # Max Investment pro Position: verfügbares Cash, max 25% des Portfolio-Werts
+    max_investment = min(portfolio.cash, portfolio_value * MAX_POSITION_SIZE)
+    
+    # Screen als Spaltenoperationen: Aktien mit Preis, die nicht im Portfolio sind
+    candidates = prices_df[prices_df["Price EUR"].notna() & ~is_held]
+    price_eur = candidates["Price EUR"].to_numpy(dtype=np.float64)
+    max_shares = np.floor(max_investment / price_eur).astype(np.int64)
+    affordable = max_shares > 0
+    
+    if not affordable.any():
+        return pd.DataFrame()
     
-    return pd.DataFrame(recommendations)
+    candidates = candidates[affordable]
+    
+    # Gemeinsames Sizing über alle Kandidaten: Fehlbetrag je Region bis zur Zielallokation
+    book = portfolio.book
+    region_values = book.region_values(book.price_vector(held_prices),
+                                       book.region_codes(dict(zip(prices_df["Ticker"], prices_df["Region"]))))
+    region_gaps = {region: TARGET_ALLOCATION[region] * portfolio_value - region_values[code]
+                   for region, code in REGION_CODES.items()}
+    optimal_shares = optimise_shares(price_eur[affordable], candidates["Region"].tolist(),
+                                     max_shares[affordable], portfolio.cash, region_gaps)
+    
+    return pd.DataFrame({
+        "ticker": candidates["Ticker"].to_numpy(),
+        "name": candidates["Name"].to_numpy(),
+        "sector": candidates["Sector"].to_numpy(),
+        "region": candidates["Region"].to_numpy(),
+        "price_eur": price_eur[affordable],
+        "max_shares": max_shares[affordable],
+        "max_investment": max_shares[affordable] * price_eur[affordable],
+        "optimal_shares": optimal_shares,
+        "reason": "New position opportunity",
+    })
 
 
 # -----------------------------
@@ -324,12 +776,12 @@ def main():
     print("=" * 80)
     
     # Lade aktuelle Preise
-    try:
-        prices_df = pd.read_csv("prices_2025-11-04_1615_Europe-Madrid.csv")
-        print(f"\n✓ Preise geladen: {len(prices_df)} Aktien")
-    except FileNotFoundError:
+    market = load_market_data()
+    if market.empty:
         print("\n✗ Keine Preise gefunden. Bitte zuerst price_getter ausführen!")
         return
+    prices_df = market.frame
+    print(f"\n✓ Preise geladen: {len(market)} Aktien")
     
     # Erstelle Portfolio
     portfolio = Portfolio(starting_capital=STARTING_CAPITAL)
@@ -371,12 +823,11 @@ def main():
             print(f"\n⊘ SKIP: {ticker} - {reason}")
             continue
             
-        price_row = prices_df[prices_df["Ticker"] == ticker]
-        if price_row.empty or pd.isna(price_row["Price EUR"].values[0]):
+        price = market.price(ticker)
+        if price is None:
             print(f"\n✗ SKIP: {ticker} - Kein Preis verfügbar")
             continue
         
-        price = price_row["Price EUR"].values[0]
         result = portfolio.buy(ticker, shares, price, target_date, reason, "Gemini Advanced")
         
         if result["success"]:
@@ -391,11 +842,7 @@ def main():
     print("PORTFOLIO ÜBERSICHT")
     print("=" * 80)
     
-    current_prices = {
-        row["Ticker"]: row["Price EUR"] 
-        for _, row in prices_df.iterrows() 
-        if not pd.isna(row["Price EUR"])
-    }
+    current_prices = market.prices
     
     total_value = portfolio.get_portfolio_value(current_prices)
     print(f"\nCash: €{portfolio.cash:.2f}")
@@ -410,7 +857,7 @@ def main():
         print(positions_df.to_string(index=False))
     
     # Regional Allocation
-    ticker_regions = {row["Ticker"]: row["Region"] for _, row in prices_df.iterrows()}
+    ticker_regions = market.regions
     allocation = portfolio.get_allocation(current_prices, ticker_regions)
     
     print("\n" + "-" * 80)
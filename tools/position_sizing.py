@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Position Sizing - ganzzahlige Stückzahlen über alle Kandidaten gemeinsam
+
+Mit €1'000 Kapital und Preisen wie META (~€555) verschenkt das Sizing pro Aktie
+(int(max_investment / price)) viel Cash. optimise_shares() wählt die Stückzahlen aller
+Kandidaten zusammen und minimiert
+
+    ungenutztes Cash + TRACKING_WEIGHT * Σ |Kauf Region - Fehlbetrag Region|
+
+unter Cash- und Positionsgrößen-Grenze (obere Schranke pro Kandidat).
+
+Verfahren (dynamische Programmierung statt Brute Force):
+1. Pro Region: erreichbare Kaufsummen als Bitset (beschränkte Subset-Summe in
+   Geldeinheiten der Auflösung, Preise aufgerundet -> nie über Budget).
+2. Pro Region nur die Pareto-Front (höhere Summe <=> geringere Kosten) behalten.
+3. Regionen per Min-Plus-Faltung über das gemeinsame Budget kombinieren.
+4. Rückverfolgung der Stückzahlen, danach exakte Nachbesserung mit dem Restcash.
+
+Die Zielfunktion ist bis auf das gemeinsame Budget pro Region separierbar, daher
+bleibt der Suchraum klein.
+
+Verwendung:
+    shares = optimise_shares(prices, regions, upper, budget, region_gaps)
+    python tools/position_sizing.py
+
+Author: Investment Team
+"""
+
+import numpy as np
+
+# -----------------------------
+# Configuration
+# -----------------------------
+TRACKING_WEIGHT = 2.0   # EUR Abweichung zur Zielallokation zählt doppelt so viel wie Rest-Cash
+MAX_UNITS = 10000       # Budget-Auflösung: höchstens so viele Geldeinheiten (z.B. €0.10 bei €1'000)
+
+
+def sizing_cost(shares, prices, regions, budget, region_gaps, tracking_weight=TRACKING_WEIGHT):
+    """Exakte Zielfunktion: Rest-Cash + Gewicht * Σ |Kauf Region - Fehlbetrag Region|"""
+    spend = np.asarray(shares) * np.asarray(prices, dtype=np.float64)
+    deviation = 0.0
+    for region in set(regions) | set(region_gaps):
+        region_spend = spend[[r == region for r in regions]].sum() if len(regions) else 0.0
+        deviation += abs(region_spend - max(region_gaps.get(region, 0.0), 0.0))
+    return (budget - spend.sum()) + tracking_weight * deviation
+
+
+def _reachable(units, upper, cap):
+    """Bitsets erreichbarer Summen nach jedem Kandidaten (für die Rückverfolgung)"""
+    reach = np.zeros(cap + 1, dtype=bool)
+    reach[0] = True
+    layers = [reach]
+    for p, u in zip(units, upper):
+        new = reach.copy()
+        for k in range(1, int(u) + 1):
+            shift = k * p
+            if shift > cap:
+                break
+            new[shift:] |= reach[:cap + 1 - shift]
+        reach = new
+        layers.append(reach)
+    return layers
+
+
+def _backtrack(layers, units, upper, target):
+    """Stückzahlen pro Kandidat, die genau die Summe 'target' ergeben"""
+    counts = np.zeros(len(units), dtype=np.int64)
+    for i in range(len(units) - 1, -1, -1):
+        previous = layers[i]
+        for k in range(int(upper[i]), -1, -1):
+            rest = target - k * units[i]
+            if rest >= 0 and previous[rest]:
+                counts[i] = k
+                target = rest
+                break
+    return counts
+
+
+def optimise_shares(prices, regions, upper, budget, region_gaps, tracking_weight=TRACKING_WEIGHT,
+                    max_units=MAX_UNITS):
+    """
+    prices: EUR je Kandidat, regions: Region je Kandidat, upper: max. Stückzahl je Kandidat
+    (Positionsgrößen-Grenze), budget: verfügbares Cash, region_gaps: {region: EUR bis Zielallokation}
+    Rückgabe: np.ndarray ganzzahliger Stückzahlen
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    upper = np.minimum(np.asarray(upper, dtype=np.int64), np.floor(budget / prices).astype(np.int64))
+    upper = np.maximum(upper, 0)
+    shares = np.zeros(len(prices), dtype=np.int64)
+    if budget <= 0 or not upper.any():
+        return shares
+
+    resolution = max(0.01, budget / max_units)
+    budget_units = int(np.floor(budget / resolution + 1e-9))
+    units = np.maximum(np.ceil(prices / resolution - 1e-9).astype(np.int64), 1)
+
+    # 1 + 2: Pareto-Front pro Region (Kosten ohne den gemeinsamen Cash-Term: w*|S - gap| - S)
+    region_fronts = []
+    for region in dict.fromkeys(regions):
+        idx = np.flatnonzero([r == region for r in regions])
+        idx = idx[upper[idx] > 0]
+        if not len(idx):
+            continue
+        cap = int(min(budget_units, (units[idx] * upper[idx]).sum()))
+        layers = _reachable(units[idx], upper[idx], cap)
+        sums = np.flatnonzero(layers[-1])
+        gap = max(region_gaps.get(region, 0.0), 0.0)
+        cost = tracking_weight * np.abs(sums * resolution - gap) - sums * resolution
+        keep = cost < np.minimum.accumulate(np.concatenate(([np.inf], cost[:-1])))  # streng fallend
+        region_fronts.append((idx, layers, sums[keep], cost[keep]))
+
+    # 3: Min-Plus-Faltung über das Budget
+    best = np.full(budget_units + 1, np.inf)
+    best[0] = 0.0
+    choices = []
+    for idx, layers, sums, cost in region_fronts:
+        new = np.full_like(best, np.inf)
+        arg = np.full(budget_units + 1, -1, dtype=np.int64)
+        for j, (s, c) in enumerate(zip(sums, cost)):
+            candidate = best[:budget_units + 1 - s] + c
+            target = new[s:]
+            better = candidate < target
+            target[better] = candidate[better]
+            arg[s:][better] = j
+        best = new
+        choices.append(arg)
+
+    # 4: Rückverfolgung
+    total = int(np.argmin(best))
+    for (idx, layers, sums, cost), arg in zip(reversed(region_fronts), reversed(choices)):
+        region_sum = int(sums[arg[total]])
+        shares[idx] = _backtrack(layers, units[idx], upper[idx], region_sum)
+        total -= region_sum
+
+    # Exakte Nachbesserung: Einzelaktien zukaufen, solange es die exakte Zielfunktion verbessert
+    current = sizing_cost(shares, prices, regions, budget, region_gaps, tracking_weight)
+    while True:
+        left = budget - float(shares @ prices)
+        best_i, best_cost = None, current
+        for i in np.flatnonzero((shares < upper) & (prices <= left + 1e-9)):
+            shares[i] += 1
+            c = sizing_cost(shares, prices, regions, budget, region_gaps, tracking_weight)
+            shares[i] -= 1
+            if c < best_cost - 1e-9:
+                best_i, best_cost = i, c
+        if best_i is None:
+            return shares
+        shares[best_i] += 1
+        current = best_cost
+
+
+def main():
+    from price_store import PriceStore
+    from portfolio_manager import load_portfolio_incremental, analyze_buy_opportunities, Portfolio
+
+    prices_df = PriceStore().latest()
+    if prices_df.empty:
+        print("✗ Keine Preisdaten gefunden. Bitte zuerst price_getter ausführen!")
+        return
+    try:
+        portfolio = load_portfolio_incremental("portfolio_trades.csv")
+    except FileNotFoundError:
+        portfolio = Portfolio()
+
+    opportunities = analyze_buy_opportunities(prices_df, portfolio)
+    if opportunities.empty or "optimal_shares" not in opportunities.columns:
+        print("⚠ Keine Kaufkandidaten")
+        return
+
+    chosen = opportunities[opportunities["optimal_shares"] > 0]
+    spend = float((chosen["optimal_shares"] * chosen["price_eur"]).sum())
+    print("=" * 80)
+    print(f"POSITION SIZING (Cash €{portfolio.cash:.2f})")
+    print("=" * 80)
+    print(chosen[["ticker", "region", "price_eur", "max_shares", "optimal_shares"]].to_string(index=False))
+    print(f"\nInvestiert: €{spend:.2f}, Rest-Cash: €{portfolio.cash - spend:.2f}")
+
+
+if __name__ == "__main__":
+    main()
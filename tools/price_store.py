@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Price Store - spaltenbasierte Preis-Historie (ersetzt lose prices_*.csv Dateien)
+
+Alle Snapshots von price_getter landen append-only in einem partitionierten
+Parquet-Dataset unter data/price_history/ (eine Datei pro Snapshot, Spalte
+'snapshot_ts' = Snapshot-Zeitpunkt in UTC). Leser laden per Memory-Map nur die
+Spalten, die sie brauchen.
+
+API:
+    store = PriceStore()
+    store.latest()                       # letzter Snapshot (DataFrame wie die alte CSV)
+    store.at(ts)                         # letzter Snapshot <= ts
+    store.series("NVDA")                 # Zeitreihe 'Price EUR' für einen Ticker
+    store.history()                      # Zeitpunkte x Ticker ('Price EUR')
+    store.latest_prices()                # {ticker: Price EUR}
+
+Migration bestehender CSV-Dateien:
+    python tools/price_store.py import data/prices_*.csv
+
+Author: Investment Team
+"""
+
+import os
+import re
+import sys
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytz
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_STORE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "price_history"))
+
+# Spalten wie in den bisherigen prices_*.csv Dateien (price_getter.build_price_table)
+STRING_COLUMNS = ["Ticker", "Name", "Sector", "Region", "Native Ccy", "Price TS (local)",
+                  "FX Pair", "FX TS (local)", "Yahoo URL", "Note"]
+FLOAT_COLUMNS = ["Price (native)", "Price EUR"]
+PRICE_COLUMNS = ["Ticker", "Name", "Sector", "Region", "Native Ccy", "Price (native)", "Price EUR",
+                 "Price TS (local)", "FX Pair", "FX TS (local)", "Yahoo URL", "Note"]
+
+SCHEMA = pa.schema(
+    [(c, pa.float64() if c in FLOAT_COLUMNS else pa.string()) for c in PRICE_COLUMNS]
+    + [("snapshot_ts", pa.timestamp("s", tz="UTC"))]
+)
+
+_CSV_NAME = re.compile(r"prices_(\d{4}-\d{2}-\d{2})_(\d{4})_(.+)\.csv$")
+
+
+def _to_utc(ts):
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.tz_convert("UTC")
+
+
+def snapshot_ts_from_filename(path):
+    """prices_2025-11-04_1615_Europe-Madrid.csv -> Timestamp (UTC)"""
+    m = _CSV_NAME.search(os.path.basename(path))
+    if not m:
+        raise ValueError(f"Kein Snapshot-Zeitpunkt im Dateinamen: {path}")
+    day, hhmm, tz_name = m.groups()
+    local = datetime.strptime(f"{day} {hhmm}", "%Y-%m-%d %H%M")
+    return _to_utc(pytz.timezone(tz_name.replace("-", "/")).localize(local))
+
+
+# -----------------------------
+# PriceStore Klasse
+# -----------------------------
+class PriceStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+
+    def _read(self, columns=None, filters=None):
+        """Liest (projiziert) aus dem Dataset, Dateien werden per Memory-Map geöffnet"""
+        if not os.path.isdir(self.path) or not os.listdir(self.path):
+            return pd.DataFrame(columns=list(columns or SCHEMA.names))
+        table = pq.read_table(self.path, columns=columns, filters=filters,
+                              memory_map=True, schema=SCHEMA)
+        return table.to_pandas()
+
+    def append(self, df, snapshot_ts):
+        """Hängt einen Snapshot (Format von price_getter.build_price_table) an"""
+        snapshot_ts = _to_utc(snapshot_ts)
+        df = df.reindex(columns=PRICE_COLUMNS).copy()
+        for c in STRING_COLUMNS:
+            df[c] = df[c].astype(object).where(df[c].notna(), None)
+            df[c] = df[c].map(lambda v: None if v is None else str(v))
+        for c in FLOAT_COLUMNS:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+        df["snapshot_ts"] = snapshot_ts
+
+        os.makedirs(self.path, exist_ok=True)
+        filename = os.path.join(self.path, f"snapshot_{snapshot_ts.strftime('%Y%m%dT%H%M%SZ')}.parquet")
+        tmp = os.path.join(self.path, "_" + os.path.basename(filename) + ".tmp")  # "_" wird beim Lesen ignoriert
+        pq.write_table(pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False), tmp)
+        os.replace(tmp, filename)  # atomar: Leser sehen nie eine halbe Datei
+        return filename
+
+    def snapshots(self):
+        """Alle Snapshot-Zeitpunkte (UTC), aufsteigend"""
+        ts = self._read(columns=["snapshot_ts"])["snapshot_ts"]
+        return sorted(pd.unique(ts))
+
+    def at(self, ts, columns=None):
+        """Letzter Snapshot <= ts (None = neuester Snapshot)"""
+        snapshots = self.snapshots()
+        if ts is not None:
+            ts = _to_utc(ts)
+            snapshots = [s for s in snapshots if s <= ts]
+        if not snapshots:
+            return pd.DataFrame(columns=list(columns or PRICE_COLUMNS))
+
+        df = self._read(columns=columns, filters=[("snapshot_ts", "=", snapshots[-1])])
+        return df.drop(columns="snapshot_ts", errors="ignore").reset_index(drop=True)
+
+    def latest(self, columns=None):
+        """Neuester Snapshot"""
+        return self.at(None, columns)
+
+    def latest_prices(self):
+        """{ticker: Price EUR} des neuesten Snapshots (ohne fehlende Preise)"""
+        df = self.latest(columns=["Ticker", "Price EUR"]).dropna(subset=["Price EUR"])
+        return dict(zip(df["Ticker"], df["Price EUR"]))
+
+    def series(self, ticker, column="Price EUR"):
+        """Zeitreihe einer Spalte für einen Ticker, Index = snapshot_ts"""
+        df = self._read(columns=["snapshot_ts", column], filters=[("Ticker", "=", ticker)])
+        return df.set_index("snapshot_ts")[column].sort_index()
+
+    def history(self, column="Price EUR", tickers=None, since=None):
+        """Breite Zeitreihe: Index = snapshot_ts, eine Spalte pro Ticker (optional nur > since)"""
+        filters = [("Ticker", "in", list(tickers))] if tickers else []
+        if since is not None:
+            filters.append(("snapshot_ts", ">", _to_utc(since)))
+        filters = filters or None
+        df = self._read(columns=["snapshot_ts", "Ticker", column], filters=filters)
+        return df.pivot_table(index="snapshot_ts", columns="Ticker", values=column, aggfunc="last").sort_index()
+
+    def import_csv(self, path, snapshot_ts=None):
+        """Übernimmt eine bestehende prices_*.csv Datei in den Store"""
+        if snapshot_ts is None:
+            snapshot_ts = snapshot_ts_from_filename(path)
+        if _to_utc(snapshot_ts) in self.snapshots():
+            return None
+        return self.append(pd.read_csv(path), snapshot_ts)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "import":
+        print("Usage: python price_store.py import <prices_*.csv> [...]")
+        sys.exit(1)
+
+    store = PriceStore()
+    for csv_path in sys.argv[2:]:
+        written = store.import_csv(csv_path)
+        print(f"✓ Importiert: {csv_path} -> {written}" if written else f"⊘ Bereits im Store: {csv_path}")
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Rebalancer - mehrtägiger Trade-Plan zurück zur TARGET_ALLOCATION
+
+Plant eine Folge von Trades mit ganzen Aktien, bis alle Regionen (US/HK/JP/EU) innerhalb
+der Toleranz zur Zielallokation liegen. Greedy mit Schranken: pro Handelstag wird der
+Trade gewählt, der die quadrierte Abweichung von der Zielallokation am stärksten
+reduziert. Die Stückzahl ergibt sich aus dem Fehlbetrag der Region, begrenzt durch
+Cash, MAX_POSITION_SIZE und gehaltene Stückzahl.
+
+Ob ein Kandidat an einem Tag erlaubt ist (MAX_TRADES_PER_DAY, MIN_HOLD_DAYS,
+MAX_POSITIONS, Cash, Positionsgröße, Stop-Loss), entscheidet das RuleSet aus
+competition_rules - alle Kandidaten eines Tages in einem evaluate()-Aufruf. Die
+Trades werden auf einer Kopie des Portfolios über buy()/sell() ausgeführt. Preise
+werden für den Plan konstant gehalten - nach jedem Preis-Update einfach neu planen.
+Geplant wird nur an Werktagen (ein Start am Wochenende rollt auf den nächsten Werktag).
+
+Verwendung:
+    plan = plan_rebalance(portfolio, prices, ticker_regions, start_date)
+    plan["schedule"]                       # DataFrame: date, action, ticker, region, shares, ...
+
+    python tools/rebalancer.py --tolerance 5
+
+Author: Investment Team
+"""
+
+import argparse
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from competition_rules import RuleSet
+from portfolio_manager import (
+    Portfolio, TARGET_ALLOCATION, MAX_POSITIONS, REGIONS, REGION_CODES, load_portfolio_incremental
+)
+
+# -----------------------------
+# Configuration
+# -----------------------------
+REBALANCE_TOLERANCE = 10.0  # Prozentpunkte, wie die ✓/⚠ Anzeige in portfolio_manager.main()
+MAX_PLAN_DAYS = 30          # Handelstage, die maximal geplant werden
+TIMING_RULES = {"max_trades_per_day", "min_hold_days"}  # verletzt -> an einem späteren Tag erlaubt
+TRADE_TZ = pytz.timezone("Europe/Madrid")
+TRADE_TIME = time(16, 15)   # geplante Ausführungszeit (lokal, TRADE_TZ)
+
+
+def _clone(portfolio):
+    """Unabhängige Kopie für die Simulation (Cash, Book, Trade History)"""
+    clone = Portfolio.from_checkpoint(portfolio.to_checkpoint())
+    clone.max_position_size = portfolio.max_position_size
+    return clone
+
+
+def _score(region_values, total_value, targets):
+    """Summe der quadrierten Abweichungen (Prozentpunkte) von der Zielallokation"""
+    return float((((region_values / total_value) * 100 - targets) ** 2).sum())
+
+
+def _best_shares(excess, price, lower, upper):
+    """Ganzzahlige Stückzahl in [lower, upper], die 'excess' (EUR) am besten trifft"""
+    if upper < lower:
+        return 0
+    ideal = excess / price
+    options = {int(np.clip(np.floor(ideal), lower, upper)), int(np.clip(np.ceil(ideal), lower, upper))}
+    return min(options, key=lambda k: abs(k * price - excess))
+
+
+def _candidates(portfolio, prices, ticker_regions, region_values, total_value, targets, tolerance):
+    """Mögliche Trades (action, ticker, region_code, shares, price) für einen Tag, ohne Regelprüfung"""
+    book = portfolio.book
+    diffs = region_values / total_value * 100 - targets
+    size_limit = portfolio.max_position_size * max(portfolio.get_portfolio_value({}), portfolio.starting_capital)
+    held_values = book.market_value(book.price_vector(prices))
+
+    trades = []
+    for code in np.flatnonzero(np.abs(diffs) > tolerance):
+        amount = abs(diffs[code]) / 100 * total_value
+        region = REGIONS[code]
+        if diffs[code] > 0:
+            # Übergewicht: Positionen der Region verkaufen
+            for i, ticker in enumerate(book.tickers):
+                price = prices.get(ticker)
+                if ticker_regions.get(ticker) != region or price is None:
+                    continue
+                held = int(np.floor(book.shares[i] + 1e-9))
+                shares = _best_shares(amount, price, 1, held)
+                if shares:
+                    trades.append(("SELL", ticker, code, shares, price))
+        else:
+            # Untergewicht: Aktien der Region kaufen
+            for ticker, price in prices.items():
+                if ticker_regions.get(ticker) != region or not price or price <= 0:
+                    continue
+                existing = held_values[book.index[ticker]] if ticker in book else 0.0
+                budget = min(portfolio.cash, size_limit,
+                             portfolio.max_position_size * total_value - existing)
+                shares = _best_shares(amount, price, 1, int(budget // price))
+                if shares:
+                    trades.append(("BUY", ticker, code, shares, price))
+    return trades
+
+
+def _evaluate(rules, portfolio, candidates, date, prices):
+    """RuleSet über alle Kandidaten: (erlaubt, nur an Timing-Regeln gescheitert) als bool-Arrays"""
+    trades = pd.DataFrame(candidates, columns=["action", "ticker", "code", "shares", "price"])
+    trades["date"] = [date] * len(trades)
+    result = rules.evaluate(portfolio, trades, prices)
+    other = [r.name for r in rules.rules if r.name not in TIMING_RULES]
+    return result["passed"].to_numpy(), (~result["passed"] & result[other].all(axis=1)).to_numpy()
+
+
+def plan_rebalance(portfolio, prices, ticker_regions, start_date, target_allocation=TARGET_ALLOCATION,
+                   tolerance=REBALANCE_TOLERANCE, max_days=MAX_PLAN_DAYS, max_positions=MAX_POSITIONS, rules=None):
+    """
+    Mehrtägiger Rebalancing-Plan.
+    prices: {ticker: Price EUR}, ticker_regions: {ticker: region}, start_date: erster möglicher
+    Handelszeitpunkt (Wochenende -> nächster Werktag, gleiche Uhrzeit)
+    rules: RuleSet (Default: RuleSet.default mit max_positions und portfolio.max_position_size)
+    Rückgabe: dict mit schedule (DataFrame), allocation (Endzustand), within_tolerance, days
+    """
+    sim = _clone(portfolio)
+    book = sim.book
+    rules = rules or RuleSet.default(max_positions=max_positions, max_position_size=portfolio.max_position_size)
+    targets = np.array([target_allocation.get(r, 0) * 100 for r in REGIONS])
+    schedule = []
+
+    date = pd.offsets.BDay().rollforward(pd.Timestamp(start_date))
+    for day in range(max_days):
+        if day:
+            date = date + pd.offsets.BDay(1)
+
+        book.set_regions(ticker_regions)
+        position_prices = book.price_vector(prices)
+        total_value = float(book.total_value(sim.cash, position_prices))
+        region_values = book.region_values(position_prices)
+        current = _score(region_values, total_value, targets)
+        if np.all(np.abs(region_values / total_value * 100 - targets) <= tolerance):
+            break
+        candidates = _candidates(sim, prices, ticker_regions, region_values, total_value, targets, tolerance)
+        allowed, later = _evaluate(rules, sim, candidates, date, prices) if candidates else ([], [])
+
+        best, best_score, waiting = None, current, False
+        for trade, ok, ok_later in zip(candidates, allowed, later):
+            action, ticker, code, shares, price = trade
+            after = region_values.copy()
+            after[code] += shares * price if action == "BUY" else -shares * price
+            score = _score(after, total_value, targets)
+            if score < current - 1e-9:
+                waiting |= bool(ok_later)
+            if ok and score < best_score - 1e-9:
+                best, best_score = trade, score
+
+        if best is None:
+            # Kein erlaubter verbessernder Trade: warten lohnt nur, wenn einer an Tageslimit/Haltedauer scheitert
+            if not waiting:
+                break
+            continue
+
+        action, ticker, code, shares, price = best
+        trade = sim.buy if action == "BUY" else sim.sell
+        result = trade(ticker, shares, price, date, "Rebalancing", "Rebalancer")
+        if not result["success"]:
+            break
+        schedule.append({
+            "date": date,
+            "action": action,
+            "ticker": ticker,
+            "region": REGIONS[code],
+            "shares": shares,
+            "price": price,
+            "total": shares * price,
+            "cash_after": sim.cash,
+        })
+
+    allocation = {r: float(pct) for r, pct in sim.get_allocation(prices, ticker_regions).items()}
+    return {
+        "schedule": pd.DataFrame(schedule, columns=["date", "action", "ticker", "region", "shares",
+                                                    "price", "total", "cash_after"]),
+        "allocation": allocation,
+        "within_tolerance": all(abs(allocation[r] - target_allocation.get(r, 0) * 100) <= tolerance
+                                for r in REGION_CODES),
+        "days": len({d.date() for d in (t["date"] for t in schedule)}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebalancing-Plan zur Zielallokation")
+    parser.add_argument("--tolerance", type=float, default=REBALANCE_TOLERANCE,
+                        help="Erlaubte Abweichung pro Region in Prozentpunkten")
+    parser.add_argument("--days", type=int, default=MAX_PLAN_DAYS, help="Maximale Anzahl Handelstage")
+    args = parser.parse_args()
+
+    from price_store import PriceStore
+    prices_df = PriceStore().latest(columns=["Ticker", "Region", "Price EUR"])
+    if prices_df.empty:
+        print("✗ Keine Preisdaten gefunden. Bitte zuerst price_getter ausführen!")
+        return
+    prices = dict(prices_df.dropna(subset=["Price EUR"])[["Ticker", "Price EUR"]].itertuples(index=False))
+    ticker_regions = dict(zip(prices_df["Ticker"], prices_df["Region"]))
+
+    try:
+        portfolio = load_portfolio_incremental("portfolio_trades.csv")
+    except FileNotFoundError:
+        portfolio = Portfolio()
+
+    # Nächster Handelszeitpunkt 16:15 Madrid: heute, wenn noch nicht vorbei, sonst ab morgen (Werktag)
+    now = datetime.now(TRADE_TZ)
+    day = now.date() if now.time() < TRADE_TIME else now.date() + timedelta(days=1)
+    start = TRADE_TZ.localize(datetime.combine(day, TRADE_TIME))
+    plan = plan_rebalance(portfolio, prices, ticker_regions, start, tolerance=args.tolerance, max_days=args.days)
+
+    print("=" * 80)
+    print(f"REBALANCING PLAN (Toleranz ±{args.tolerance:.1f} Prozentpunkte)")
+    print("=" * 80)
+    if plan["schedule"].empty:
+        print("\n✓ Keine Trades nötig" if plan["within_tolerance"] else "\n⚠ Kein ausführbarer Trade gefunden")
+    else:
+        print(plan["schedule"].to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    print("\nAllokation nach Plan:")
+    for region, pct in plan["allocation"].items():
+        target_pct = TARGET_ALLOCATION.get(region, 0) * 100
+        status = "✓" if abs(pct - target_pct) <= args.tolerance else "⚠"
+        print(f"{status} {region:6s}: {pct:5.1f}% (Target: {target_pct:5.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Report Build - inkrementelle PDF-Reports mit Abhängigkeits-Tracking
+
+Ein Report (Report) besteht aus Abschnitten (Section), die ihre Eingaben deklarieren
+(Trade Log, Preis-Snapshot, Excel-Workbook, ...). build_report():
+1. berechnet für jede Eingabe einen Content-Hash (SHA-256)
+2. überspringt den Report, wenn das PDF existiert und sich weder Eingaben noch
+   Abschnitts-Code noch implizite Eingaben (Section key, z.B. Erstellungsdatum) geändert haben
+3. baut sonst nur die Abschnitte neu, deren Eingaben/Code sich geändert haben - die
+   übrigen Story-Spezifikationen (report_render) kommen als Artefakt aus dem Cache
+4. rendert das PDF (Seitenumbruch hängt vom ganzen Dokument ab) und speichert den Zustand
+
+Artefakte und Zustand liegen unter logs/report_cache/.
+
+Verwendung:
+    report = Report("docs/report.pdf",
+                    inputs={"workbook": FileInput("data/stock worth.xlsx", loader=pd.read_excel)},
+                    sections=[Section("title", title_section, cache=False),
+                              Section("holdings", holdings_section, inputs=["workbook"])])
+    result = build_report(report)          # {"built": bool, "rebuilt": [...], "cached": [...]}
+
+Author: Investment Team
+"""
+
+import glob
+import hashlib
+import inspect
+import json
+import os
+import pickle
+
+from report_render import render
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_CACHE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs", "report_cache"))
+HASH_CHUNK = 1024 * 1024
+
+
+# -----------------------------
+# Eingaben
+# -----------------------------
+class FileInput:
+    """Datei-Eingabe; loader(path) liefert die Daten für die Abschnitte (einmal pro Build)"""
+
+    def __init__(self, path, loader=None):
+        self.path = path
+        self.loader = loader or (lambda p: p)
+
+    def fingerprint(self):
+        if not os.path.exists(self.path):
+            return None
+        digest = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def load(self):
+        return self.loader(self.path)
+
+
+class PriceStoreInput:
+    """Neuester Preis-Snapshot; Snapshot-Dateien sind unveränderlich (append-only), Name + Grösse genügen"""
+
+    def __init__(self, store=None, columns=None):
+        from price_store import PriceStore
+        self.store = store or PriceStore()
+        self.columns = columns
+
+    def fingerprint(self):
+        if not os.path.isdir(self.store.path):
+            return None
+        files = sorted(f for f in os.listdir(self.store.path) if not f.startswith("_"))
+        if not files:
+            return None
+        latest = files[-1]
+        size = os.path.getsize(os.path.join(self.store.path, latest))
+        return hashlib.sha256(f"{latest}:{size}:{self.columns}".encode("utf-8")).hexdigest()
+
+    def load(self):
+        return self.store.latest(columns=self.columns)
+
+
+class PriceHistoryInput(PriceStoreInput):
+    """Ganze Preis-Historie (store.history()); Fingerprint über alle Snapshot-Dateien"""
+
+    def __init__(self, store=None, column="Price EUR"):
+        super().__init__(store, columns=[column])
+        self.column = column
+
+    def fingerprint(self):
+        if not os.path.isdir(self.store.path):
+            return None
+        files = sorted(f for f in os.listdir(self.store.path) if not f.startswith("_"))
+        if not files:
+            return None
+        sizes = [f"{f}:{os.path.getsize(os.path.join(self.store.path, f))}" for f in files]
+        return hashlib.sha256(json.dumps([sizes, self.column]).encode("utf-8")).hexdigest()
+
+    def load(self):
+        return self.store.history(column=self.column)
+
+
+# -----------------------------
+# Report-Graph
+# -----------------------------
+class Section:
+    """
+    Abschnitt eines Reports: build(**eingaben) -> Story-Spezifikation (report_render).
+    cache=False für billige Abschnitte, deren Artefakt sich nicht lohnt.
+    key: optionale Funktion -> JSON-Wert für implizite Eingaben (z.B. das Erstellungsdatum);
+    ändert sich der Wert, wird der Abschnitt und damit das PDF neu gebaut.
+    """
+
+    def __init__(self, name, build, inputs=(), cache=True, key=None):
+        self.name = name
+        self.build = build
+        self.inputs = list(inputs)
+        self.cache = cache
+        self.key = key
+
+    def code_hash(self):
+        """
+        Quelltext des Moduls der build-Funktion plus der Projekt-Module (gleiches Verzeichnis),
+        aus denen es Namen importiert: auch Änderungen an Hilfsfunktionen und Modul-Konstanten
+        (Styles, report_charts.chart_section, ...) invalidieren das Artefakt
+        """
+        try:
+            path = inspect.getsourcefile(self.build)
+        except TypeError:
+            path = None
+        if not path:
+            source = getattr(self.build, "__qualname__", repr(self.build))
+            return hashlib.sha256(source.encode("utf-8")).hexdigest()
+        paths = {os.path.abspath(path)} | _project_modules(self.build.__globals__, os.path.dirname(os.path.abspath(path)))
+        digest = hashlib.sha256(self.build.__qualname__.encode("utf-8"))
+        for p in sorted(paths):
+            digest.update(_source_hash(p).encode("utf-8"))
+        return digest.hexdigest()
+
+
+def _project_modules(namespace, directory):
+    """Quelldateien der Module im Projektverzeichnis, aus denen namespace Objekte/Module bezieht"""
+    paths = set()
+    for value in namespace.values():
+        module = value if inspect.ismodule(value) else inspect.getmodule(value)
+        path = getattr(module, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == directory and path.endswith(".py"):
+            paths.add(os.path.abspath(path))
+    return paths
+
+
+_source_hashes = {}
+
+
+def _source_hash(path):
+    """SHA-256 einer Quelldatei (einmal pro Prozess gelesen)"""
+    if path not in _source_hashes:
+        with open(path, "rb") as f:
+            _source_hashes[path] = hashlib.sha256(f.read()).hexdigest()
+    return _source_hashes[path]
+
+
+class Report:
+    def __init__(self, path, sections, inputs=None, template="a4"):
+        self.path = path
+        self.sections = sections
+        self.inputs = inputs or {}
+        self.template = template
+
+
+def _section_key(section, fingerprints):
+    payload = json.dumps([section.name, section.code_hash(), [fingerprints[i] for i in section.inputs],
+                          section.key() if section.key else None])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _state_name(report):
+    stem = os.path.splitext(os.path.basename(report.path))[0]
+    return f"{stem}_{hashlib.sha256(os.path.abspath(report.path).encode('utf-8')).hexdigest()[:8]}"
+
+
+def build_report(report, cache_dir=DEFAULT_CACHE_DIR, force=False):
+    """
+    Baut report.path, falls nötig.
+    Rückgabe: dict mit built (PDF neu gerendert), rebuilt / cached (Abschnittsnamen), path
+    """
+    name = _state_name(report)
+    state_path = os.path.join(cache_dir, name + ".json")
+    artefact_dir = os.path.join(cache_dir, "sections")
+
+    fingerprints = {key: source.fingerprint() for key, source in report.inputs.items()}
+    keys = {s.name: _section_key(s, fingerprints) for s in report.sections}
+
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+    if not force and os.path.exists(report.path) and state.get("sections") == keys \
+            and state.get("template") == report.template:
+        return {"built": False, "rebuilt": [], "cached": [], "path": report.path}
+
+    loaded = {}
+    def load(key):
+        if key not in loaded:
+            loaded[key] = report.inputs[key].load()
+        return loaded[key]
+
+    os.makedirs(artefact_dir, exist_ok=True)
+    story, rebuilt, cached = [], [], []
+    for section in report.sections:
+        artefact = os.path.join(artefact_dir, f"{name}.{section.name}.{keys[section.name][:16]}.pkl")
+        if section.cache and not force and os.path.exists(artefact):
+            with open(artefact, "rb") as f:
+                spec = pickle.load(f)
+            cached.append(section.name)
+        else:
+            spec = section.build(**{key: load(key) for key in section.inputs})
+            rebuilt.append(section.name)
+            if section.cache:
+                for stale in glob.glob(os.path.join(artefact_dir, glob.escape(f"{name}.{section.name}.") + "*.pkl")):
+                    os.remove(stale)
+                with open(artefact, "wb") as f:
+                    pickle.dump(spec, f, protocol=pickle.HIGHEST_PROTOCOL)
+        story.extend(spec)
+
+    render(story, report.path, report.template)
+
+    tmp = state_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"path": os.path.abspath(report.path), "template": report.template,
+                   "inputs": fingerprints, "sections": keys}, f, indent=2)
+    os.replace(tmp, state_path)
+    return {"built": True, "rebuilt": rebuilt, "cached": cached, "path": report.path}
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+Report Charts - Kursverlauf- und Portfolio-Charts für die PDF-Reports
+
+Charts werden aus dem Preis-Store (data/price_history) gezeichnet:
+- position_series / portfolio_value_series: Zeitreihen je Ticker bzw. Portfolio-Wert
+  (Cash + Shares x Preis, Bestände aus dem Trade Log) ab COMPETITION_START
+- render_charts(jobs): jeder Chart wird einmal gerendert und unter logs/chart_cache/
+  abgelegt; Schlüssel = (Ticker, Titel, Zeitraum, Style) + Datenpunkte. Fehlende Charts werden
+  auf einen Prozess-Pool verteilt (ein Ticker pro Aufgabe), wiederholte Builds laden sie
+  nur noch
+- Formate: "vector" (reportlab Drawing aus einfachen Shapes, gepickelt) oder "png"
+  (renderPM, braucht das rlPyCairo-Backend)
+- chart_section(history, trades_df): fertiger Report-Abschnitt für report_build
+
+Verwendung:
+    result = render_charts([{"name": "NVDA", "title": "NVDA", "points": points, "style": "position"}])
+    story.append(chart_item(result["charts"]["NVDA"], "position"))
+
+    python tools/report_charts.py portfolio_trades.csv     # Charts rendern/cachen
+
+Author: Investment Team
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from reportlab.graphics.shapes import Drawing, Rect, Line, PolyLine, Circle, String
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+
+from price_store import PriceStore, _to_utc
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_CACHE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs", "chart_cache"))
+CHART_VERSION = 1                # erhöhen, wenn sich das Zeichnen ändert (invalidiert den Cache)
+COMPETITION_START = "2025-10-24"  # Investment at start (data/stock worth.xlsx)
+Y_TICKS = 4
+
+CHART_STYLES = {
+    "position": {
+        "width_cm": 16, "height_cm": 3.6, "format": "vector", "dpi": 150,
+        "line": "#3498db", "grid": "#ecf0f1", "text": "#2c3e50", "font_size": 7,
+    },
+    "portfolio": {
+        "width_cm": 16, "height_cm": 6, "format": "vector", "dpi": 150,
+        "line": "#27ae60", "grid": "#ecf0f1", "text": "#2c3e50", "font_size": 8,
+    },
+}
+
+
+# -----------------------------
+# Zeitreihen
+# -----------------------------
+def _window(history, start=COMPETITION_START, end=None):
+    if start is not None:
+        history = history[history.index >= _to_utc(start)]
+    if end is not None:
+        history = history[history.index <= _to_utc(end)]
+    return history
+
+
+def position_series(history, ticker, start=COMPETITION_START, end=None):
+    """[(snapshot_ts, Price EUR)] eines Tickers aus store.history()"""
+    if ticker not in history.columns:
+        return []
+    series = _window(history, start, end)[ticker].dropna()
+    return list(zip(series.index, series.astype(float)))
+
+
+def holdings_at(trades_df, ts):
+    """(Cash, {Ticker: Shares}) nach allen Trades <= ts"""
+    trades = trades_df[pd.to_datetime(trades_df["date"], utc=True) <= ts]
+    if trades.empty:
+        first = trades_df.iloc[0]
+        cash = first["cash_after"] + (first["total"] if first["action"] == "BUY" else -first["total"])
+        return float(cash), {}
+    signed = trades["shares"].where(trades["action"] == "BUY", -trades["shares"])
+    shares = signed.groupby(trades["ticker"]).sum()
+    return float(trades["cash_after"].iloc[-1]), {t: float(s) for t, s in shares.items() if s > 0}
+
+
+def portfolio_value_series(history, trades_df, start=COMPETITION_START, end=None):
+    """[(snapshot_ts, Cash + Shares x Preis)]; fehlende Preise: letzter Snapshot, sonst Trade-Preis"""
+    if trades_df.empty:
+        return []
+    # Datum einmal parsen, Bestand je Ticker als kumulierte Summe nach jedem Trade
+    trades = trades_df.assign(_ts=pd.to_datetime(trades_df["date"], utc=True)).sort_values("_ts", kind="stable")
+    signed = trades["shares"].where(trades["action"] == "BUY", -trades["shares"])
+    held = (signed.groupby(trades["ticker"]).cumsum().to_frame("held").assign(ticker=trades["ticker"])
+            .pivot(columns="ticker", values="held").loc[trades.index].ffill().fillna(0.0).clip(lower=0.0))
+    first = trades.iloc[0]
+    initial_cash = first["cash_after"] + (first["total"] if first["action"] == "BUY" else -first["total"])
+    
+    # Zeile k = Stand nach den ersten k Trades (k = 0: vor dem ersten Trade)
+    cash = np.concatenate([[initial_cash], trades["cash_after"].to_numpy(dtype=np.float64)])
+    shares = np.vstack([np.zeros(held.shape[1]), held.to_numpy(dtype=np.float64)])
+    
+    last_trade_price = trades.groupby("ticker")["price"].last()
+    window = _window(history, start, end).index
+    prices = history.ffill().reindex(index=window, columns=held.columns).fillna(last_trade_price)
+    k = trades["_ts"].searchsorted(window, side="right")
+    values = cash[k] + (shares[k] * prices.to_numpy(dtype=np.float64)).sum(axis=1)
+    return list(zip(window, values.tolist()))
+
+
+# -----------------------------
+# Zeichnen
+# -----------------------------
+def _fmt_date(ts, with_time):
+    ts = pd.Timestamp(ts).tz_convert("Europe/Madrid")
+    return ts.strftime("%d.%m. %H:%M" if with_time else "%d.%m.%Y")
+
+
+def line_chart(title, points, style):
+    """Linien-Chart aus einfachen Shapes (picklebar, keine Widgets): Titel, Y-Gitter, Datums-Achse"""
+    width, height = style["width_cm"] * cm, style["height_cm"] * cm
+    size, text = style["font_size"], colors.HexColor(style["text"])
+    left, right, bottom, top = 1.6 * cm, 0.3 * cm, 0.5 * cm, size + 6
+    plot_w, plot_h = width - left - right, height - bottom - top
+
+    d = Drawing(width, height)
+    d.hAlign = "CENTER"
+    d.add(String(left, height - size, title, fontName="Helvetica-Bold", fontSize=size, fillColor=text))
+    if not points:
+        d.add(String(left, bottom + plot_h / 2, "Keine Preisdaten im Zeitraum", fontName="Helvetica",
+                     fontSize=size, fillColor=colors.grey))
+        return d
+
+    first, last = points[0][1], points[-1][1]
+    d.add(String(width - right, height - size, f"€{last:,.2f} ({(last / first - 1) * 100:+.2f}%)",
+                 fontName="Helvetica", fontSize=size, fillColor=text, textAnchor="end"))
+
+    values = [v for _, v in points]
+    low, high = min(values), max(values)
+    pad = (high - low) * 0.1 or abs(high) * 0.02 or 1.0
+    low, high = low - pad, high + pad
+    t0, t1 = points[0][0].value, points[-1][0].value
+
+    def x(ts):
+        return left + (plot_w / 2 if t1 == t0 else (ts.value - t0) / (t1 - t0) * plot_w)
+
+    def y(v):
+        return bottom + (v - low) / (high - low) * plot_h
+
+    grid = colors.HexColor(style["grid"])
+    for i in range(Y_TICKS + 1):
+        v = low + (high - low) * i / Y_TICKS
+        d.add(Line(left, y(v), left + plot_w, y(v), strokeColor=grid, strokeWidth=0.5))
+        d.add(String(left - 3, y(v) - size / 3, f"{v:,.2f}", fontName="Helvetica", fontSize=size - 1,
+                     fillColor=text, textAnchor="end"))
+    d.add(Rect(left, bottom, plot_w, plot_h, fillColor=None, strokeColor=colors.grey, strokeWidth=0.5))
+
+    with_time = points[0][0].normalize() == points[-1][0].normalize()
+    labels = [points[0][0]] if t1 == t0 else [points[0][0], points[-1][0]]
+    for ts, anchor in zip(labels, ["middle"] if t1 == t0 else ["start", "end"]):
+        d.add(String(x(ts), bottom - size - 2, _fmt_date(ts, with_time), fontName="Helvetica",
+                     fontSize=size - 1, fillColor=text, textAnchor=anchor))
+
+    line = colors.HexColor(style["line"])
+    if len(points) == 1:
+        d.add(Circle(x(points[0][0]), y(first), 2, fillColor=line, strokeColor=None))
+    else:
+        coords = [c for ts, v in points for c in (x(ts), y(v))]
+        d.add(PolyLine(coords, strokeColor=line, strokeWidth=1.2))
+    return d
+
+
+# -----------------------------
+# Cache + paralleles Rendern
+# -----------------------------
+def chart_key(name, title, points, style):
+    """
+    (Ticker, Titel, Zeitraum, Style) + Datenpunkte: nachträglich importierte Snapshots und ein
+    geänderter Titel (enthält die Stückzahl) invalidieren den Chart
+    """
+    date_range = [points[0][0].isoformat(), points[-1][0].isoformat()] if points else None
+    payload = json.dumps([CHART_VERSION, name, title, date_range, CHART_STYLES[style],
+                          [[ts.isoformat(), round(v, 6)] for ts, v in points]])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _chart_path(cache_dir, name, key, style):
+    ext = "png" if CHART_STYLES[style]["format"] == "png" else "pkl"
+    safe = "".join(c if c.isalnum() else "_" for c in name)
+    return os.path.join(cache_dir, f"{safe}.{style}.{key[:16]}.{ext}")
+
+
+def _render_chart(task):
+    path, title, points, style = task
+    spec = CHART_STYLES[style]
+    drawing = line_chart(title, points, spec)
+    tmp = path + ".tmp"
+    if spec["format"] == "png":
+        from reportlab.graphics import renderPM
+        renderPM.drawToFile(drawing, tmp, fmt="PNG", dpi=spec["dpi"])
+    else:
+        with open(tmp, "wb") as f:
+            pickle.dump(drawing, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)  # atomar: parallele Builds sehen nie eine halbe Datei
+    return path
+
+
+def render_charts(jobs, cache_dir=DEFAULT_CACHE_DIR, processes=None, force=False):
+    """
+    jobs: [{"name", "title", "points", "style"}]; nur Charts ohne Cache-Datei werden gerendert.
+    Rückgabe: dict mit charts ({name: Pfad}), rendered / cached (Namen)
+    """
+    charts, tasks, rendered, cached = {}, [], [], []
+    for job in jobs:
+        path = _chart_path(cache_dir, job["name"], chart_key(job["name"], job["title"], job["points"], job["style"]), job["style"])
+        charts[job["name"]] = path
+        if not force and os.path.exists(path):
+            cached.append(job["name"])
+            continue
+        tasks.append((path, job["title"], job["points"], job["style"]))
+        rendered.append(job["name"])
+
+    if tasks:
+        os.makedirs(cache_dir, exist_ok=True)
+        processes = min(processes or os.cpu_count() or 1, len(tasks))
+        if processes == 1:
+            for task in tasks:
+                _render_chart(task)
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                list(pool.map(_render_chart, tasks))
+    return {"charts": charts, "rendered": rendered, "cached": cached}
+
+
+def chart_item(path, style):
+    """Story-Element (report_render) für einen gecachten Chart"""
+    spec = CHART_STYLES[style]
+    if spec["format"] == "png":
+        return ("image", path, spec["width_cm"], spec["height_cm"])
+    return ("drawing", path)
+
+
+# -----------------------------
+# Report-Abschnitt
+# -----------------------------
+def chart_jobs(history, trades_df, start=COMPETITION_START, end=None):
+    """Portfolio-Wert + ein Chart pro gehaltener Position (Bestand am Ende des Trade Logs)"""
+    jobs = [{"name": "portfolio", "title": "Portfolio Value (EUR, Cash + Positionen)",
+             "points": portfolio_value_series(history, trades_df, start, end), "style": "portfolio"}]
+    if trades_df.empty:
+        return jobs
+    _, shares = holdings_at(trades_df, pd.to_datetime(trades_df["date"], utc=True).max())
+    for ticker in sorted(shares):
+        jobs.append({"name": ticker, "title": f"{ticker} - Price EUR ({shares[ticker]:g} Shares)",
+                     "points": position_series(history, ticker, start, end), "style": "position"})
+    return jobs
+
+
+def chart_section(history, trades_df, heading="heading", start=COMPETITION_START, end=None):
+    """Story-Spezifikation: Portfolio-Chart + Kursverlauf je Position"""
+    jobs = chart_jobs(history, trades_df, start, end)
+    charts = render_charts(jobs)["charts"]
+    first = jobs[0]["points"][0][0] if jobs[0]["points"] else _to_utc(start)
+    story = [("p", heading, "Portfolio &amp; Position Charts"),
+             ("p", "Normal", f"Price history store, {_fmt_date(first, False)} → "
+                             f"{_fmt_date(history.index.max(), False) if len(history) else '-'}"),
+             ("spacer", 0.2)]
+    for job in jobs:
+        story.append(chart_item(charts[job["name"]], job["style"]))
+        story.append(("spacer", 0.2))
+    return story
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio- und Positions-Charts aus dem Preis-Store rendern (gecacht)")
+    parser.add_argument("log", nargs="?", default="portfolio_trades.csv")
+    parser.add_argument("--start", default=COMPETITION_START)
+    parser.add_argument("--processes", type=int, default=None, help="Worker-Prozesse (Default: alle Kerne)")
+    parser.add_argument("--force", action="store_true", help="Charts neu rendern, Cache ignorieren")
+    args = parser.parse_args()
+
+    jobs = chart_jobs(PriceStore().history(), pd.read_csv(args.log), args.start)
+    result = render_charts(jobs, processes=args.processes, force=args.force)
+    print(f"✓ {len(result['rendered'])} Charts gerendert, {len(result['cached'])} aus dem Cache ({DEFAULT_CACHE_DIR})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Report Render - gemeinsame PDF-Schicht für alle Report-Generatoren
+
+generate_trade_pdf, generate_mid_competition_update und update_deliverable2_real_data
+teilen sich hier Styles, Seitenvorlagen und Tabellen-Presets:
+- Style Registry: getSampleStyleSheet() und alle ParagraphStyles werden einmal pro
+  Prozess gebaut (auch jede Override-Variante), Batch-Läufe zahlen das Setup nur einmal
+- Seitenvorlagen: Seitengrösse + Ränder (PAGE_TEMPLATES)
+- Tabellen-Presets: Header-Farbe, Body-Hintergrund, Schriftgrössen, Gitter (TABLE_PRESETS)
+- render(story_spec, path): Story-Spezifikation -> PDF
+- render_stream(items, path): wie render, aber aus einem Iterator (konstanter Speicher)
+
+Story-Spezifikation (Liste, Flowables werden unverändert übernommen):
+    ("p", style, text)                     # style: Registry-Name, (Name, {Overrides}) oder ParagraphStyle
+    ("spacer", height_cm)
+    ("table", data, col_widths_cm, preset) # preset: Name, (Name, [Kommandos]) oder TableStyle
+    ("longtable", data, col_widths_cm, preset)  # LongTable, Header-Zeile wird pro Seite wiederholt
+    ("drawing", path)                      # gepickeltes reportlab Drawing (report_charts.py)
+    ("image", path, width_cm, height_cm)   # Rasterbild, z.B. PNG
+    ("pagebreak",)
+Mit Namen/Tupeln statt Style-Objekten ist die Spezifikation reine Daten und lässt sich
+cachen (report_build.py).
+
+Verwendung:
+    render([
+        ("p", "title", "Mid-Competition Update"),
+        ("p", ("body", {"spaceAfter": 8}), "..."),
+        ("table", rows, [3, 2.5], "trade"),
+    ], "docs/report.pdf")
+
+Author: Investment Team
+"""
+
+import pickle
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle, PageBreak, Image
+
+STREAM_BUFFER = 4  # Story-Elemente, die render_stream() im Voraus baut
+
+# -----------------------------
+# Seitenvorlagen
+# -----------------------------
+PAGE_TEMPLATES = {
+    "a4": {
+        "pagesize": A4,
+        "topMargin": 2 * cm,
+        "bottomMargin": 2 * cm,
+        "leftMargin": 2.5 * cm,
+        "rightMargin": 2.5 * cm,
+    },
+}
+
+# -----------------------------
+# Paragraph Styles: Registry-Name -> (ParagraphStyle Name, Parent im Sample Stylesheet, Attribute)
+# -----------------------------
+STYLE_SPECS = {
+    "title": ("CustomTitle", "Heading1", {
+        "fontSize": 18,
+        "textColor": colors.HexColor('#1a1a1a'),
+        "spaceAfter": 30,
+        "alignment": TA_CENTER,
+        "fontName": 'Helvetica-Bold',
+    }),
+    "heading": ("CustomHeading", "Heading2", {
+        "fontSize": 14,
+        "textColor": colors.HexColor('#2c3e50'),
+        "spaceAfter": 12,
+        "spaceBefore": 20,
+        "fontName": 'Helvetica-Bold',
+    }),
+    "subheading": ("CustomSubHeading", "Heading3", {
+        "fontSize": 12,
+        "textColor": colors.HexColor('#34495e'),
+        "spaceAfter": 10,
+        "spaceBefore": 15,
+        "fontName": 'Helvetica-Bold',
+    }),
+    "body": ("CustomBody", "BodyText", {
+        "fontSize": 10,
+        "alignment": TA_JUSTIFY,
+        "spaceAfter": 12,
+        "leading": 14,
+    }),
+    "bullet": ("CustomBullet", "BodyText", {
+        "fontSize": 10,
+        "leftIndent": 20,
+        "spaceAfter": 6,
+        "leading": 14,
+        "bulletIndent": 10,
+    }),
+    "link": ("LinkStyle", "BodyText", {
+        "fontSize": 10,
+        "textColor": colors.blue,
+        "spaceAfter": 8,
+        "fontName": 'Courier',
+    }),
+}
+
+# -----------------------------
+# Tabellen-Presets
+# -----------------------------
+def _boxed(header, body, align='LEFT', header_size=11, body_size=10):
+    """Farbiger Header, einfarbiger Body, volles Gitter (Trade-Dokumente)"""
+    return [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), align),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_size),
+        ('FONTSIZE', (0, 1), (-1, -1), body_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), body),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]
+
+
+def _striped(header):
+    """Farbiger Header, abwechselnde Zeilenfarben, feines Gitter (Deliverable-Tabellen)"""
+    return [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#ecf0f1')]),
+    ]
+
+
+TABLE_PRESETS = {
+    "trade": _boxed('#3498db', colors.beige),
+    "compliance": _boxed('#27ae60', colors.lightgreen),
+    "totals": [  # wie "trade", letzte Zeile = fette Summenzeile
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#ecf0f1')),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ],
+    "striped": _striped('#3498db'),
+    "striped_green": _striped('#2ecc71'),
+}
+
+# -----------------------------
+# Prozessweite Registry
+# -----------------------------
+_sample = None
+_styles = {}
+_table_styles = {}
+
+
+def sample_styles():
+    """getSampleStyleSheet(), einmal pro Prozess"""
+    global _sample
+    if _sample is None:
+        _sample = getSampleStyleSheet()
+    return _sample
+
+
+def get_style(name, **overrides):
+    """
+    ParagraphStyle aus der Registry (STYLE_SPECS-Name oder Name im Sample Stylesheet,
+    z.B. 'Normal'). Jede Kombination aus Name + Overrides wird nur einmal gebaut.
+    """
+    key = (name, tuple(sorted(overrides.items())))
+    style = _styles.get(key)
+    if style is None:
+        if name in STYLE_SPECS:
+            style_name, parent, attributes = STYLE_SPECS[name]
+            style = ParagraphStyle(style_name, parent=sample_styles()[parent], **{**attributes, **overrides})
+        elif overrides:
+            style = ParagraphStyle(name, parent=sample_styles()[name], **overrides)
+        else:
+            style = sample_styles()[name]
+        _styles[key] = style
+    return style
+
+
+def table_style(preset, extra=()):
+    """TableStyle eines Presets; extra = zusätzliche Kommandos (z.B. Spalten-Ausrichtung)"""
+    if extra:
+        return TableStyle(TABLE_PRESETS[preset] + list(extra))
+    style = _table_styles.get(preset)
+    if style is None:
+        style = _table_styles[preset] = TableStyle(TABLE_PRESETS[preset])
+    return style
+
+
+# -----------------------------
+# Rendering
+# -----------------------------
+def build_story(story_spec):
+    """Story-Spezifikation -> Liste von Flowables"""
+    story = []
+    for item in story_spec:
+        if not isinstance(item, tuple):
+            story.append(item)
+            continue
+        kind, *args = item
+        if kind == "p":
+            style, text = args
+            if isinstance(style, str):
+                style = get_style(style)
+            elif isinstance(style, tuple):
+                style = get_style(style[0], **style[1])
+            story.append(Paragraph(text, style))
+        elif kind == "spacer":
+            story.append(Spacer(1, args[0] * cm))
+        elif kind in ("table", "longtable"):
+            data, col_widths, preset = args
+            if kind == "table":
+                table = Table(data, colWidths=[w * cm for w in col_widths])
+            else:
+                table = LongTable(data, colWidths=[w * cm for w in col_widths], repeatRows=1)
+            if isinstance(preset, str):
+                preset = table_style(preset)
+            elif isinstance(preset, tuple):
+                preset = table_style(*preset)
+            table.setStyle(preset)
+            story.append(table)
+        elif kind == "drawing":
+            with open(args[0], "rb") as f:
+                story.append(pickle.load(f))
+        elif kind == "image":
+            path, width, height = args
+            story.append(Image(path, width=width * cm, height=height * cm))
+        elif kind == "pagebreak":
+            story.append(PageBreak())
+        else:
+            raise ValueError(f"Unbekanntes Story-Element: {kind}")
+    return story
+
+
+def render(story_spec, path, template="a4"):
+    """Baut das PDF unter path (Seitenvorlage aus PAGE_TEMPLATES) und gibt path zurück"""
+    doc = SimpleDocTemplate(path, **PAGE_TEMPLATES[template])
+    doc.build(build_story(story_spec))
+    return path
+
+
+class _StreamingStory(list):
+    """
+    Story für doc.build(), die sich aus einem Iterator nachfüllt: build() fragt vor jedem
+    Flowable len()/[0] ab, daher liegen nie mehr als STREAM_BUFFER Elemente im Speicher.
+    """
+
+    def __init__(self, items, buffer=STREAM_BUFFER):
+        super().__init__()
+        self._items = iter(items)
+        self._buffer = buffer
+
+    def _fill(self):
+        while self._items is not None and list.__len__(self) < self._buffer:
+            try:
+                item = next(self._items)
+            except StopIteration:
+                self._items = None
+                break
+            self.extend(build_story([item]))
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def render_stream(items, path, template="a4", on_page=None):
+    """
+    Wie render(), aber items (Story-Elemente) werden erst beim Layout gebaut.
+    on_page(canvas, doc) wird zu Beginn jeder Seite aufgerufen (z.B. Fortschritt).
+    """
+    doc = SimpleDocTemplate(path, **PAGE_TEMPLATES[template])
+    callbacks = {"onFirstPage": on_page, "onLaterPages": on_page} if on_page else {}
+    doc.build(_StreamingStory(items), **callbacks)
+    return path
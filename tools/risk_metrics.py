@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Risk Metrics - historische Risikokennzahlen über die Preis-Historie
+
+Pro Ticker aus den gespeicherten Snapshots (PriceStore):
+- Rolling Volatility (annualisiert)
+- Beta gegen die ETFs im Universum (VWCE.DE, EQQQ.DE)
+- Historischer VaR / CVaR (95%)
+- Max Drawdown / aktueller Drawdown
+- Korrelationsmatrix
+
+Das Rolling-Fenster wird inkrementell aktualisiert: jeder neue Snapshot addiert seine
+Returns zu den laufenden Summen und das herausfallende Bar wird abgezogen - die
+Historie wird nicht neu durchgerechnet. Der Zustand liegt in data/risk_state.npz,
+beim nächsten Lauf werden nur die neuen Snapshots eingelesen. Taucht ein älterer
+Snapshot nachträglich auf (price_getter --start/--end), wird neu aufgebaut.
+
+Verwendung:
+    monitor = load_risk_monitor()         # Zustand laden + neue Snapshots anwenden
+    monitor.summary()                     # DataFrame pro Ticker
+    monitor.risk_level("NVDA")            # LOW / MEDIUM / HIGH
+
+    python tools/risk_metrics.py
+
+Author: Investment Team
+"""
+
+import hashlib
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_STATE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "risk_state.npz"))
+BENCHMARKS = ["VWCE.DE", "EQQQ.DE"]
+DEFAULT_WINDOW = 20           # Bars im Rolling-Fenster
+PERIODS_PER_YEAR = 252        # Annualisierung (ein Snapshot pro Handelstag)
+VAR_CONFIDENCE = 0.95
+MIN_OBSERVATIONS = 10         # darunter kein Risk Level (MEDIUM)
+
+# Risk Level nach annualisierter Volatilität
+RISK_LEVELS = [(0.25, "LOW"), (0.45, "MEDIUM")]  # darüber: HIGH
+
+
+# -----------------------------
+# RiskMonitor Klasse
+# -----------------------------
+class RiskMonitor:
+    def __init__(self, tickers, window=DEFAULT_WINDOW, benchmarks=BENCHMARKS):
+        self.tickers = list(tickers)
+        self.index = {t: i for i, t in enumerate(self.tickers)}
+        self.window = window
+        self.benchmarks = [b for b in benchmarks if b in self.index]
+        k = len(self.tickers)
+
+        self.buffer = np.full((window, k), np.nan)  # Ring-Buffer der Log-Returns
+        self.pos = 0
+        self.n_bars = 0
+        self.last_prices = np.full(k, np.nan)
+        self.last_ts = None
+        self.snapshot_digest = ""  # Hash der angewendeten Snapshot-Zeitpunkte (load_risk_monitor)
+        self.peak = np.full(k, np.nan)
+        self.max_drawdown = np.zeros(k)
+        self._reset_sums()
+
+    def _reset_sums(self):
+        k = len(self.tickers)
+        self.s_xy = np.zeros((k, k))   # Summe x_i * x_j (beide vorhanden)
+        self.s_x = np.zeros((k, k))    # Summe x_i, wo auch j vorhanden
+        self.n = np.zeros((k, k))      # Anzahl gemeinsamer Beobachtungen
+
+    def _accumulate(self, row, sign):
+        valid = ~np.isnan(row)
+        x = np.where(valid, row, 0.0)
+        self.s_xy += sign * np.outer(x, x)
+        self.s_x += sign * np.outer(x, valid)
+        self.n += sign * np.outer(valid, valid)
+
+    def update(self, prices, ts=None):
+        """
+        Neuer Snapshot: prices = {ticker: Price EUR} oder Array in Ticker-Reihenfolge.
+        O(k²) pro Snapshot, unabhängig von der Länge der Historie.
+        """
+        if isinstance(prices, dict):
+            prices = np.array([prices.get(t, np.nan) for t in self.tickers], dtype=np.float64)
+        else:
+            prices = np.asarray(prices, dtype=np.float64)
+
+        # Drawdown über die gesamte Historie (laufendes Hoch)
+        self.peak = np.fmax(self.peak, prices)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            drawdown = prices / self.peak - 1
+        self.max_drawdown = np.fmin(self.max_drawdown, drawdown)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns = np.log(prices / self.last_prices)
+        self.last_prices = np.where(np.isnan(prices), self.last_prices, prices)
+        self.last_ts = ts if ts is not None else self.last_ts
+        self.n_bars += 1
+        if self.n_bars == 1:
+            return
+
+        self._accumulate(self.buffer[self.pos], -1)  # herausfallendes Bar
+        self.buffer[self.pos] = returns
+        self._accumulate(returns, +1)
+        self.pos = (self.pos + 1) % self.window
+
+    def update_from_history(self, history):
+        """Wendet alle Zeilen einer Historie (Zeitpunkte x Ticker) nach last_ts an"""
+        if self.last_ts is not None:
+            history = history[history.index > self.last_ts]
+        values = history.reindex(columns=self.tickers).to_numpy(dtype=np.float64)
+        for ts, row in zip(history.index, values):
+            self.update(row, ts)
+        return len(history)
+
+    # -----------------------------
+    # Kennzahlen
+    # -----------------------------
+    def covariance(self):
+        """Paarweise Kovarianz der Log-Returns im Fenster"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = (self.s_xy - self.s_x * self.s_x.T / self.n) / (self.n - 1)
+        return np.where(self.n >= 2, cov, np.nan)
+
+    def volatility(self):
+        """Annualisierte Volatilität je Ticker"""
+        return np.sqrt(np.diag(self.covariance()) * PERIODS_PER_YEAR)
+
+    def beta(self, benchmark):
+        cov = self.covariance()
+        b = self.index[benchmark]
+        return cov[:, b] / cov[b, b]
+
+    def correlation(self):
+        cov = self.covariance()
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.tickers, columns=self.tickers)
+
+    def var_cvar(self, confidence=VAR_CONFIDENCE):
+        """Historischer VaR / CVaR pro Bar (positive Verlustzahlen, einfache Returns)"""
+        returns = np.expm1(self.buffer)
+        with warnings.catch_warnings(), np.errstate(invalid="ignore"):
+            warnings.simplefilter("ignore", RuntimeWarning)  # Ticker ohne Returns -> NaN
+            var = -np.nanquantile(returns, 1 - confidence, axis=0)
+            tail = np.where(returns <= -var, returns, np.nan)
+            counts = (~np.isnan(tail)).sum(axis=0)
+            cvar = np.where(counts > 0, -np.nansum(tail, axis=0) / np.maximum(counts, 1), np.nan)
+        return var, cvar
+
+    def observations(self):
+        return np.diag(self.n).astype(int)
+
+    def summary(self):
+        """Kennzahlen pro Ticker als DataFrame"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            current_dd = self.last_prices / self.peak - 1
+            var, cvar = self.var_cvar()
+            data = {
+                "observations": self.observations(),
+                "volatility": self.volatility(),
+                **{f"beta_{b}": self.beta(b) for b in self.benchmarks},
+                "var_95": var,
+                "cvar_95": cvar,
+                "max_drawdown": self.max_drawdown,
+                "drawdown": current_dd,
+            }
+        df = pd.DataFrame(data, index=pd.Index(self.tickers, name="Ticker"))
+        df["risk_level"] = [self.risk_level(t) for t in self.tickers]
+        return df
+
+    def risk_level(self, ticker):
+        """LOW / MEDIUM / HIGH nach Rolling-Volatilität (MEDIUM bei zu wenig Historie)"""
+        i = self.index.get(ticker)
+        if i is None or self.n[i, i] < MIN_OBSERVATIONS:
+            return "MEDIUM"
+        vol = np.sqrt(self.covariance()[i, i] * PERIODS_PER_YEAR)
+        for limit, level in RISK_LEVELS:
+            if vol < limit:
+                return level
+        return "HIGH"
+
+    # -----------------------------
+    # Zustand speichern/laden
+    # -----------------------------
+    def save(self, path=DEFAULT_STATE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, tickers=np.array(self.tickers), window=self.window, buffer=self.buffer,
+                 pos=self.pos, n_bars=self.n_bars, last_prices=self.last_prices,
+                 last_ts=np.int64(-1 if self.last_ts is None else pd.Timestamp(self.last_ts).value),
+                 peak=self.peak, max_drawdown=self.max_drawdown, snapshot_digest=np.array(self.snapshot_digest))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_STATE_PATH, benchmarks=BENCHMARKS):
+        with np.load(path) as state:
+            monitor = cls(state["tickers"].tolist(), int(state["window"]), benchmarks)
+            monitor.buffer = state["buffer"]
+            monitor.pos = int(state["pos"])
+            monitor.n_bars = int(state["n_bars"])
+            monitor.last_prices = state["last_prices"]
+            monitor.last_ts = None if int(state["last_ts"]) < 0 else pd.Timestamp(int(state["last_ts"]), tz="UTC")
+            monitor.peak = state["peak"]
+            monitor.max_drawdown = state["max_drawdown"]
+            monitor.snapshot_digest = str(state["snapshot_digest"])
+        # Summen aus dem Fenster neu aufbauen (keine Rundungsfehler-Akkumulation über Läufe)
+        for row in monitor.buffer:
+            monitor._accumulate(row, +1)
+        return monitor
+
+
+def _snapshot_digest(snapshots):
+    """Hash über Anzahl und Zeitpunkte der Snapshots"""
+    payload = f"{len(snapshots)}:" + ",".join(str(pd.Timestamp(s).value) for s in snapshots)
+    return hashlib.sha256(payload.encode("ascii")).hexdigest()
+
+
+def load_risk_monitor(store=None, path=DEFAULT_STATE_PATH, window=DEFAULT_WINDOW, save=True):
+    """
+    RiskMonitor mit allen Snapshots des PriceStore. Gespeicherter Zustand wird
+    weiterverwendet; nur Snapshots nach dessen letztem Zeitpunkt werden angewendet.
+    Wurden Snapshots vor diesem Zeitpunkt nachträglich importiert, wird neu aufgebaut.
+    """
+    from price_store import PriceStore
+    store = store or PriceStore()
+    snapshots = store.snapshots()
+
+    monitor = None
+    if os.path.exists(path):
+        try:
+            monitor = RiskMonitor.load(path)
+        except (OSError, KeyError, ValueError):
+            monitor = None
+    if monitor is not None and monitor.last_ts is not None:
+        applied = [s for s in snapshots if s <= monitor.last_ts]
+        if _snapshot_digest(applied) != monitor.snapshot_digest:
+            monitor = None  # Backfill älterer Snapshots -> neu aufbauen
+
+    new = store.history(since=monitor.last_ts if monitor else None)
+    if monitor is not None and (monitor.window != window or not set(new.columns) <= set(monitor.tickers)):
+        monitor = None  # neue Ticker im Universum -> neu aufbauen
+        new = store.history()
+    if monitor is None:
+        monitor = RiskMonitor(new.columns, window=window)
+
+    changed = monitor.update_from_history(new)
+    monitor.snapshot_digest = _snapshot_digest(snapshots)
+    if changed and save:
+        monitor.save(path)
+    return monitor
+
+
+def main():
+    monitor = load_risk_monitor()
+    if not monitor.tickers:
+        print("✗ Keine Preis-Historie gefunden. Bitte zuerst price_getter ausführen!")
+        return
+
+    pd.set_option("display.width", 160)
+    print("=" * 80)
+    print(f"RISK METRICS: {monitor.n_bars} Snapshots, Fenster {monitor.window} Bars")
+    print("=" * 80)
+    print(monitor.summary().round(4).to_string())
+    if monitor.n_bars < MIN_OBSERVATIONS + 1:
+        print(f"\n⚠ Zu wenig Historie für Risk Levels (min {MIN_OBSERVATIONS} Returns) - Default MEDIUM")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,59 +10,71 @@ Dieses Skript unterstützt den Tier 2 Multi-Agent Workflow:
 Verwendung:
     python trade_assistant.py --ticker NVDA --action analyze
     python trade_assistant.py --ticker NVDA --action recommend
+
+Läuft assistant_server.py, beantwortet der Server recommend/scan aus seinem warmen
+Zustand (Portfolio, Preise, Risk Monitor, Agent Cache); sonst und mit --no-server
+läuft alles im eigenen Prozess.
+
+Der Server-Pfad importiert nur die Standardbibliothek; pandas, Preis-Store, Portfolio
+Manager und Agent Pipeline werden erst im In-Process-Pfad geladen.
 """
 
-import pandas as pd
 import json
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
 from datetime import datetime
 import argparse
 
-# Import portfolio manager
-from portfolio_manager import Portfolio, TARGET_ALLOCATION, MAX_POSITION_SIZE
+MIN_CONVICTION = 7.0  # AI Conviction ab der ein Kauf-Argument zählt (Skala 1-10)
+
+# Agent-Prompts und Modelle (Teil des Cache-Schlüssels: Änderung = neue Antworten)
+RESEARCH_PROMPT = "Analyze {name} ({ticker}) fundamentals, growth prospects, and risks in {sector} sector"
+RESEARCH_MODEL = "Gemini Advanced"
+VALIDATION_PROMPT = "Cross-check price, sector, earnings and analyst claims for {ticker} against Yahoo Finance"
+VALIDATION_MODEL = "ChatGPT-4"
+
+# assistant_server.py (localhost); nicht erreichbar -> Ausführung im eigenen Prozess
+ASSISTANT_SERVER_URL = os.environ.get("TRADE_ASSISTANT_URL", "http://127.0.0.1:8765")
+SERVER_TIMEOUT = 30.0  # Sekunden; Verbindungsaufbau schlägt ohne Server sofort fehl
+TRADE_LOG = "portfolio_trades.csv"
+# wie price_store.DEFAULT_STORE_PATH (ohne pandas/pyarrow für den Server-Pfad zu importieren)
+STORE_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "price_history"))
+
+def load_current_portfolio(validate=False, log_path=TRADE_LOG, echo=print):
+    """Lade aktuelles Portfolio aus Trade History (echo: Ausgabe der Meldungen)"""
+    import pandas as pd
+    from portfolio_manager import Portfolio, load_portfolio_incremental, validate_trade_log
 
-def load_current_portfolio():
-    """Lade aktuelles Portfolio aus Trade History"""
     try:
-        trades_df = pd.read_csv("portfolio_trades.csv")
-        portfolio = Portfolio()
+        # Checkpoint + nur neu angehängte Trades (Full-Replay nur wenn das Log umgeschrieben wurde)
+        portfolio = load_portfolio_incremental(log_path)
         
-        # Replay alle Trades
-        for _, trade in trades_df.iterrows():
-            date = pd.to_datetime(trade["date"])
-            if trade["action"] == "BUY":
-                portfolio.buy(
-                    trade["ticker"],
-                    trade["shares"],
-                    trade["price"],
-                    date,
-                    trade["reason"],
-                    trade["ai_model"]
-                )
-            elif trade["action"] == "SELL":
-                portfolio.sell(
-                    trade["ticker"],
-                    trade["shares"],
-                    trade["price"],
-                    date,
-                    trade["reason"],
-                    trade["ai_model"]
-                )
+        if validate:
+            violations = validate_trade_log(pd.read_csv(log_path))
+            if violations.empty:
+                echo("✓ Trade Log: keine Regelverstöße")
+            else:
+                echo(f"⚠ Trade Log: {len(violations)} Regelverstöße")
+                for v in violations.itertuples():
+                    echo(f"  Zeile {v.row}: {v.date} {v.action} {v.ticker} - {v.message}")
         
         return portfolio
     except FileNotFoundError:
-        print("⚠ Keine Trade History gefunden. Erstelle neues Portfolio.")
+        echo("⚠ Keine Trade History gefunden. Erstelle neues Portfolio.")
         return Portfolio()
 
-def load_current_prices():
+def load_current_prices(echo=print):
     """Lade aktuelle Preise"""
-    try:
-        df = pd.read_csv("prices_2025-11-04_1615_Europe-Madrid.csv")
-        return {row["Ticker"]: row["Price EUR"] for _, row in df.iterrows() if not pd.isna(row["Price EUR"])}
-    except FileNotFoundError:
-        print("✗ Keine Preisdaten gefunden. Bitte zuerst price_getter ausführen!")
-        return {}
+    from market_data import load_market_data
+
+    prices = load_market_data().prices
+    if not prices:
+        echo("✗ Keine Preisdaten gefunden. Bitte zuerst price_getter ausführen!")
+    return prices
 
-def analyze_stock(ticker, prices_df):
+def analyze_stock(ticker, market):
     """
     Agent 1 Input: Grundlegende Stock-Analyse
     
@@ -71,13 +83,13 @@ def analyze_stock(ticker, prices_df):
     - "Compare {ticker} valuation to sector peers"
     - "Identify key risks for {ticker} in current market environment"
     """
-    stock_info = prices_df[prices_df["Ticker"] == ticker]
+    from market_data import as_market_data
+
+    info = as_market_data(market).row(ticker)  # O(1) Lookup im ticker-indizierten Snapshot
     
-    if stock_info.empty:
+    if info is None:
         return {"error": f"Ticker {ticker} nicht gefunden"}
     
-    info = stock_info.iloc[0]
-    
     analysis = {
         "ticker": ticker,
         "name": info["Name"],
@@ -89,8 +101,8 @@ def analyze_stock(ticker, prices_df):
         
         # Placeholder für AI-generierte Insights
         "ai_research": {
-            "prompt": f"Analyze {info['Name']} ({ticker}) fundamentals, growth prospects, and risks in {info['Sector']} sector",
-            "model": "Gemini Advanced",
+            "prompt": RESEARCH_PROMPT.format(name=info["Name"], ticker=ticker, sector=info["Sector"]),
+            "model": RESEARCH_MODEL,
             "insights": [
                 f"[AI PLACEHOLDER] {info['Name']} is a leader in {info['Sector']}",
                 f"[AI PLACEHOLDER] Current valuation at €{info['Price EUR']:.2f}",
@@ -116,7 +128,7 @@ def validate_analysis(analysis):
     """
     validation = {
         "ticker": analysis["ticker"],
-        "validation_model": "ChatGPT-4",
+        "validation_model": VALIDATION_MODEL,
         "checks": [
             {
                 "claim": f"Current price: €{analysis['current_price_eur']:.2f}",
@@ -140,7 +152,29 @@ def validate_analysis(analysis):
     
     return validation
 
-def make_recommendation(ticker, portfolio, prices, analysis, validation):
+def _snapshot_key(price_ts, price_eur, fx_ts=None):
+    """
+    Cache-Snapshot: Kerzen-Zeitstempel allein reicht nicht - HK/JP-Kerzen bleiben über
+    mehrere Store-Snapshots gleich, während FX und damit Price EUR sich bewegen
+    """
+    return f"{price_ts}|{fx_ts}|{price_eur!r}"
+
+def research_cache_key(ticker, market):
+    """(ticker, snapshot, prompt, model) für den Agent Cache - Snapshot = Preis-TS, FX-TS und Price EUR"""
+    from market_data import as_market_data
+
+    info = as_market_data(market).row(ticker)
+    snapshot = _snapshot_key(info["Price TS (local)"], info["Price EUR"], info["FX TS (local)"]) if info else None
+    return ticker, snapshot, RESEARCH_PROMPT, RESEARCH_MODEL
+
+def validation_cache_key(analysis):
+    snapshot = _snapshot_key(analysis["price_timestamp"], analysis["current_price_eur"])
+    return analysis["ticker"], snapshot, VALIDATION_PROMPT, VALIDATION_MODEL
+
+def make_recommendation(ticker, portfolio, prices, analysis, validation,
+                        stop_loss_threshold=None, max_position_size=None,
+                        target_allocation=None, min_conviction=MIN_CONVICTION,
+                        risk_monitor=None, ticker_regions=None):
     """
     Agent 3: Portfolio Decision Maker
     
@@ -149,7 +183,17 @@ def make_recommendation(ticker, portfolio, prices, analysis, validation):
     - Current portfolio state
     - Risk management rules
     - Allocation targets
+    
+    Die Schwellwerte sind überschreibbar (None = Konstanten aus portfolio_manager), z.B. für param_sweep.py.
+    risk_monitor (risk_metrics.RiskMonitor) liefert das Risk Level aus der Preis-Historie.
+    ticker_regions: {ticker: region} für alle gehaltenen Ticker (None = neuester Snapshot, market.regions).
     """
+    from portfolio_manager import TARGET_ALLOCATION, MAX_POSITION_SIZE, MAX_POSITIONS, STOP_LOSS_THRESHOLD
+    from position_sizing import optimise_shares
+
+    stop_loss_threshold = STOP_LOSS_THRESHOLD if stop_loss_threshold is None else stop_loss_threshold
+    max_position_size = MAX_POSITION_SIZE if max_position_size is None else max_position_size
+    target_allocation = TARGET_ALLOCATION if target_allocation is None else target_allocation
     current_price = prices.get(ticker)
     
     if current_price is None:
@@ -158,17 +202,18 @@ def make_recommendation(ticker, portfolio, prices, analysis, validation):
     # Check if already in portfolio
     in_portfolio = ticker in portfolio.positions
     
-    # Regional allocation check
+    # Regional allocation check (Regionen aller Positionen; get_allocation verändert das Portfolio nicht)
     ticker_region = analysis["region"]
-    all_prices = prices
-    ticker_regions = {ticker: analysis["region"]}  # Simplified
-    current_allocation = portfolio.get_allocation(all_prices, ticker_regions)
-    target_allocation = TARGET_ALLOCATION.get(ticker_region, 0) * 100
+    if ticker_regions is None:
+        from market_data import load_market_data
+        ticker_regions = load_market_data().regions
+    current_allocation = portfolio.get_allocation(prices, ticker_regions)
+    target_region_pct = target_allocation.get(ticker_region, 0) * 100
     
-    # Position size calculation
+    # Position size calculation: Obergrenze aus Positionsgröße und Cash, Stückzahl aus position_sizing
     portfolio_value = portfolio.get_portfolio_value(prices)
-    max_investment = portfolio_value * MAX_POSITION_SIZE
-    max_shares = int(max_investment / current_price) if current_price > 0 else 0
+    max_investment = min(portfolio.cash, portfolio_value * max_position_size)
+    max_shares = int(max_investment // current_price) if current_price > 0 else 0
     
     recommendation = {
         "ticker": ticker,
@@ -176,7 +221,7 @@ def make_recommendation(ticker, portfolio, prices, analysis, validation):
         "shares": 0,
         "price_eur": current_price,
         "rationale": [],
-        "risk_level": "MEDIUM",
+        "risk_level": risk_monitor.risk_level(ticker) if risk_monitor else "MEDIUM",
         "priority": 5,  # 1-10
         "model": "Claude",
     }
@@ -187,7 +232,7 @@ def make_recommendation(ticker, portfolio, prices, analysis, validation):
         position = portfolio.positions[ticker]
         loss_pct = (current_price - position["avg_price"]) / position["avg_price"]
         
-        if loss_pct <= -0.08:  # -8% stop-loss
+        if loss_pct <= stop_loss_threshold:  # -8% stop-loss
             recommendation["action"] = "SELL"
             recommendation["shares"] = position["shares"]
             recommendation["rationale"].append(f"STOP-LOSS triggered: {loss_pct*100:.1f}% loss")
@@ -200,35 +245,42 @@ def make_recommendation(ticker, portfolio, prices, analysis, validation):
         reasons = []
         
         # Check 1: Portfolio has room
-        if len(portfolio.positions) >= 15:
+        if len(portfolio.positions) >= MAX_POSITIONS:
             recommendation["action"] = "PASS"
-            recommendation["rationale"].append("Portfolio at max positions (15/15)")
+            recommendation["rationale"].append(f"Portfolio at max positions ({MAX_POSITIONS}/{MAX_POSITIONS})")
             return recommendation
         
-        # Check 2: Cash available
-        total_cost = max_shares * current_price
-        if total_cost > portfolio.cash:
+        # Check 2: Cash available (mindestens eine Aktie innerhalb der Positionsgröße)
+        if max_shares < 1:
             recommendation["action"] = "PASS"
-            recommendation["rationale"].append(f"Insufficient cash: €{portfolio.cash:.2f} < €{total_cost:.2f}")
+            recommendation["rationale"].append(f"Insufficient cash: €{max_investment:.2f} < €{current_price:.2f}")
             return recommendation
         
         # Check 3: Regional allocation
-        if current_allocation.get(ticker_region, 0) < target_allocation:
-            reasons.append(f"Improves {ticker_region} allocation ({current_allocation.get(ticker_region, 0):.1f}% → target {target_allocation:.1f}%)")
+        if current_allocation.get(ticker_region, 0) < target_region_pct:
+            reasons.append(f"Improves {ticker_region} allocation ({current_allocation.get(ticker_region, 0):.1f}% → target {target_region_pct:.1f}%)")
         
         # Check 4: AI conviction
-        if analysis["ai_research"]["conviction"] >= 7.0:
+        if analysis["ai_research"]["conviction"] >= min_conviction:
             reasons.append(f"High AI conviction score: {analysis['ai_research']['conviction']}/10")
         
         # Check 5: Validation passed
         if validation["validation_status"] == "PASSED":
             reasons.append("All fact validations passed")
         
-        if len(reasons) >= 2:
+        # Sizing wie analyze_buy_opportunities: Rest-Cash + Abweichung zur Zielallokation minimieren
+        region_gap = (target_region_pct - current_allocation.get(ticker_region, 0)) / 100 * portfolio_value
+        shares = int(optimise_shares([current_price], [ticker_region], [max_shares], portfolio.cash,
+                                     {ticker_region: region_gap})[0])
+        
+        if len(reasons) >= 2 and shares > 0:
             recommendation["action"] = "BUY"
-            recommendation["shares"] = max(1, max_shares // 2)  # Conservative sizing
+            recommendation["shares"] = shares
             recommendation["rationale"] = reasons
             recommendation["priority"] = 7
+        elif len(reasons) >= 2:
+            recommendation["action"] = "HOLD"
+            recommendation["rationale"] = reasons + [f"{ticker_region} already at target allocation - no shares sized"]
         else:
             recommendation["action"] = "HOLD"
             recommendation["rationale"].append("Insufficient conviction criteria met")
@@ -273,76 +325,193 @@ def print_recommendation(analysis, validation, recommendation):
     
     print("\n" + "=" * 80)
 
+def build_agents(cache=None, agent_backend="local", stub_latency=1.0):
+    """Agent 1 + 2 für die Pipeline (optional hinter dem Agent Cache)"""
+    from agent_pipeline import LocalAgent, StubAgent, CachedAgent
+
+    if agent_backend == "stub":
+        research = StubAgent(analyze_stock, latency=stub_latency)
+        validation = StubAgent(validate_analysis, latency=stub_latency)
+    else:
+        research, validation = LocalAgent(analyze_stock), LocalAgent(validate_analysis)
+    if cache:
+        research = CachedAgent(research, cache, research_cache_key)
+        validation = CachedAgent(validation, cache, validation_cache_key)
+    return research, validation
+
+def run_scan(portfolio, prices, market, risk_monitor=None, cache=None, agent_backend="local",
+             concurrency=None, stub_latency=1.0):
+    """Alle Ticker durch die Agent Pipeline. Rückgabe: (results, pipeline.stats)"""
+    from agent_pipeline import AgentPipeline, DEFAULT_CONCURRENCY
+    from market_data import as_market_data
+
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    research, validation = build_agents(cache, agent_backend, stub_latency)
+    pipeline = AgentPipeline(research, validation, make_recommendation, concurrency=concurrency)
+    results = pipeline.scan(prices.keys(), portfolio, prices, market, risk_monitor=risk_monitor,
+                            ticker_regions=as_market_data(market).regions)
+    return results, pipeline.stats
+
+def scan_opportunities(results):
+    """BUY-Empfehlungen mit Priority >= 6 aus den Scan-Ergebnissen"""
+    opportunities = []
+    for result in results:
+        if "error" in result:
+            continue
+        analysis, recommendation = result["analysis"], result["recommendation"]
+        
+        if recommendation["action"] == "BUY" and recommendation["priority"] >= 6:
+            opportunities.append({
+                "ticker": result["ticker"],
+                "name": analysis["name"],
+                "action": recommendation["action"],
+                "priority": recommendation["priority"],
+                "shares": recommendation["shares"],
+                "cost": recommendation["shares"] * recommendation["price_eur"]
+            })
+    return opportunities
+
+def run_recommend(ticker, portfolio, prices, market, risk_monitor=None, cache=None):
+    """Agent 1-3 für einen Ticker. Rückgabe: dict mit analysis, validation, recommendation - oder error"""
+    from agent_pipeline import AgentPipeline
+    from market_data import as_market_data
+
+    research, validation = build_agents(cache)
+    pipeline = AgentPipeline(research, validation, make_recommendation, concurrency=1)
+    result = pipeline.scan([ticker], portfolio, prices, market, risk_monitor=risk_monitor,
+                           ticker_regions=as_market_data(market).regions)[0]
+    if "error" in result:
+        return {"error": result["error"]}
+    return {key: result[key] for key in ("analysis", "validation", "recommendation")}
+
+def print_scan_header():
+    print("\n" + "=" * 80)
+    print("SCANNING ALL STOCKS FOR OPPORTUNITIES")
+    print("=" * 80)
+
+def print_opportunities(opportunities):
+    """Tabelle ohne pandas (läuft auch im Thin Client mit Server-Antwort)"""
+    if opportunities:
+        columns = ["ticker", "name", "action", "priority", "shares", "cost"]
+        rows = [[str(o["ticker"]), str(o["name"]), str(o["action"]), str(o["priority"]),
+                 str(o["shares"]), f"{o['cost']:.2f}"]
+                for o in sorted(opportunities, key=lambda o: -o["priority"])]
+        widths = [max(len(c), *(len(r[i]) for r in rows)) for i, c in enumerate(columns)]
+        print("\n🎯 TOP OPPORTUNITIES:")
+        for line in [columns] + rows:
+            print("  ".join(cell.rjust(w) for cell, w in zip(line, widths)))
+    else:
+        print("\n⚠ No high-priority opportunities found")
+
+def export_decision(ticker, decision):
+    """Ausgabe + JSON-Export für die Documentation"""
+    if "error" in decision:
+        print(f"✗ Error: {decision['error']}")
+        return None
+    
+    print_recommendation(decision["analysis"], decision["validation"], decision["recommendation"])
+    
+    export = {
+        "timestamp": datetime.now().isoformat(),
+        "analysis": decision["analysis"],
+        "validation": decision["validation"],
+        "recommendation": decision["recommendation"],
+    }
+    
+    filename = f"trade_decision_{ticker}_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(filename, "w") as f:
+        json.dump(export, f, indent=2)
+    
+    print(f"\n✓ Decision exported: {filename}")
+    return filename
+
+def query_server(endpoint, url=ASSISTANT_SERVER_URL, timeout=SERVER_TIMEOUT, **params):
+    """
+    Anfrage an assistant_server.py. Rückgabe: Antwort-dict oder None (kein Server,
+    Fehler, oder Server arbeitet mit einem anderen Trade Log / Preis-Store).
+    """
+    params.update(log=os.path.abspath(TRADE_LOG), store=STORE_PATH)
+    query = urllib.parse.urlencode(params)
+    try:
+        with urllib.request.urlopen(f"{url}/{endpoint}?{query}", timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except (OSError, ValueError):  # URLError/HTTPError/Timeout sind OSError
+        return None
+
 def main():
     parser = argparse.ArgumentParser(description="Trade Decision Assistant")
     parser.add_argument("--ticker", type=str, help="Stock ticker symbol")
     parser.add_argument("--action", type=str, choices=["analyze", "recommend", "scan"], 
                        default="recommend", help="Action to perform")
+    parser.add_argument("--validate-log", action="store_true",
+                       help="Trade Log beim Laden gegen die Competition-Regeln prüfen")
+    parser.add_argument("--agent-backend", choices=["local", "stub"], default="local",
+                       help="Agent-Backend für den Scan (stub = simulierte Latenz, offline)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                       help="Max. gleichzeitige Agent-Aufrufe im Scan (Default: agent_pipeline.DEFAULT_CONCURRENCY)")
+    parser.add_argument("--stub-latency", type=float, default=1.0,
+                       help="Latenz des Stub-Backends in Sekunden")
+    parser.add_argument("--no-agent-cache", action="store_true",
+                       help="Research/Validation immer neu berechnen (logs/agent_cache.sqlite ignorieren)")
+    parser.add_argument("--cache-stats", action="store_true",
+                       help="Hit/Miss-Zähler des Agent Cache ausgeben")
+    parser.add_argument("--no-server", action="store_true",
+                       help="assistant_server.py nicht verwenden, immer im eigenen Prozess rechnen")
     
     args = parser.parse_args()
     
+    # Thin Client: der Server rechnet mit Default-Optionen; alles andere läuft lokal
+    use_server = not (args.no_server or args.validate_log or args.no_agent_cache or args.cache_stats
+                      or args.agent_backend != "local" or args.concurrency is not None)
+    if use_server and (args.action == "scan" or args.ticker):
+        if args.action == "scan":
+            response = query_server("scan")
+        else:
+            response = query_server("recommend", ticker=args.ticker)
+        if response is not None:
+            for message in response["messages"]:
+                print(message)
+            if args.action == "scan":
+                print_scan_header()
+                print_opportunities(response["opportunities"])
+            else:
+                export_decision(args.ticker, response)
+            return
+    
+    # In-Process: erst hier die schweren Module laden
+    from market_data import load_market_data
+    from risk_metrics import load_risk_monitor
+    from agent_cache import AgentCache
+
     # Load data
-    portfolio = load_current_portfolio()
+    portfolio = load_current_portfolio(validate=args.validate_log)
+    market = load_market_data()
     prices = load_current_prices()
-    prices_df = pd.read_csv("prices_2025-11-04_1615_Europe-Madrid.csv")
+    risk_monitor = load_risk_monitor()
+    cache = None if args.no_agent_cache else AgentCache()
     
     if args.action == "scan":
         # Scan all available stocks
-        print("\n" + "=" * 80)
-        print("SCANNING ALL STOCKS FOR OPPORTUNITIES")
-        print("=" * 80)
+        print_scan_header()
         
-        opportunities = []
-        for ticker in prices.keys():
-            analysis = analyze_stock(ticker, prices_df)
-            if "error" in analysis:
-                continue
-            validation = validate_analysis(analysis)
-            recommendation = make_recommendation(ticker, portfolio, prices, analysis, validation)
-            
-            if recommendation["action"] == "BUY" and recommendation["priority"] >= 6:
-                opportunities.append({
-                    "ticker": ticker,
-                    "name": analysis["name"],
-                    "action": recommendation["action"],
-                    "priority": recommendation["priority"],
-                    "shares": recommendation["shares"],
-                    "cost": recommendation["shares"] * recommendation["price_eur"]
-                })
+        results, stats = run_scan(portfolio, prices, market, risk_monitor, cache, args.agent_backend,
+                                  args.concurrency, args.stub_latency)
+        if args.agent_backend != "local":
+            print(f"Agent-Aufrufe: {stats['calls']} ({stats['retries']} Retries, {stats['failures']} Fehler) "
+                  f"in {stats['elapsed']:.2f}s")
         
-        if opportunities:
-            opp_df = pd.DataFrame(opportunities).sort_values("priority", ascending=False)
-            print("\n🎯 TOP OPPORTUNITIES:")
-            print(opp_df.to_string(index=False))
-        else:
-            print("\n⚠ No high-priority opportunities found")
+        print_opportunities(scan_opportunities(results))
     
     elif args.ticker:
         # Analyze specific ticker
-        analysis = analyze_stock(args.ticker, prices_df)
-        
-        if "error" in analysis:
-            print(f"✗ Error: {analysis['error']}")
-            return
-        
-        validation = validate_analysis(analysis)
-        recommendation = make_recommendation(args.ticker, portfolio, prices, analysis, validation)
-        
-        print_recommendation(analysis, validation, recommendation)
-        
-        # Export für Documentation
-        export = {
-            "timestamp": datetime.now().isoformat(),
-            "analysis": analysis,
-            "validation": validation,
-            "recommendation": recommendation,
-        }
-        
-        filename = f"trade_decision_{args.ticker}_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
-        with open(filename, "w") as f:
-            json.dump(export, f, indent=2)
-        
-        print(f"\n✓ Decision exported: {filename}")
+        export_decision(args.ticker, run_recommend(args.ticker, portfolio, prices, market, risk_monitor, cache))
+    
+    if cache:
+        if args.cache_stats:
+            stats = cache.stats
+            print(f"\nAgent Cache: {stats['hits']} Hits, {stats['misses']} Misses, "
+                  f"{stats['saved_seconds']:.2f}s gespart")
+        cache.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Trade History Report - Audit-PDF über das komplette Trade Log
+
+Für Simulations-Logs mit zehntausenden Zeilen: das Trade Log wird in Chunks gelesen
+(pd.read_csv chunksize) und jeder Chunk als LongTable (Header auf jeder Seite) in das
+PDF gestreamt (report_render.render_stream). Es liegt nie das ganze Log oder die ganze
+Story im Speicher; der Speicherbedarf hängt nur von CHUNK_ROWS ab, nicht von der
+Anzahl Trades. Fortschritt wird pro Seite ausgegeben, eine Zusammenfassung
+(Anzahl, Volumen, Ticker) folgt am Ende.
+
+Verwendung:
+    python tools/trade_history_report.py portfolio_trades.csv
+    python tools/trade_history_report.py sim_trades.csv --out docs/audit.pdf --chunk-rows 500
+
+Author: Investment Team
+"""
+
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+from report_render import render_stream
+
+# -----------------------------
+# Configuration
+# -----------------------------
+CHUNK_ROWS = 250        # Zeilen pro gelesenem Chunk / LongTable
+REASON_CHARS = 28       # Begründung wird in der Tabelle gekürzt
+
+COLUMNS = ['Date', 'Action', 'Ticker', 'Shares', 'Price €', 'Total €', 'Cash €', 'Reason', 'AI Model']
+COL_WIDTHS = [2.5, 1.1, 1.6, 1.2, 1.6, 1.7, 1.7, 2.9, 1.7]  # cm, Summe = Satzspiegel A4
+TABLE_STYLE = ("striped", [
+    ('FONTSIZE', (0, 1), (-1, -1), 7),
+    ('ALIGN', (3, 0), (6, -1), 'RIGHT'),
+])
+
+
+def _text(value, width=None):
+    if pd.isna(value):
+        return ""
+    text = str(value)
+    return text if width is None or len(text) <= width else text[:width - 1] + "…"
+
+
+def _rows(chunk):
+    """Tabellenzeilen (Strings) eines Chunks"""
+    return [
+        [_text(t.date)[:16], t.action, t.ticker, f"{t.shares:g}", f"{t.price:.2f}", f"{t.total:.2f}",
+         f"{t.cash_after:.2f}", _text(t.reason, REASON_CHARS), _text(t.ai_model, 14)]
+        for t in chunk.itertuples(index=False)
+    ]
+
+
+def trade_history_items(log_path, chunk_rows=CHUNK_ROWS, stats=None):
+    """
+    Generator für render_stream(): Titel, eine LongTable pro Chunk, Zusammenfassung.
+    stats (dict) wird laufend aktualisiert (rows, chunks) - für die Fortschrittsanzeige.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(rows=0, chunks=0)
+    actions, volume, tickers = {}, {}, set()
+    first = last = None
+
+    yield ("p", "title", "Trade History Audit Report")
+    yield ("p", "body", f"Trade Log: {log_path}<br/>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    for chunk in pd.read_csv(log_path, chunksize=chunk_rows):
+        if chunk.empty:
+            continue
+        for action, group in chunk.groupby("action"):
+            actions[action] = actions.get(action, 0) + len(group)
+            volume[action] = volume.get(action, 0.0) + float(group["total"].sum())
+        tickers.update(chunk["ticker"].unique())
+        first = first if first is not None else _text(chunk["date"].iloc[0])[:16]
+        last = _text(chunk["date"].iloc[-1])[:16]
+
+        stats["rows"] += len(chunk)
+        stats["chunks"] += 1
+        yield ("longtable", [COLUMNS] + _rows(chunk), COL_WIDTHS, TABLE_STYLE)
+
+    yield ("spacer", 0.5)
+    yield ("p", "heading", "Summary")
+    if not stats["rows"]:
+        yield ("p", "body", "Keine Trades im Log.")
+        return
+    summary = [["Action", "Trades", "Volume €"]]
+    summary += [[a, str(actions[a]), f"{volume[a]:,.2f}"] for a in sorted(actions)]
+    summary.append(["Total", str(stats["rows"]), f"{sum(volume.values()):,.2f}"])
+    yield ("table", summary, [4, 3, 4], "totals")
+    yield ("p", "body", f"Zeitraum: {first} → {last}<br/>Ticker: {len(tickers)}")
+
+
+def stream_trade_report(log_path, path, chunk_rows=CHUNK_ROWS, progress=print):
+    """Audit-PDF aus dem Trade Log; progress(text) wird pro Seite aufgerufen (None = still)"""
+    stats = {}
+
+    def on_page(canvas, doc):
+        if progress:
+            progress(f"  Seite {doc.page}: {stats.get('rows', 0)} Trades gelesen")
+
+    render_stream(trade_history_items(log_path, chunk_rows, stats), path, on_page=on_page)
+    return {"path": path, "rows": stats["rows"], "chunks": stats["chunks"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit-PDF über das komplette Trade Log (gestreamt)")
+    parser.add_argument("log", nargs="?", default="portfolio_trades.csv")
+    parser.add_argument("--out", default="docs/trade_history_report.pdf")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--quiet", action="store_true", help="Keine Fortschrittsanzeige pro Seite")
+    args = parser.parse_args()
+
+    print(f"Generating Trade History Report from {args.log}...")
+    result = stream_trade_report(args.log, args.out, args.chunk_rows, progress=None if args.quiet else print)
+    print(f"✓ PDF created: {result['path']} ({result['rows']} Trades, {result['chunks']} Tabellen)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Workbook Loader - strukturierter, gecachter Zugriff auf data/stock worth.xlsx
+
+pd.read_excel ist der langsamste Schritt der Deliverable-Skripte, und Spalten über
+row.iloc[...] zu lesen bricht still, sobald eine Spalte verschoben wird. Dieser Loader:
+- löst Spalten über den Header-Namen auf (STOCK_WORTH_SCHEMA: logischer Name -> Header, Typ),
+  fehlende Header ergeben einen SchemaError statt falscher Zahlen
+- liefert nur die Aktien-Zeilen (bis zur 'Total'-Zeile) mit typisierten Spalten
+- cached das Ergebnis als Parquet neben dem Workbook (<workbook>.parquet); Schlüssel ist
+  mtime/Grösse des Workbooks, bei Abweichung zusätzlich der SHA-256 (z.B. nach touch)
+
+Verwendung:
+    stocks = load_stock_worth()              # DataFrame: stock, investment, shares, price_eur, worth, ...
+    stocks.loc[stocks["stock"] == "AMD", "worth"]
+
+    python tools/workbook_loader.py          # Tabelle ausgeben (--refresh: Cache neu aufbauen)
+
+Author: Investment Team
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# -----------------------------
+# Configuration
+# -----------------------------
+DEFAULT_WORKBOOK_PATH = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "stock worth.xlsx"))
+STOCK_WORTH_SHEET = "backup overview"
+CACHE_SUFFIX = ".parquet"
+CACHE_METADATA_KEY = b"workbook_cache"
+
+# logischer Name -> (Header im Workbook, Typ); Header-Vergleich ohne Gross-/Kleinschreibung und Whitespace
+STOCK_WORTH_SCHEMA = {
+    "stock": ("Stock", "string"),
+    "investment": ("Investment at start", "float64"),
+    "price_native_start": ("source price in_24.10.2025 original currency", "float64"),
+    "price_eur_start": ("share price in EUR_24.10.2025", "float64"),
+    "shares_start": ("shares_24.10.2025", "float64"),
+    "worth_start": ("Worth in Euro_24.10.2025", "float64"),
+    "price_native": ("source price in original currency_04.11.2025", "float64"),
+    "fx_rate": ("currency change to EUR_04.11.2025", "float64"),
+    "price_eur": ("price in EUR_04.11.2025", "float64"),
+    "shares": ("shares_04.11.2025", "float64"),
+    "worth": ("Worth_04.11.2025", "float64"),
+}
+TOTAL_LABEL = "total"  # Zeile mit diesem 'Stock'-Wert beendet die Aktien-Zeilen
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def _normalise(header):
+    return " ".join(str(header).split()).lower()
+
+
+def resolve_columns(headers, schema):
+    """{logischer Name: Header im Workbook}; SchemaError, wenn ein Header fehlt"""
+    available = {_normalise(h): h for h in headers}
+    resolved, missing = {}, []
+    for name, (header, _) in schema.items():
+        match = available.get(_normalise(header))
+        if match is None:
+            missing.append(header)
+        else:
+            resolved[name] = match
+    if missing:
+        raise SchemaError(f"Spalten nicht gefunden: {missing}. Vorhanden: {[str(h) for h in headers]}")
+    return resolved
+
+
+def parse_stock_worth(path, sheet=STOCK_WORTH_SHEET, schema=STOCK_WORTH_SCHEMA):
+    """Liest das Workbook (langsam) und gibt die typisierten Aktien-Zeilen zurück"""
+    raw = pd.read_excel(path, sheet_name=sheet)
+    columns = resolve_columns(raw.columns, schema)
+    df = raw[list(columns.values())].set_axis(list(columns), axis=1)
+
+    labels = df["stock"].map(lambda v: _normalise(v) if pd.notna(v) else None)
+    total_rows = labels.index[labels == TOTAL_LABEL]
+    if len(total_rows):
+        df = df.loc[:total_rows[0] - 1]
+    df = df[df["stock"].notna()]
+
+    for name, (_, dtype) in schema.items():
+        if dtype == "string":
+            df[name] = df[name].astype(str).str.strip()
+        else:
+            df[name] = pd.to_numeric(df[name], errors="coerce").astype(dtype)
+    return df.reset_index(drop=True)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_key(sheet, schema):
+    return hashlib.sha256(json.dumps([sheet, schema], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _read_cache_metadata(cache_path):
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+        return json.loads(metadata[CACHE_METADATA_KEY])
+    except (OSError, KeyError, ValueError, pa.ArrowException):
+        return None
+
+
+def load_stock_worth(path=DEFAULT_WORKBOOK_PATH, sheet=STOCK_WORTH_SHEET, schema=STOCK_WORTH_SCHEMA,
+                     cache_path=None, refresh=False):
+    """
+    Aktien-Zeilen des Workbooks als typisierter DataFrame (Spalten = Schlüssel von schema).
+    Gecacht unter cache_path (Default: <path>.parquet).
+    """
+    cache_path = cache_path or path + CACHE_SUFFIX
+    st = os.stat(path)
+    key = _cache_key(sheet, schema)
+
+    meta = None if refresh else _read_cache_metadata(cache_path)
+    sha256 = None
+    if meta is not None and meta.get("key") == key:
+        if (meta.get("mtime_ns"), meta.get("size")) == (st.st_mtime_ns, st.st_size):
+            return pd.read_parquet(cache_path)
+        sha256 = _file_sha256(path)
+        if meta.get("sha256") == sha256:  # nur mtime geändert: Cache gültig, Schlüssel auffrischen
+            df = pd.read_parquet(cache_path)
+            _write_cache(df, cache_path, key, st, sha256)
+            return df
+
+    df = parse_stock_worth(path, sheet, schema)
+    _write_cache(df, cache_path, key, st, sha256 or _file_sha256(path))
+    return df
+
+
+def _write_cache(df, cache_path, key, st, sha256):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = {"key": key, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": sha256}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), CACHE_METADATA_KEY: json.dumps(meta)})
+    tmp = cache_path + ".tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, cache_path)  # atomar, wie PriceStore.append
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aktien-Zeilen aus data/stock worth.xlsx (gecacht)")
+    parser.add_argument("path", nargs="?", default=DEFAULT_WORKBOOK_PATH)
+    parser.add_argument("--refresh", action="store_true", help="Workbook neu parsen und Cache ersetzen")
+    args = parser.parse_args()
+
+    try:
+        stocks = load_stock_worth(args.path, refresh=args.refresh)
+    except SchemaError as e:
+        print(f"✗ {e}")
+        return
+    print(stocks.to_string(index=False))
+    print(f"\n✓ {len(stocks)} Positionen, Worth gesamt: €{stocks['worth'].sum():.2f}")
+
+
+if __name__ == "__main__":
+    main()